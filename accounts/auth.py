@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+from django.db import close_old_connections
+
+# -------------------------
+# Authentication fast path
+# -------------------------
+# Every authenticated request used to load its User row in
+# AuthenticationMiddleware. CachedModelBackend keeps users in
+# AUTH_USER_CACHE_ALIAS (a per-process memory cache by default) for
+# AUTH_USER_CACHE_TIMEOUT seconds; saving or deleting a User drops its
+# entry in this process, other processes notice within the timeout.
+# Django still checks the session's password hash against the cached
+# user, so a password change elsewhere ends old sessions within the same
+# window.
+#
+# Password hashing is deliberately slow. The login and signup views hand
+# it to a small thread pool (hashlib releases the GIL while hashing) and
+# turn away attempts beyond LOGIN_HASH_QUEUE instead of letting them take
+# every server thread.
+
+CACHE_ALIAS = getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+HASH_WORKERS = getattr(settings, 'LOGIN_HASH_WORKERS', 4)
+HASH_QUEUE = getattr(settings, 'LOGIN_HASH_QUEUE', 32)
+
+
+def _cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def forget_user(user_id):
+    caches[CACHE_ALIAS].delete(_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_user() is served from a cache."""
+
+    def get_user(self, user_id):
+        cache = caches[CACHE_ALIAS]
+        user = cache.get(_cache_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(_cache_key(user_id), user, CACHE_TIMEOUT)
+        return user
+
+    async def aget_user(self, user_id):
+        cache = caches[CACHE_ALIAS]
+        user = await cache.aget(_cache_key(user_id))
+        if user is None:
+            # ModelBackend has no aget_user() before Django 5.2
+            user = await sync_to_async(super().get_user)(user_id)
+            if user is not None:
+                await cache.aset(_cache_key(user_id), user, CACHE_TIMEOUT)
+        return user
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is None and password is not None:
+            # stop here rather than let the plain ModelBackend listed after
+            # this one hash the same wrong password a second time
+            raise PermissionDenied
+        return user
+
+
+class Busy(Exception):
+    pass
+
+
+class HashingPool:
+    """
+    A ThreadPoolExecutor of `workers` threads that accepts at most `queue`
+    waiting jobs on top; run() raises Busy beyond that. With 0 workers
+    jobs run on the request's own thread (sync_to_async), still bounded.
+    """
+
+    def __init__(self, workers=HASH_WORKERS, queue=HASH_QUEUE):
+        self._executor = None
+        if workers:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue)
+
+    def _call(self, fn, args, kwargs):
+        close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    async def run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise Busy
+        try:
+            if self._executor is None:
+                return await sync_to_async(fn)(*args, **kwargs)
+            future = self._executor.submit(self._call, fn, args, kwargs)
+            return await asyncio.wrap_future(future)
+        finally:
+            self._slots.release()
+
+
+hashing_pool = HashingPool()
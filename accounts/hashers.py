@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core import checks
+
+# a lower PASSWORD_PBKDF2_ITERATIONS would re-hash passwords weaker at login
+MIN_ITERATIONS = hashers.PBKDF2PasswordHasher.iterations
+
+
+def work_factor(configured):
+    """`configured` iterations, but never fewer than Django's default."""
+    return max(configured or 0, MIN_ITERATIONS)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with PASSWORD_PBKDF2_ITERATIONS as its work
+    factor, raised to Django's default when set lower. The algorithm name
+    is unchanged, so existing hashes verify, and a hash made with a
+    different iteration count is redone with this one the next time its
+    owner logs in (Django's must_update/setter path).
+    """
+
+    iterations = work_factor(getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None))
+
+
+@checks.register(checks.Tags.security)
+def check_pbkdf2_iterations(app_configs, **kwargs):
+    configured = getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None)
+    if not configured or configured >= MIN_ITERATIONS:
+        return []
+    return [checks.Warning(
+        f"PASSWORD_PBKDF2_ITERATIONS={configured} is below Django's default of "
+        f'{MIN_ITERATIONS}; {MIN_ITERATIONS} is used instead.',
+        hint='Raise the setting or unset it (0 keeps the default).',
+        id='moviesstore.W003',
+    )]
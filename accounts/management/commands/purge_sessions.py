@@ -0,0 +1,42 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions in batches. Unlike clearsessions, each "
+        "batch is its own short transaction, so requests are not stuck "
+        "behind one long DELETE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--pause", type=float, default=0.0,
+            help="Seconds to sleep between batches.")
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, "get_model_class"):
+            self.stdout.write("Sessions live in the cache and expire there; nothing to purge.")
+            return
+        Session = store.get_model_class()
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+
+        purged = 0
+        while True:
+            # one indexed range read, then a delete by primary key
+            keys = list(expired.values_list("pk", flat=True)[:options["batch_size"]])
+            if not keys:
+                break
+            with transaction.atomic():
+                deleted, _ = Session.objects.filter(pk__in=keys).delete()
+            purged += deleted
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired sessions."))
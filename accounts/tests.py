@@ -1,3 +1,175 @@
-from django.test import TestCase
+import os
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from cart.checkout import checkout
+from cart.models import CustomerStats
+from instrumentation import plans
+from movies.models import Movie
+from moviesstore import sessions
+from moviesstore.sessions import db as session_db
+from moviesstore.sessions.serializers import CompactJSONSerializer
+from . import auth
+from . import hashers
+from .hashers import PBKDF2PasswordHasher
+
+
+class OrdersPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='pw')
+        cls.movie = Movie.objects.create(
+            name='Movie', price=5, description='desc', image='movie_images/x.jpg'
+        )
+
+    def _add_orders(self, n):
+        for _ in range(n):
+            checkout(self.user, {self.movie.id: 2})
+
+    def _count_queries(self):
+        caches[auth.CACHE_ALIAS].clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('accounts.orders'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_constant(self):
+        self.client.force_login(self.user)
+        self._add_orders(2)
+        small = self._count_queries()
+        self._add_orders(18)
+        self.assertEqual(self._count_queries(), small)
+
+    def test_history_is_paginated_and_totals_are_precomputed(self):
+        self.client.force_login(self.user)
+        self._add_orders(12)
+        response = self.client.get(reverse('accounts.orders'))
+        self.assertEqual(len(response.context['template_data']['orders']), 10)
+        stats = CustomerStats.objects.get(user=self.user)
+        self.assertEqual(
+            (stats.order_count, stats.items_purchased, stats.lifetime_total),
+            (12, 24, 120),
+        )
+
+    @skipUnless(connection.vendor == 'sqlite', 'query plans are checked on SQLite')
+    def test_history_pages_are_read_from_an_index(self):
+        self.client.force_login(self.user)
+        self._add_orders(12)
+        url = reverse('accounts.orders')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+            next_query = response.context['template_data']['orders'].next_query
+            self.client.get(url + '?' + next_query)
+        self.assertEqual(plans.check_queries(ctx.captured_queries), {})
+
+
+class SessionTests(TestCase):
+    def test_compact_serializer_round_trips(self):
+        data = {
+            '_auth_user_id': '7', 'cart_id': 3,
+            'favorite_movie_ids': [2, 40, 1000], 'other': {'a': 1},
+        }
+        serializer = CompactJSONSerializer()
+        self.assertEqual(serializer.loads(serializer.dumps(data)), data)
+        # sessions stored by Django's JSONSerializer still load
+        self.assertEqual(serializer.loads(b'{"cart_id":3}'), {'cart_id': 3})
+
+    def test_unchanged_session_is_not_written(self):
+        session = session_db.SessionStore()
+        session['cart_id'] = 3
+        session.save()
+        session = session_db.SessionStore(session.session_key)
+        session['cart_id'] = 3
+        with CaptureQueriesContext(connection) as ctx:
+            session.save()
+        self.assertEqual(len(ctx.captured_queries), 0)
+        session['cart_id'] = 4
+        session.save()
+        self.assertEqual(session_db.SessionStore(session.session_key)['cart_id'], 4)
+
+    def test_cache_backed_sessions_need_a_shared_cache(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}
+        with mock.patch.dict(os.environ):
+            os.environ.pop('SESSION_BACKEND', None)
+            self.assertEqual(sessions.engine_from_environment(locmem), sessions.ENGINES['db'])
+            self.assertEqual(sessions.engine_from_environment(redis), sessions.ENGINES['cached_db'])
+
+        with override_settings(SESSION_ENGINE=sessions.ENGINES['cached_db'], CACHES=locmem):
+            self.assertEqual(
+                [w.id for w in sessions.check_session_cache(None)], ['moviesstore.W001'],
+            )
+        with override_settings(SESSION_ENGINE=sessions.ENGINES['cached_db'], CACHES=redis):
+            self.assertEqual(sessions.check_session_cache(None), [])
+
+
+class AuthFastPathTests(TestCase):
+    def setUp(self):
+        caches[auth.CACHE_ALIAS].clear()
+        self.user = User.objects.create_user('fan', password='pw')
+
+    def test_signed_in_user_is_read_from_cache(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('home.index'))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('home.index'))
+        self.assertFalse([q for q in ctx.captured_queries if 'auth_user' in q['sql']])
+
+    def test_login_rehashes_with_configured_iterations(self):
+        weak = PBKDF2PasswordHasher()
+        weak.iterations = 1000
+        User.objects.filter(id=self.user.id).update(password=make_password('pw', hasher=weak))
+        # pool threads would not see the test transaction
+        with mock.patch('accounts.views.hashing_pool', auth.HashingPool(workers=0)):
+            response = self.client.post(
+                reverse('accounts.login'), {'username': 'fan', 'password': 'pw'})
+        self.assertEqual(response.status_code, 302)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password.split('$')[1], str(PBKDF2PasswordHasher.iterations))
+
+    def test_iterations_never_drop_below_the_default(self):
+        self.assertEqual(hashers.work_factor(1000), hashers.MIN_ITERATIONS)
+        self.assertEqual(hashers.work_factor(0), hashers.MIN_ITERATIONS)
+        self.assertEqual(hashers.work_factor(hashers.MIN_ITERATIONS * 2), hashers.MIN_ITERATIONS * 2)
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            self.assertEqual(
+                [w.id for w in hashers.check_pbkdf2_iterations(None)], ['moviesstore.W003'],
+            )
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=0):
+            self.assertEqual(hashers.check_pbkdf2_iterations(None), [])
+
+    def test_login_is_refused_when_hashing_pool_is_full(self):
+        full = auth.HashingPool(workers=0, queue=0)
+        full._slots.acquire()
+        with mock.patch('accounts.views.hashing_pool', full):
+            response = self.client.post(
+                reverse('accounts.login'), {'username': 'fan', 'password': 'pw'})
+        self.assertEqual(response.status_code, 503)
+
+    def test_sessions_from_before_the_cached_backend_stay_signed_in(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('home.index'))
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_wrong_password_is_hashed_once(self):
+        with mock.patch.object(PBKDF2PasswordHasher, 'verify', return_value=False) as verify:
+            self.assertIsNone(authenticate(username='fan', password='nope'))
+        self.assertEqual(verify.call_count, 1)
+
+    async def test_async_user_lookup_uses_the_async_cache_api(self):
+        backend = auth.CachedModelBackend()
+        cache = caches[auth.CACHE_ALIAS]
+        aget = mock.AsyncMock(wraps=cache.aget)
+        aset = mock.AsyncMock(wraps=cache.aset)
+        with mock.patch.object(cache, 'aget', aget), mock.patch.object(cache, 'aset', aset):
+            self.assertEqual(await backend.aget_user(self.user.id), self.user)
+            self.assertEqual(await backend.aget_user(self.user.id), self.user)
+        self.assertEqual((aget.await_count, aset.await_count), (2, 1))
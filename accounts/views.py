@@ -1,48 +1,75 @@
 from django.shortcuts import render
-from django.contrib.auth import login as auth_login, authenticate, logout as auth_logout
+from django.contrib.auth import alogin, authenticate, logout as auth_logout
 from .forms import CustomUserCreationForm, CustomErrorList
 from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from cart.models import OrderSummary, CustomerStats
+from movies.pagination import paginate
+from .auth import Busy, hashing_pool
 
 @login_required
 def logout(request):
     auth_logout(request)
     return redirect('home.index')
 
-def login(request):
+BUSY_ERROR = 'We are handling a lot of sign-ins right now. Please try again in a moment.'
+
+def _busy(request, template, template_data):
+    response = render(request, template, {'template_data': template_data}, status=503)
+    response['Retry-After'] = '5'
+    return response
+
+async def login(request):
     template_data = {}
     template_data['title'] = 'Login'
+    # resolve the (cached) user up front so rendering never queries
+    request.user = await request.auser()
     if request.method == 'GET':
         return render(request, 'accounts/login.html',
             {'template_data': template_data})
     elif request.method == 'POST':
-        user = authenticate(
-            request,
-            username = request.POST['username'],
-            password = request.POST['password']
-        )
+        try:
+            # password hashing runs in the bounded pool, see accounts/auth.py
+            user = await hashing_pool.run(
+                authenticate,
+                request,
+                username = request.POST['username'],
+                password = request.POST['password']
+            )
+        except Busy:
+            template_data['error'] = BUSY_ERROR
+            return _busy(request, 'accounts/login.html', template_data)
         if user is None:
             template_data['error'] = 'The username or password is incorrect.'
             return render(request, 'accounts/login.html',
                 {'template_data': template_data})
         else:
-            auth_login(request, user)
+            await alogin(request, user)
             return redirect('home.index')
-def signup(request):
+async def signup(request):
     template_data = {}
     template_data['title'] = 'Sign Up'
+    request.user = await request.auser()
     if request.method == 'GET':
         template_data['form'] = CustomUserCreationForm()
         return render(request, 'accounts/signup.html',
             {'template_data': template_data})
     elif request.method == 'POST':
         form = CustomUserCreationForm(request.POST, error_class=CustomErrorList)
-        if form.is_valid():
-            form.save()
+        template_data['form'] = form
+        try:
+            # validation queries the database and save() hashes the password
+            created = await hashing_pool.run(lambda: form.is_valid() and form.save())
+        except Busy:
+            # unbound: rendering a bound form would validate it here
+            template_data['form'] = CustomUserCreationForm(
+                initial={'username': request.POST.get('username', '')})
+            template_data['error'] = BUSY_ERROR
+            return _busy(request, 'accounts/signup.html', template_data)
+        if created:
             return redirect('accounts.login')
         else:
-            template_data['form'] = form
             return render(request, 'accounts/signup.html',
                 {'template_data': template_data})
         
@@ -50,6 +77,10 @@ def signup(request):
 def orders(request):
     template_data = {}
     template_data['title'] = 'Orders'
-    template_data['orders'] = request.user.order_set.all()
+    # one indexed read of the materialized history per page
+    template_data['orders'] = paginate(request,
+        OrderSummary.objects.filter(user=request.user), ['-date', '-pk'],
+        page_size=10)
+    template_data['stats'] = CustomerStats.objects.filter(user=request.user).first()
     return render(request, 'accounts/orders.html',
         {'template_data': template_data})
\ No newline at end of file
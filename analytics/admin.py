@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import MovieSalesDaily
+
+class MovieSalesDailyAdmin(admin.ModelAdmin):
+    list_display = ['day', 'movie', 'orders', 'units', 'revenue']
+    list_select_related = ['movie']
+    date_hierarchy = 'day'
+
+admin.site.register(MovieSalesDaily, MovieSalesDailyAdmin)
@@ -0,0 +1,41 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from analytics import rollup
+from cart.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute daily per-movie sales rollups from orders. By default "
+        "only the last --days days are rebuilt; run it periodically (e.g. "
+        "nightly) to repair anything checkout did not record."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=2)
+        parser.add_argument("--full", action="store_true",
+            help="Rebuild every day that has orders.")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options["full"]:
+            bounds = Order.objects.aggregate(first=Min("date"), last=Max("date"))
+            if bounds["first"] is None:
+                self.stdout.write("No orders.")
+                return
+            start = timezone.localdate(bounds["first"])
+            end = max(today, timezone.localdate(bounds["last"]))
+        else:
+            if options["days"] < 1:
+                raise CommandError("--days must be at least 1.")
+            start = today - datetime.timedelta(days=options["days"] - 1)
+            end = today
+
+        rows = rollup.rebuild_days(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rows} rollup rows for {start} to {end}."
+        ))
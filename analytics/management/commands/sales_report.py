@@ -0,0 +1,65 @@
+import datetime
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from analytics import reports
+
+
+class Command(BaseCommand):
+    help = (
+        "Print top sellers, a revenue time series and optionally the price "
+        "elasticity of one movie, computed from the daily sales rollups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--top", type=int, default=10)
+        parser.add_argument("--by", choices=["revenue", "units", "orders"], default="revenue")
+        parser.add_argument("--period", choices=["day", "week"], default="day")
+        parser.add_argument("--movie", type=int,
+            help="Limit the series to this movie and show its price elasticity.")
+        parser.add_argument("--json", action="store_true", help="Print JSON.")
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1.")
+        end = timezone.localdate()
+        start = end - datetime.timedelta(days=options["days"] - 1)
+
+        report = {
+            "start": start,
+            "end": end,
+            "top_sellers": reports.top_sellers(start, end, options["top"], options["by"]),
+            "series": reports.revenue_series(start, end, options["period"], options["movie"]),
+        }
+        if options["movie"]:
+            report["elasticity"] = reports.price_elasticity(options["movie"], start, end)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        self.stdout.write(f"Sales {start} to {end}\n")
+        self.stdout.write(f"Top sellers by {options['by']}:")
+        for i, r in enumerate(report["top_sellers"], 1):
+            self.stdout.write(
+                f"  {i:>2}. {r['name'][:40]:<40} units {r['units']:>6}  "
+                f"revenue ${r['revenue']:>8}  orders {r['orders']:>5}"
+            )
+        self.stdout.write(f"\nRevenue per {options['period']}:")
+        for r in report["series"]:
+            self.stdout.write(f"  {r['period']}  units {r['units']:>6}  revenue ${r['revenue']:>8}")
+        if "elasticity" in report:
+            self.stdout.write("\nPrice elasticity:")
+            for r in report["elasticity"] or [{"from_price": None}]:
+                if r["from_price"] is None:
+                    self.stdout.write("  not enough distinct prices")
+                    break
+                self.stdout.write(
+                    f"  ${r['from_price']} -> ${r['to_price']}: "
+                    f"{r['from_units']} -> {r['to_units']} units/day, "
+                    f"elasticity {r['elasticity']}"
+                )
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.14 on 2026-10-17 15:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('movies', '0006_movie_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='movies.movie')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'movie'], name='sales_day_movie_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='moviesalesdaily',
+            constraint=models.UniqueConstraint(fields=('movie', 'day'), name='unique_movie_day'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import models
+
+from movies.models import Movie
+
+class MovieSalesDaily(models.Model):
+    # per-movie, per-day sales rollup; reports read this, never cart.Item
+    movie = models.ForeignKey(Movie,
+        on_delete=models.CASCADE)
+    day = models.DateField()
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.BigIntegerField(default=0)
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['movie', 'day'], name='unique_movie_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'movie'], name='sales_day_movie_idx'),
+        ]
+    def __str__(self):
+        return str(self.day) + ' - ' + str(self.movie_id) + ': ' + str(self.units)
@@ -0,0 +1,107 @@
+import datetime
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncWeek
+
+from movies.models import Movie
+from .models import MovieSalesDaily
+
+# -------------------------
+# Sales reports
+# -------------------------
+# Every report aggregates MovieSalesDaily (one row per movie per day) and
+# never scans cart.Item, so report cost follows catalog size and date
+# range, not order volume.
+
+
+def _rollups(start=None, end=None, movie_id=None):
+    qs = MovieSalesDaily.objects.all()
+    if start is not None:
+        qs = qs.filter(day__gte=start)
+    if end is not None:
+        qs = qs.filter(day__lte=end)
+    if movie_id is not None:
+        qs = qs.filter(movie_id=movie_id)
+    return qs
+
+
+def top_sellers(start=None, end=None, limit=10, by='revenue'):
+    """[{movie_id, name, units, revenue, orders}] ranked by `by`."""
+    if by not in ('revenue', 'units', 'orders'):
+        raise ValueError(f'Cannot rank by {by!r}.')
+    rows = list(
+        _rollups(start, end)
+        .values('movie_id')
+        .annotate(units=Sum('units'), revenue=Sum('revenue'), orders=Sum('orders'))
+        .order_by(f'-{by}', 'movie_id')[:limit]
+    )
+    names = dict(
+        Movie.objects.filter(id__in=[r['movie_id'] for r in rows])
+        .values_list('id', 'name')
+    )
+    for r in rows:
+        r['name'] = names.get(r['movie_id'], '')
+    return rows
+
+
+def revenue_series(start, end, period='day', movie_id=None):
+    """
+    Revenue and units per day or per ISO week over [start, end], with empty
+    periods filled with zeros: [{period, units, revenue}].
+    """
+    qs = _rollups(start, end, movie_id)
+    if period == 'week':
+        qs = qs.annotate(period=TruncWeek('day'))
+        step = datetime.timedelta(weeks=1)
+        first = start - datetime.timedelta(days=start.weekday())
+    elif period == 'day':
+        qs = qs.annotate(period=F('day'))
+        step = datetime.timedelta(days=1)
+        first = start
+    else:
+        raise ValueError(f'Unknown period {period!r}.')
+    totals = {
+        r['period']: r
+        for r in qs.values('period').annotate(
+            units=Sum('units'), revenue=Sum('revenue')
+        ).order_by()
+    }
+    series = []
+    current = first
+    while current <= end:
+        row = totals.get(current, {})
+        series.append({
+            'period': current,
+            'units': row.get('units') or 0,
+            'revenue': row.get('revenue') or 0,
+        })
+        current += step
+    return series
+
+
+def price_elasticity(movie_id, start=None, end=None):
+    """
+    Arc elasticity of daily demand between consecutive average price points
+    for one movie: [{from_price, to_price, from_units, to_units, elasticity}].
+    Average price per day is revenue / units, so price changes show up even
+    though rollups do not store prices.
+    """
+    by_price = {}
+    rows = _rollups(start, end, movie_id).filter(units__gt=0).values_list('units', 'revenue')
+    for units, revenue in rows:
+        price = round(revenue / units, 2)
+        days, total_units = by_price.get(price, (0, 0))
+        by_price[price] = (days + 1, total_units + units)
+
+    # mean units sold per day at each price, cheapest first
+    points = sorted((price, total / days) for price, (days, total) in by_price.items())
+    result = []
+    for (p0, q0), (p1, q1) in zip(points, points[1:]):
+        dq = (q1 - q0) / ((q1 + q0) / 2) if q1 + q0 else 0
+        dp = (p1 - p0) / ((p1 + p0) / 2) if p1 + p0 else 0
+        result.append({
+            'from_price': p0, 'to_price': p1,
+            'from_units': round(q0, 2), 'to_units': round(q1, 2),
+            'elasticity': round(dq / dp, 3) if dp else None,
+        })
+    return result
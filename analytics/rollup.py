@@ -0,0 +1,84 @@
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from cart.models import Item, Order
+from .models import MovieSalesDaily
+
+# -------------------------
+# Daily sales rollups
+# -------------------------
+# Checkout queues analytics.tasks.record_order, which adds the order to
+# MovieSalesDaily shortly after it commits. rebuild_days() recomputes whole
+# days from cart.Item; the rollup_recent periodic task and the rollup_sales
+# command run it to repair anything missed, touching only the days asked for.
+# Both flag the orders they count (Order.rolled_up) in the same transaction
+# as the rollup write, so whichever runs second leaves an order alone.
+
+
+def record_order(order, lines):
+    """
+    Add an order to the rollup. `lines` are dicts with movie_id, price and
+    quantity. Call inside a transaction so a failure adds nothing.
+    """
+    day = timezone.localdate(order.date)
+    for line in lines:
+        _add(line['movie_id'], day, line['quantity'], line['price'] * line['quantity'])
+
+
+def _add(movie_id, day, units, revenue):
+    updated = MovieSalesDaily.objects.filter(movie_id=movie_id, day=day).update(
+        orders=F('orders') + 1,
+        units=F('units') + units,
+        revenue=F('revenue') + revenue,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            MovieSalesDaily.objects.create(
+                movie_id=movie_id, day=day, orders=1, units=units, revenue=revenue,
+            )
+    except IntegrityError:
+        # a concurrent checkout created the row first
+        _add(movie_id, day, units, revenue)
+
+
+def rebuild_days(start, end):
+    """
+    Recompute the rollup for every day in [start, end] from cart.Item with a
+    single grouped query. Returns the number of rollup rows written.
+    """
+    tz = timezone.get_current_timezone()
+    since = datetime.datetime.combine(start, datetime.time.min, tzinfo=tz)
+    until = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz)
+    orders = Order.objects.filter(date__gte=since, date__lt=until)
+    rows = (
+        Item.objects
+        # only orders flagged below: one committing mid-rebuild is left to
+        # its record_order task
+        .filter(order__date__gte=since, order__date__lt=until, order__rolled_up=True)
+        .annotate(day=TruncDate('order__date', tzinfo=tz))
+        .values('movie_id', 'day')
+        .annotate(
+            n_orders=Count('order_id', distinct=True),
+            n_units=Sum('quantity'),
+            n_revenue=Sum(F('price') * F('quantity')),
+        )
+        .order_by()
+    )
+    with transaction.atomic():
+        orders.filter(rolled_up=False).update(rolled_up=True)
+        rollups = [
+            MovieSalesDaily(
+                movie_id=r['movie_id'], day=r['day'], orders=r['n_orders'],
+                units=r['n_units'], revenue=r['n_revenue'],
+            )
+            for r in rows
+        ]
+        MovieSalesDaily.objects.filter(day__gte=start, day__lte=end).delete()
+        MovieSalesDaily.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
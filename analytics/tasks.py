@@ -0,0 +1,27 @@
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from cart.models import Item, Order
+from taskqueue.queue import task
+from . import rollup
+
+
+@task(max_attempts=5, retry_delay=30)
+def record_order(order_id):
+    """Add a finished checkout to the daily sales rollup, at most once."""
+    with transaction.atomic():
+        # a rebuild or an earlier attempt of this task may have counted it
+        if not Order.objects.filter(id=order_id, rolled_up=False).update(rolled_up=True):
+            return
+        order = Order.objects.get(id=order_id)
+        lines = list(Item.objects.filter(order=order).values('movie_id', 'price', 'quantity'))
+        rollup.record_order(order, lines)
+
+
+@task(max_attempts=3, retry_delay=300)
+def rollup_recent():
+    """Recompute yesterday's and today's rollups, repairing any drift."""
+    today = timezone.localdate()
+    rollup.rebuild_days(today - datetime.timedelta(days=1), today)
@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from cart.checkout import checkout
+from movies.models import Movie
+from . import rollup, tasks
+from .models import MovieSalesDaily
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='pw')
+        cls.movie = Movie.objects.create(
+            name='Movie', price=5, description='desc', image='movie_images/x.jpg'
+        )
+
+    def _units(self):
+        return MovieSalesDaily.objects.get(movie=self.movie).units
+
+    def test_task_after_rebuild_adds_nothing(self):
+        today = timezone.localdate()
+        order = checkout(self.user, {self.movie.id: 1})
+        rollup.rebuild_days(today, today)
+        tasks.record_order(order.id)
+        self.assertEqual(self._units(), 1)
+
+    def test_retried_task_counts_once(self):
+        orders = [checkout(self.user, {self.movie.id: 1}) for _ in range(2)]
+        for order in orders + orders:
+            tasks.record_order(order.id)
+        self.assertEqual(self._units(), 2)
+        today = timezone.localdate()
+        rollup.rebuild_days(today, today)
+        self.assertEqual(self._units(), 2)
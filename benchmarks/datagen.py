@@ -0,0 +1,153 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from analytics import rollup
+from cart import history
+from cart.models import Item, Order
+from movies import cache as catalog_cache
+from movies import search
+from movies.models import Movie, Petition, PetitionVote, Review
+
+# -------------------------
+# Synthetic data
+# -------------------------
+# Every generated row is tagged with a prefix so `bench_seed --clear` can
+# remove it again without touching real data.
+
+USER_PREFIX = 'bench_user_'
+# logs in for the staff-only pages in traffic.all_urls
+STAFF_USERNAME = f'{USER_PREFIX}staff'
+MOVIE_PREFIX = 'Bench Movie '
+PASSWORD = 'bench-pass-123'
+IMAGE = 'movie_images/superman.webp'
+
+WORDS = [
+    'dark', 'night', 'return', 'empire', 'star', 'galaxy', 'knight', 'city',
+    'shadow', 'legend', 'storm', 'ocean', 'fire', 'ice', 'secret', 'last',
+]
+
+
+def plan(scale):
+    """Row counts for a catalog of `scale` movies."""
+    return {
+        'movies': scale,
+        'users': max(20, scale // 10),
+        'reviews': scale * 3,
+        'petitions': max(5, scale // 10),
+        'votes_per_petition': 10,
+        'orders': scale // 2,
+    }
+
+
+def _batched(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _bulk(model, rows, batch_size):
+    ids = []
+    for batch in _batched(rows, batch_size):
+        with transaction.atomic():
+            ids.extend(obj.id for obj in model.objects.bulk_create(batch))
+    return ids
+
+
+def seed(scale, batch_size=5000, seed_value=0, log=print):
+    rng = random.Random(seed_value)
+    counts = plan(scale)
+    start = Movie.objects.filter(name__startswith=MOVIE_PREFIX).count()
+    first_user = (
+        User.objects.filter(username__startswith=USER_PREFIX)
+        .exclude(username=STAFF_USERNAME).count()
+    )
+
+    password = make_password(PASSWORD)  # hash once, share across users
+    user_ids = _bulk(User, (
+        User(username=f'{USER_PREFIX}{first_user + i}', password=password)
+        for i in range(counts['users'])
+    ), batch_size)
+    User.objects.update_or_create(
+        username=STAFF_USERNAME, defaults={'password': password, 'is_staff': True},
+    )
+    log(f'users: {len(user_ids)}')
+
+    movie_ids = _bulk(Movie, (
+        Movie(
+            name=f'{MOVIE_PREFIX}{start + i} ' + ' '.join(rng.sample(WORDS, 2)),
+            price=rng.randint(1, 30),
+            description=' '.join(rng.choices(WORDS, k=20)),
+            image=IMAGE,
+        )
+        for i in range(counts['movies'])
+    ), batch_size)
+    log(f'movies: {len(movie_ids)}')
+
+    _bulk(Review, (
+        Review(movie_id=rng.choice(movie_ids), user_id=rng.choice(user_ids),
+               comment=' '.join(rng.choices(WORDS, k=8)))
+        for _ in range(counts['reviews'])
+    ), batch_size)
+    log(f'reviews: {counts["reviews"]}')
+
+    votes_per = min(counts['votes_per_petition'], len(user_ids) - 1)
+    petition_ids = _bulk(Petition, (
+        Petition(title=' '.join(rng.sample(WORDS, 3)).title(),
+                 created_by_id=rng.choice(user_ids), vote_count=votes_per)
+        for _ in range(counts['petitions'])
+    ), batch_size)
+    creators = dict(Petition.objects.filter(id__in=petition_ids)
+                    .values_list('id', 'created_by_id'))
+    _bulk(PetitionVote, (
+        PetitionVote(petition_id=pid, user_id=uid)
+        for pid in petition_ids
+        for uid in rng.sample([u for u in user_ids if u != creators[pid]], votes_per)
+    ), batch_size)
+    log(f'petitions: {len(petition_ids)} ({votes_per} votes each)')
+
+    prices = dict(Movie.objects.filter(id__in=movie_ids).values_list('id', 'price'))
+    order_lines = []
+    order_ids = []
+    for batch in _batched(range(counts['orders']), batch_size):
+        lines = [
+            {m: rng.randint(1, 3) for m in rng.sample(movie_ids, rng.randint(1, 3))}
+            for _ in batch
+        ]
+        orders = _bulk(Order, (
+            Order(user_id=rng.choice(user_ids),
+                  total=sum(prices[m] * q for m, q in cart.items()))
+            for cart in lines
+        ), batch_size)
+        order_ids.extend(orders)
+        order_lines.extend(zip(orders, lines))
+    _bulk(Item, (
+        Item(order_id=order_id, movie_id=m, price=prices[m], quantity=q)
+        for order_id, cart in order_lines
+        for m, q in cart.items()
+    ), batch_size)
+    log(f'orders: {len(order_ids)}')
+
+    # bulk_create skips signals and checkout: refresh the derived tables
+    history.rebuild(batch_size=batch_size)
+    today = timezone.localdate()
+    rollup.rebuild_days(today, today)
+    search.rebuild_index()
+    catalog_cache.bump_catalog()
+    return counts
+
+
+def clear():
+    with transaction.atomic():
+        User.objects.filter(username__startswith=USER_PREFIX).delete()
+        Movie.objects.filter(name__startswith=MOVIE_PREFIX).delete()
+    search.rebuild_index()
+    catalog_cache.bump_catalog()
@@ -0,0 +1,77 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import traffic
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a traffic mix and report p50/p95/p99 latency, queries per "
+        "request and peak memory per URL. Without --url the project is "
+        "driven in-process through the test client; with --url a running "
+        "WSGI or ASGI server is driven over HTTP, e.g. run once against "
+        "gunicorn and once against uvicorn to compare them. --budget makes "
+        "the run fail when a limit is exceeded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mix", choices=sorted(traffic.MIXES), default="default")
+        parser.add_argument("--iterations", type=int, default=200,
+            help="Number of scenarios to run.")
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument("--url", help="Base URL of a running server.")
+        parser.add_argument("--host", default="localhost",
+            help="Host header for in-process runs; must be in ALLOWED_HOSTS.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--budget",
+            help='JSON file of limits, e.g. {"*": {"p95_ms": 200}, '
+                 '"movies.index": {"queries": 5}}.')
+        parser.add_argument("--json", dest="json_out",
+            help="Also write the summary to this file.")
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            make_driver = lambda: traffic.HttpDriver(options["url"])
+        else:
+            make_driver = lambda: traffic.InProcessDriver(options["host"])
+
+        try:
+            samples, elapsed = traffic.run(
+                make_driver, options["mix"], options["iterations"],
+                concurrency=options["concurrency"], seed_value=options["seed"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        rows = traffic.summarize(samples)
+
+        self.stdout.write(
+            f"{'url':<28} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} "
+            f"{'queries':>8} {'errors':>6}"
+        )
+        for label, row in rows.items():
+            queries = "-" if row["queries"] is None else str(row["queries"])
+            self.stdout.write(
+                f"{label:<28} {row['count']:>6} {row['p50_ms']:>8.1f} "
+                f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                f"{queries:>8} {row['errors']:>6}"
+            )
+        self.stdout.write(
+            f"{len(samples)} requests in {elapsed:.1f}s "
+            f"({len(samples) / elapsed:.1f} req/s), "
+            f"peak RSS {traffic.peak_rss_mb():.0f} MB"
+        )
+
+        if options["json_out"]:
+            with open(options["json_out"], "w") as f:
+                json.dump({"urls": rows, "requests": len(samples),
+                           "seconds": elapsed, "peak_rss_mb": traffic.peak_rss_mb()},
+                          f, indent=2)
+
+        if options["budget"]:
+            violations = traffic.check_budget(rows, traffic.load_budget(options["budget"]))
+            if violations:
+                for v in violations:
+                    self.stderr.write(v)
+                raise CommandError(f"{len(violations)} budget violation(s).")
+            self.stdout.write(self.style.SUCCESS("Within budget."))
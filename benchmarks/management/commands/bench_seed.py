@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks import datagen
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic movies, users, reviews, petitions, votes and "
+        "orders for benchmarking. --scale is the number of movies "
+        "(1000 to 1000000); the other tables scale with it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--clear", action="store_true",
+            help="Delete previously generated benchmark data and exit.")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            datagen.clear()
+            self.stdout.write(self.style.SUCCESS("Benchmark data removed."))
+            return
+        datagen.seed(
+            options["scale"],
+            batch_size=options["batch_size"],
+            seed_value=options["seed"],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS("Benchmark data generated."))
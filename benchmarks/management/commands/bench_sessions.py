@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay anonymous browsing under stock database sessions and under "
+        "each moviesstore.sessions engine, and report database writes and "
+        "session queries per 1,000 page views. Needs `manage.py bench_seed` data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default=",".join(sessions.MODES),
+            help="Comma-separated subset of: " + ", ".join(sessions.MODES))
+        parser.add_argument("--views", type=int, default=1000)
+        parser.add_argument("--visitors", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", dest="json_out",
+            help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        modes = [m for m in options["modes"].split(",") if m]
+        unknown = set(modes) - set(sessions.MODES)
+        if unknown or not modes:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown)) or '(none)'}")
+
+        self.stdout.write(
+            f"{'mode':>9} {'views':>6} {'writes/1k':>10} {'sess rd/1k':>11} "
+            f"{'sess wr/1k':>11} {'bytes':>6} {'ms/view':>8}"
+        )
+        results = []
+        for mode in modes:
+            try:
+                row = sessions.run(mode, options["views"], options["visitors"], options["seed"])
+            except ValueError as e:
+                raise CommandError(str(e))
+            results.append(row)
+            self.stdout.write(
+                f"{mode:>9} {row['views']:>6} {row['writes_per_1k']:>10.1f} "
+                f"{row['session_reads_per_1k']:>11.1f} {row['session_writes_per_1k']:>11.1f} "
+                f"{row['session_bytes']:>6.0f} {row['ms_per_view']:>8.2f}"
+            )
+
+        if options["json_out"]:
+            with open(options["json_out"], "w") as f:
+                json.dump(results, f, indent=2)
@@ -0,0 +1,70 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import votes, writes
+
+
+class Command(BaseCommand):
+    help = (
+        "Flood a few new petitions with votes from concurrent threads, once "
+        "with a write transaction per vote and once through the buffered "
+        "ingestion in movies/votes.py, and report sustained votes stored "
+        "per second. Needs `manage.py bench_seed` users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", default="1,4,8,16",
+            help="Comma-separated voter thread counts to try.")
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument("--modes", default=",".join(votes.MODES),
+            help="Comma-separated subset of: " + ", ".join(votes.MODES))
+        parser.add_argument("--petitions", type=int, default=5)
+        parser.add_argument("--voters", type=int, default=20000,
+            help="Throwaway voter accounts to create for the run.")
+        parser.add_argument("--interval", type=float, default=None,
+            help="Buffer flush interval in seconds (default: PETITION_VOTE_FLUSH_INTERVAL).")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", dest="json_out",
+            help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            thread_counts = [int(n) for n in options["threads"].split(",")]
+        except ValueError:
+            raise CommandError("--threads must be a comma-separated list of integers.")
+        modes = [m for m in options["modes"].split(",") if m]
+        unknown = set(modes) - set(votes.MODES)
+        if unknown or not modes:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown)) or '(none)'}")
+        buffer_options = {
+            key: options[key] for key in ("interval", "batch_size") if options[key] is not None
+        }
+
+        self.stdout.write(writes.describe_database())
+        self.stdout.write(
+            f"{'mode':>9} {'threads':>7} {'stored':>8} {'votes/s':>9} {'p50':>8} "
+            f"{'p95':>8} {'dupes':>7} {'locked':>7} {'drift':>6}"
+        )
+        results = []
+        for mode in modes:
+            for threads in thread_counts:
+                try:
+                    row = votes.run(mode, threads, options["seconds"], options["petitions"],
+                                    options["voters"],
+                                    seed_value=options["seed"], **buffer_options)
+                except ValueError as e:
+                    raise CommandError(str(e))
+                results.append(row)
+                p50 = "-" if row["p50_ms"] is None else f"{row['p50_ms']:.2f}"
+                p95 = "-" if row["p95_ms"] is None else f"{row['p95_ms']:.2f}"
+                self.stdout.write(
+                    f"{mode:>9} {threads:>7} {row['stored']:>8} {row['votes_per_s']:>9.1f} "
+                    f"{p50:>8} {p95:>8} {row['duplicate']:>7} {row['locked']:>7} "
+                    f"{row['count_drift']:>6}"
+                )
+
+        if options["json_out"]:
+            with open(options["json_out"], "w") as f:
+                json.dump({"database": writes.describe_database(), "runs": results}, f, indent=2)
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import writes
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress the database with concurrent review, vote and checkout "
+        "writes and report committed writes per second and lock errors for "
+        "each thread count. Run it under each DATABASE_BACKEND (and with "
+        "and without the tuned SQLite profile) to compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", default="1,4,8,16",
+            help="Comma-separated writer counts to try.")
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument("--ops", default=",".join(writes.OPERATIONS),
+            help="Comma-separated subset of: " + ", ".join(writes.OPERATIONS))
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", dest="json_out",
+            help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            thread_counts = [int(n) for n in options["threads"].split(",")]
+        except ValueError:
+            raise CommandError("--threads must be a comma-separated list of integers.")
+        ops = tuple(op for op in options["ops"].split(",") if op)
+        unknown = set(ops) - set(writes.OPERATIONS)
+        if unknown or not ops:
+            raise CommandError(f"Unknown operations: {', '.join(sorted(unknown)) or '(none)'}")
+
+        self.stdout.write(writes.describe_database())
+        self.stdout.write(
+            f"{'threads':>7} {'writes':>8} {'writes/s':>9} {'p50':>8} {'p95':>8} "
+            f"{'locked':>7} {'errors':>7}"
+        )
+        results = []
+        for threads in thread_counts:
+            try:
+                row = writes.run(threads, options["seconds"], ops, options["seed"])
+            except ValueError as e:
+                raise CommandError(str(e))
+            results.append(row)
+            p50 = "-" if row["p50_ms"] is None else f"{row['p50_ms']:.1f}"
+            p95 = "-" if row["p95_ms"] is None else f"{row['p95_ms']:.1f}"
+            self.stdout.write(
+                f"{threads:>7} {row['writes']:>8} {row['writes_per_s']:>9.1f} "
+                f"{p50:>8} {p95:>8} {row['locked']:>7} {row['errors']:>7}"
+            )
+
+        if options["json_out"]:
+            with open(options["json_out"], "w") as f:
+                json.dump({"database": writes.describe_database(), "runs": results}, f, indent=2)
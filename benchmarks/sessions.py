@@ -0,0 +1,90 @@
+import random
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from moviesstore import sessions
+from . import traffic
+
+# -------------------------
+# Session traffic
+# -------------------------
+# Anonymous visitors run the read-only "browse" mix (including favorite
+# toggles and cart adds) under each session setup, and every query is
+# classified, so setups can be compared by database work per 1,000 page
+# views. "before" is Django's stock database sessions.
+
+MODES = {
+    'before': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'SESSION_SERIALIZER': 'django.contrib.sessions.serializers.JSONSerializer',
+    },
+    **{
+        name: {'SESSION_ENGINE': engine, 'SESSION_SERIALIZER': sessions.SERIALIZER}
+        for name, engine in sessions.ENGINES.items()
+    },
+}
+
+
+class _CountingDriver(traffic.InProcessDriver):
+    def __init__(self, counts):
+        super().__init__()
+        self.counts = counts
+
+    def request(self, method, path, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            result = super().request(method, path, data)
+        self.counts['views'] += 1
+        for query in ctx.captured_queries:
+            sql = query['sql'].lstrip().upper()
+            write = sql.startswith(('INSERT', 'UPDATE', 'DELETE', 'REPLACE'))
+            self.counts['writes'] += write
+            if 'DJANGO_SESSION' in sql:
+                self.counts['session_writes' if write else 'session_reads'] += 1
+        return result
+
+
+def run(mode, views=1000, visitors=50, seed_value=0):
+    """
+    Serve about `views` anonymous page views from `visitors` browsers under
+    session setup `mode`. Returns counts per 1,000 views and the mean
+    stored session size.
+    """
+    counts = dict.fromkeys(('views', 'writes', 'session_reads', 'session_writes'), 0)
+    rng = random.Random(seed_value)
+    weights = traffic.MIXES['browse']
+    with override_settings(**MODES[mode]):
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        ctx = traffic.Context()
+        drivers = [_CountingDriver(counts) for _ in range(visitors)]
+        start = time.perf_counter()
+        while counts['views'] < views:
+            name = rng.choices(list(weights), list(weights.values()))[0]
+            traffic.SCENARIOS[name](rng.choice(drivers), ctx, rng)
+        elapsed = time.perf_counter() - start
+
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        sizes = []
+        for driver in drivers:
+            cookie = driver.client.cookies.get(settings.SESSION_COOKIE_NAME)
+            if cookie:
+                session = store(cookie.value)
+                sizes.append(len(session.encode(session.load())))
+        for driver in drivers:
+            driver.close()
+
+    per_k = 1000 / counts['views']
+    return {
+        'mode': mode,
+        'views': counts['views'],
+        'sessions': len(sizes),
+        'writes_per_1k': counts['writes'] * per_k,
+        'session_reads_per_1k': counts['session_reads'] * per_k,
+        'session_writes_per_1k': counts['session_writes'] * per_k,
+        'session_bytes': sum(sizes) / len(sizes) if sizes else 0,
+        'ms_per_view': elapsed * 1000 / counts['views'],
+    }
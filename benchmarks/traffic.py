@@ -0,0 +1,387 @@
+import http.cookiejar
+import json
+import random
+import re
+import resource
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, Resolver404, get_resolver, resolve, reverse
+
+from movies.models import Movie, Petition, Review
+from .datagen import PASSWORD, STAFF_USERNAME, USER_PREFIX
+
+# -------------------------
+# Traffic replay
+# -------------------------
+# A scenario is a short user journey (browse, search, review, vote,
+# checkout...). A mix picks scenarios by weight; each request a scenario
+# makes is timed and labelled with its URL name.
+
+MIXES = {
+    'browse': {
+        'home': 5, 'browse': 35, 'detail': 25, 'search': 15,
+        'petitions': 10, 'favorites': 5, 'cart': 5,
+    },
+    'default': {
+        'home': 3, 'browse': 25, 'detail': 20, 'search': 12, 'petitions': 8,
+        'favorites': 5, 'cart': 5, 'review': 8, 'vote': 7, 'checkout': 7,
+    },
+    'write': {'review': 30, 'vote': 35, 'checkout': 35},
+    # touches every route in moviesstore.urls once per pass
+    'all': {'all_urls': 1},
+}
+
+
+class Sample:
+    __slots__ = ('label', 'ms', 'queries', 'status')
+
+    def __init__(self, label, ms, queries, status):
+        self.label = label
+        self.ms = ms
+        self.queries = queries
+        self.status = status
+
+
+def _label(path):
+    try:
+        return resolve(urllib.parse.urlsplit(path).path).view_name
+    except Resolver404:
+        return path
+
+
+class InProcessDriver:
+    """Drives the project through django.test.Client; counts queries."""
+
+    def __init__(self, host='localhost'):
+        self.client = Client(HTTP_HOST=host)
+        self.samples = []
+
+    def login(self, username):
+        self.client.force_login(User.objects.get(username=username))
+
+    def request(self, method, path, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            if method == 'GET':
+                response = self.client.get(path)
+            else:
+                response = self.client.post(path, data or {})
+            # exports stream; time the whole body like HttpDriver does
+            if response.streaming:
+                content = b''.join(response.streaming_content)
+            else:
+                content = response.content
+            ms = (time.perf_counter() - start) * 1000
+        self.samples.append(Sample(_label(path), ms, len(ctx.captured_queries),
+                                   response.status_code))
+        return response.status_code, content
+
+    def close(self):
+        connections.close_all()
+
+
+class HttpDriver:
+    """Drives a running WSGI/ASGI server over HTTP (no query counts)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.jar),
+            _NoRedirect(),
+        )
+        self.samples = []
+
+    def _csrf(self):
+        for cookie in self.jar:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def login(self, username):
+        status, body = self.request('GET', '/accounts/login/')
+        match = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', body)
+        token = match.group(1).decode() if match else self._csrf()
+        self.request('POST', '/accounts/login/', {
+            'username': username, 'password': PASSWORD,
+            'csrfmiddlewaretoken': token,
+        })
+
+    def request(self, method, path, data=None):
+        url = self.base_url + path
+        body = None
+        headers = {'Referer': url}
+        if method == 'POST':
+            data = dict(data or {})
+            data.setdefault('csrfmiddlewaretoken', self._csrf())
+            body = urllib.parse.urlencode(data).encode()
+        req = urllib.request.Request(url, data=body, headers=headers, method=method)
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req) as response:
+                content = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            content = e.read()
+            status = e.code
+        ms = (time.perf_counter() - start) * 1000
+        self.samples.append(Sample(_label(path), ms, None, status))
+        return status, content
+
+    def close(self):
+        pass
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # record redirects as their own request, like the test client does
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Context:
+    """Ids the scenarios pick from, sampled once per run."""
+
+    def __init__(self, sample_size=1000):
+        self.movie_ids = list(Movie.objects.values_list('id', flat=True)[:sample_size])
+        self.petition_ids = list(Petition.objects.values_list('id', flat=True)[:sample_size])
+        self.usernames = list(
+            User.objects.filter(username__startswith=USER_PREFIX, is_staff=False)
+            .values_list('username', flat=True)[:sample_size]
+        )
+        if not self.movie_ids or not self.usernames:
+            raise ValueError('No benchmark data; run `manage.py bench_seed` first.')
+
+
+# --- scenarios ---
+def home(d, ctx, rng):
+    d.request('GET', '/')
+    d.request('GET', '/about')
+
+
+def browse(d, ctx, rng):
+    sort = rng.choice(['', 'price_asc', 'price_desc', 'name_asc', 'name_desc'])
+    status, body = d.request('GET', f'/movies/?sort={sort}')
+    match = re.search(rb'href="\?([^"]*cursor=[^"]+)">Next', body)
+    if match and rng.random() < 0.5:
+        d.request('GET', '/movies/?' + match.group(1).decode().replace('&amp;', '&'))
+
+
+def detail(d, ctx, rng):
+    d.request('GET', f'/movies/{rng.choice(ctx.movie_ids)}/')
+
+
+def search(d, ctx, rng):
+    term = rng.choice(['dark', 'star', 'kni', 'legend ice', 'bench', 'zzz'])
+    d.request('GET', '/movies/?' + urllib.parse.urlencode({'search': term}))
+
+
+def petitions(d, ctx, rng):
+    d.request('GET', '/movies/petitions/')
+
+
+def favorites(d, ctx, rng):
+    d.request('GET', f'/movies/{rng.choice(ctx.movie_ids)}/toggle-favorite/')
+    d.request('GET', '/movies/favorites/')
+
+
+def cart(d, ctx, rng):
+    d.request('POST', f'/cart/{rng.choice(ctx.movie_ids)}/add/', {'quantity': 1})
+    d.request('GET', '/cart/')
+
+
+def review(d, ctx, rng):
+    d.login(rng.choice(ctx.usernames))
+    movie_id = rng.choice(ctx.movie_ids)
+    d.request('POST', f'/movies/{movie_id}/review/create/', {'comment': 'benchmark review'})
+    d.request('GET', f'/movies/{movie_id}/')
+
+
+def vote(d, ctx, rng):
+    d.login(rng.choice(ctx.usernames))
+    d.request('POST', f'/movies/petitions/{rng.choice(ctx.petition_ids)}/vote/')
+
+
+def checkout(d, ctx, rng):
+    d.login(rng.choice(ctx.usernames))
+    for movie_id in rng.sample(ctx.movie_ids, min(3, len(ctx.movie_ids))):
+        d.request('POST', f'/cart/{movie_id}/add/', {'quantity': rng.randint(1, 3)})
+    d.request('GET', '/cart/')
+    d.request('GET', '/cart/purchase/')
+    d.request('GET', '/accounts/orders/')
+
+
+def project_routes(patterns=None, namespace=''):
+    """Names of every named route in the URLconf, outside the admin site."""
+    names = set()
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.app_name == 'admin':
+                continue
+            inner = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            names |= project_routes(pattern.url_patterns, inner)
+        elif pattern.name:
+            names.add(namespace + pattern.name)
+    return names
+
+
+def all_urls(d, ctx, rng):
+    """
+    Request every route in the URLconf once: anonymous pages, then a
+    customer's reads and writes, then the staff pages. Raises LookupError
+    if a route was added without a request here.
+    """
+    if not User.objects.filter(username=STAFF_USERNAME, is_staff=True).exists():
+        raise ValueError('No staff bench user; run `manage.py bench_seed` again.')
+    movie_id = rng.choice(ctx.movie_ids)
+    username = rng.choice(ctx.usernames)
+    requested = set()
+
+    def hit(name, method='GET', data=None, query='', **kwargs):
+        requested.add(name)
+        return d.request(method, reverse(name, kwargs=kwargs) + query, data)
+
+    for name in ['home.index', 'home.about', 'movies.index', 'movies.favorites',
+                 'movies.petitions_list', 'cart.index', 'accounts.login',
+                 'accounts.signup']:
+        hit(name)
+    hit('movies.show', id=movie_id)
+
+    d.login(username)
+    hit('movies.create_review', 'POST', {'comment': 'all urls'}, id=movie_id)
+    reviews = Review.objects.filter(movie_id=movie_id).order_by('-id')
+    review_id = reviews.filter(user__username=username).values_list('id', flat=True).first()
+    # someone else's review to report; reporting one's own is turned away
+    # but still goes through the view
+    reported_id = (
+        reviews.exclude(user__username=username).values_list('id', flat=True).first()
+        or review_id
+    )
+    hit('movies.edit_review', id=movie_id, review_id=review_id)
+    hit('movies.edit_review', 'POST', {'comment': 'all urls, edited'},
+        id=movie_id, review_id=review_id)
+    hit('movies.report_review', 'POST', id=movie_id, review_id=reported_id)
+    hit('movies.delete_review', id=movie_id, review_id=review_id)
+    hit('movies.petitions_create')
+    hit('movies.petition_vote_yes', 'POST', id=rng.choice(ctx.petition_ids))
+    hit('movies.toggle_favorite', id=movie_id)
+    hit('cart.add', 'POST', {'quantity': 1}, id=movie_id)
+    hit('cart.purchase')
+    hit('cart.clear')
+    hit('accounts.orders')
+    hit('accounts.logout')
+
+    d.login(STAFF_USERNAME)
+    for name in ['admin:index', 'instrumentation.dashboard', 'instrumentation.json',
+                 'exports.index']:
+        hit(name)
+    # one movie keeps the exports from streaming the whole catalog
+    for name in ['exports.orders', 'exports.reviews']:
+        hit(name, query=f'?movie={movie_id}')
+    hit('accounts.logout')
+
+    missing = project_routes() - requested
+    if missing:
+        raise LookupError(f'all_urls does not request: {", ".join(sorted(missing))}')
+
+
+SCENARIOS = {
+    f.__name__: f for f in [
+        home, browse, detail, search, petitions, favorites, cart,
+        review, vote, checkout, all_urls,
+    ]
+}
+
+
+def run(make_driver, mix, iterations, concurrency=1, seed_value=0):
+    """
+    Run `iterations` scenarios drawn from `mix` over `concurrency` workers,
+    each with its own driver (its own cookies/session). Returns the samples
+    and the wall-clock duration in seconds.
+    """
+    ctx = Context()
+    weights = MIXES[mix]
+    names, cum = list(weights), list(weights.values())
+    counter = iter(range(iterations))
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        rng = random.Random(seed_value * 1000 + worker_id)
+        driver = make_driver()
+        try:
+            while True:
+                with lock:
+                    if next(counter, None) is None:
+                        break
+                name = rng.choices(names, weights=cum)[0]
+                SCENARIOS[name](driver, ctx, rng)
+        finally:
+            driver.close()
+        return driver.samples
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return [s for samples in results for s in samples], elapsed
+
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """Per-label latency percentiles, query counts and error counts."""
+    by_label = {}
+    for s in samples:
+        by_label.setdefault(s.label, []).append(s)
+    rows = {}
+    for label, group in sorted(by_label.items()):
+        ms = sorted(s.ms for s in group)
+        queries = [s.queries for s in group if s.queries is not None]
+        rows[label] = {
+            'count': len(group),
+            'p50_ms': _percentile(ms, 50),
+            'p95_ms': _percentile(ms, 95),
+            'p99_ms': _percentile(ms, 99),
+            'queries': max(queries) if queries else None,
+            'mean_queries': statistics.mean(queries) if queries else None,
+            'errors': sum(1 for s in group if s.status >= 500),
+        }
+    return rows
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def check_budget(rows, budget):
+    """
+    Compare a summary against a budget mapping of label -> limits, where
+    the "*" label applies to every URL. Returns a list of violation strings.
+    """
+    violations = []
+    for label, row in rows.items():
+        limits = dict(budget.get('*', {}))
+        limits.update(budget.get(label, {}))
+        for metric, limit in limits.items():
+            value = row.get(metric)
+            if value is not None and value > limit:
+                violations.append(f'{label}: {metric} {value:.1f} > {limit}')
+    return violations
+
+
+def load_budget(path):
+    with open(path) as f:
+        return json.load(f)
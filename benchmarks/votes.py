@@ -0,0 +1,110 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import F
+
+from movies import votes
+from movies.models import Petition, PetitionVote
+from .datagen import USER_PREFIX
+from .traffic import _percentile
+
+# -------------------------
+# Viral petition vote stress
+# -------------------------
+# Worker threads vote on a handful of fresh petitions as fast as they can,
+# either the old way (a write transaction per vote) or through a
+# movies.votes.VoteBuffer. Voters are throwaway users created for the run,
+# enough of them that the run measures writes rather than duplicates. The
+# buffered run includes the final flush in its time, so both report
+# sustained votes stored per second.
+
+MODES = ('direct', 'buffered')
+VOTER_PREFIX = 'bench_voter_'
+
+
+def _direct(petition_id, user_id):
+    try:
+        with transaction.atomic():
+            PetitionVote.objects.create(petition_id=petition_id, user_id=user_id)
+            Petition.objects.filter(id=petition_id).update(vote_count=F('vote_count') + 1)
+        return True
+    except IntegrityError:
+        return False
+
+
+def run(mode, threads, seconds, petitions=5, voters=20000, interval=votes.FLUSH_INTERVAL,
+        batch_size=votes.BATCH_SIZE, seed_value=0):
+    """
+    Vote from `threads` workers for `seconds` on `petitions` new petitions,
+    as `voters` throwaway users. Returns a dict with accepted, duplicate and
+    stored votes, votes/s, p50/p95 request latency and lock errors.
+    """
+    owner_id = User.objects.filter(username__startswith=USER_PREFIX).values_list('id', flat=True).first()
+    if owner_id is None:
+        raise ValueError('No benchmark users; run `manage.py bench_seed` first.')
+    User.objects.bulk_create(
+        [User(username=f'{VOTER_PREFIX}{i}', password='!') for i in range(voters)],
+        batch_size=5000, ignore_conflicts=True,
+    )
+    voter_ids = list(
+        User.objects.filter(username__startswith=VOTER_PREFIX).values_list('id', flat=True)[:voters]
+    )
+    targets = [
+        Petition.objects.create(title=f'bench viral {i}', created_by_id=owner_id).id
+        for i in range(petitions)
+    ]
+    buffer = votes.VoteBuffer(interval, batch_size) if mode == 'buffered' else None
+    submit = buffer.submit if buffer else _direct
+
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+    result = {'mode': mode, 'threads': threads, 'accepted': 0, 'duplicate': 0,
+              'locked': 0, 'errors': 0}
+    latencies = []
+
+    def worker(worker_id):
+        rng = random.Random(seed_value * 1000 + worker_id)
+        local, local_ms = dict.fromkeys(('accepted', 'duplicate', 'locked', 'errors'), 0), []
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    ok = submit(rng.choice(targets), rng.choice(voter_ids))
+                except OperationalError as e:
+                    local['locked' if 'locked' in str(e) else 'errors'] += 1
+                    continue
+                local['accepted' if ok else 'duplicate'] += 1
+                local_ms.append((time.perf_counter() - start) * 1000)
+        finally:
+            connection.close()
+        with lock:
+            for key, value in local.items():
+                result[key] += value
+            latencies.extend(local_ms)
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(worker, range(threads)))
+        if buffer:
+            buffer.flush()
+        elapsed = time.perf_counter() - start
+        result['stored'] = PetitionVote.objects.filter(petition_id__in=targets).count()
+        counted = sum(Petition.objects.filter(id__in=targets).values_list('vote_count', flat=True))
+        result['count_drift'] = counted - result['stored']
+    finally:
+        Petition.objects.filter(id__in=targets).delete()
+        User.objects.filter(username__startswith=VOTER_PREFIX).delete()
+
+    latencies.sort()
+    result.update({
+        'seconds': elapsed,
+        'votes_per_s': result['stored'] / elapsed,
+        'p50_ms': _percentile(latencies, 50) if latencies else None,
+        'p95_ms': _percentile(latencies, 95) if latencies else None,
+    })
+    return result
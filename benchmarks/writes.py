@@ -0,0 +1,120 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+
+from cart.checkout import checkout
+from movies import votes
+from movies.models import Movie, Petition, Review
+from .datagen import USER_PREFIX
+from .traffic import _percentile
+
+# -------------------------
+# Concurrent write stress
+# -------------------------
+# Worker threads (one database connection each) run the same writes the
+# review, vote and checkout views do, as fast as they can, for a fixed
+# time. Lock errors are counted rather than raised, so profiles can be
+# compared by how many writes they finish and how many they lose.
+
+OPERATIONS = ('review', 'vote', 'checkout')
+
+
+class Ids:
+    def __init__(self, sample_size=1000):
+        self.movie_ids = list(Movie.objects.values_list('id', flat=True)[:sample_size])
+        self.petition_ids = list(Petition.objects.values_list('id', flat=True)[:sample_size])
+        self.user_ids = list(
+            User.objects.filter(username__startswith=USER_PREFIX)
+            .values_list('id', flat=True)[:sample_size]
+        )
+        if not self.movie_ids or not self.user_ids or not self.petition_ids:
+            raise ValueError('No benchmark data; run `manage.py bench_seed` first.')
+
+
+def _review(ids, rng):
+    Review.objects.create(
+        movie_id=rng.choice(ids.movie_ids), user_id=rng.choice(ids.user_ids),
+        comment='stress review',
+    )
+
+
+def _vote(ids, rng):
+    # as the view does: the vote is buffered and written in batches by the
+    # flusher thread, which competes for the write lock with the others
+    return votes.submit(rng.choice(ids.petition_ids), rng.choice(ids.user_ids))
+
+
+def _checkout(ids, rng):
+    user = User(id=rng.choice(ids.user_ids))
+    lines = {m: rng.randint(1, 3) for m in rng.sample(ids.movie_ids, min(3, len(ids.movie_ids)))}
+    checkout(user, lines)
+
+
+_RUNNERS = {'review': _review, 'vote': _vote, 'checkout': _checkout}
+
+
+def run(threads, seconds, operations=OPERATIONS, seed_value=0):
+    """
+    Hammer the database from `threads` workers for `seconds`. Returns a dict
+    with committed writes, writes/s, p50/p95 latency and error counts.
+    """
+    ids = Ids()
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+    result = {'threads': threads, 'writes': 0, 'locked': 0, 'errors': 0}
+    latencies = []
+
+    def worker(worker_id):
+        rng = random.Random(seed_value * 1000 + worker_id)
+        local, local_ms = {'writes': 0, 'locked': 0, 'errors': 0}, []
+        try:
+            while time.perf_counter() < deadline:
+                op = rng.choice(operations)
+                start = time.perf_counter()
+                try:
+                    if _RUNNERS[op](ids, rng) is False:
+                        continue  # a repeated vote writes nothing
+                except OperationalError as e:
+                    local['locked' if 'locked' in str(e) else 'errors'] += 1
+                    continue
+                local['writes'] += 1
+                local_ms.append((time.perf_counter() - start) * 1000)
+        finally:
+            connection.close()
+        with lock:
+            for key, value in local.items():
+                result[key] += value
+            latencies.extend(local_ms)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    if 'vote' in operations:
+        # buffered votes are part of the run's writes
+        votes.buffer.flush()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    result.update({
+        'seconds': elapsed,
+        'writes_per_s': result['writes'] / elapsed,
+        'p50_ms': _percentile(latencies, 50) if latencies else None,
+        'p95_ms': _percentile(latencies, 95) if latencies else None,
+    })
+    return result
+
+
+def describe_database():
+    """Backend name plus the SQLite settings that matter for concurrency."""
+    if connection.vendor != 'sqlite':
+        return connection.vendor
+    with connection.cursor() as cursor:
+        settings = []
+        for pragma in ('journal_mode', 'synchronous', 'busy_timeout'):
+            cursor.execute(f'PRAGMA {pragma}')
+            settings.append(f'{pragma}={cursor.fetchone()[0]}')
+    return 'sqlite ' + ' '.join(settings)
@@ -1,7 +1,21 @@
 from django.contrib import admin
 
-from .models import Order, Item
-admin.site.register(Order)
-admin.site.register(Item)
+from .models import Order, Item, Cart, CartLine
+
+class OrderAdmin(admin.ModelAdmin):
+    # Order.__str__ reads user.username
+    list_select_related = ['user']
+
+class ItemAdmin(admin.ModelAdmin):
+    # Item.__str__ reads movie.name
+    list_select_related = ['movie']
+
+class CartAdmin(admin.ModelAdmin):
+    list_select_related = ['user']
+
+admin.site.register(Order, OrderAdmin)
+admin.site.register(Item, ItemAdmin)
+admin.site.register(Cart, CartAdmin)
+admin.site.register(CartLine)
 
 # Register your models here.
@@ -0,0 +1,89 @@
+from django.db import transaction
+
+from analytics import tasks as analytics_tasks
+from movies.models import Movie
+from . import history
+from .models import CartLine, Order, Item
+from .pricing import quote_lines
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyCartError(CheckoutError):
+    pass
+
+
+class PriceChangedError(CheckoutError):
+    def __init__(self, expected_total, actual_total):
+        self.expected_total = expected_total
+        self.actual_total = actual_total
+        super().__init__(
+            f'Cart total changed from {expected_total} to {actual_total}.'
+        )
+
+
+def checkout(user, lines, expected_total=None):
+    """
+    Turn cart `lines` ({movie_id: quantity}) into an Order for `user`.
+
+    Prices are read once, under a row lock where the database supports it,
+    and the order and all of its items are written with one INSERT each
+    inside a single transaction, so a failure never leaves a partial order.
+    Lines for movies that no longer exist are dropped. When
+    `expected_total` is given (the total the customer was shown) and the
+    current prices disagree, PriceChangedError is raised and nothing is
+    written.
+    """
+    if not lines:
+        raise EmptyCartError('Cart is empty.')
+
+    with transaction.atomic():
+        rows = list(
+            Movie.objects.select_for_update()
+            .filter(id__in=list(lines))
+            .values_list('id', 'name', 'price')
+        )
+        prices = {movie_id: price for movie_id, _, price in rows}
+        if not prices:
+            raise EmptyCartError('None of the movies in the cart exist.')
+
+        total = quote_lines(lines, prices).total
+        if expected_total is not None and expected_total != total:
+            raise PriceChangedError(expected_total, total)
+
+        order = Order.objects.create(user=user, total=total)
+        Item.objects.bulk_create([
+            Item(order=order, movie_id=movie_id, price=price,
+                 quantity=lines[movie_id])
+            for movie_id, price in prices.items()
+        ])
+        snapshot = [
+            {'movie_id': movie_id, 'name': name, 'price': price,
+             'quantity': lines[movie_id]}
+            for movie_id, name, price in rows
+        ]
+        history.record_order(order, snapshot)
+        # sales rollups are not needed for the response; a worker adds
+        # them once the order has committed
+        analytics_tasks.record_order.delay(order.id)
+    return order
+
+
+def checkout_cart(user, cart_id, expected_total=None):
+    """
+    Check out the saved cart `cart_id` for `user`.
+
+    The lines are read from CartLine rows inside the checkout transaction,
+    not from the cache, so a change made through another worker or device
+    is never missed, and they are deleted in the same transaction.
+    """
+    with transaction.atomic():
+        lines = dict(
+            CartLine.objects.select_for_update()
+            .filter(cart_id=cart_id).values_list('movie_id', 'quantity')
+        )
+        order = checkout(user, lines, expected_total)
+        CartLine.objects.filter(cart_id=cart_id).delete()
+    return order
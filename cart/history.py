@@ -0,0 +1,88 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CustomerStats, Order, OrderSummary
+
+# -------------------------
+# Materialized order history
+# -------------------------
+# Checkout writes an OrderSummary row (item count, line snapshot, total) and
+# bumps the customer's CustomerStats, so the order history page reads one
+# indexed table instead of walking orders -> items -> movies.
+
+
+def record_order(order, lines):
+    """
+    Materialize `order`. `lines` is a list of dicts with movie_id, name,
+    price and quantity, as purchased. Call inside the checkout transaction.
+    """
+    item_count = sum(line['quantity'] for line in lines)
+    OrderSummary.objects.create(
+        order=order, user_id=order.user_id, date=order.date,
+        total=order.total, item_count=item_count, lines=lines,
+    )
+    _add_to_stats(order.user_id, order.total, item_count, order.date)
+
+
+def _add_to_stats(user_id, total, item_count, date):
+    updated = CustomerStats.objects.filter(user_id=user_id).update(
+        order_count=F('order_count') + 1,
+        items_purchased=F('items_purchased') + item_count,
+        lifetime_total=F('lifetime_total') + total,
+        last_order_at=date,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            CustomerStats.objects.create(
+                user_id=user_id, order_count=1, items_purchased=item_count,
+                lifetime_total=total, first_order_at=date, last_order_at=date,
+            )
+    except IntegrityError:
+        # another checkout created the row first
+        _add_to_stats(user_id, total, item_count, date)
+
+
+def rebuild(batch_size=1000, log=None):
+    """
+    Recompute every OrderSummary and CustomerStats row from Order and Item.
+    Returns the number of orders summarized.
+    """
+    with transaction.atomic():
+        OrderSummary.objects.all().delete()
+        CustomerStats.objects.all().delete()
+
+        stats = {}
+        batch = []
+        count = 0
+        orders = Order.objects.order_by('id').with_items()
+        for order in orders.iterator(chunk_size=batch_size):
+            lines = [
+                {'movie_id': item.movie_id, 'name': item.movie.name,
+                 'price': item.price, 'quantity': item.quantity}
+                for item in order.item_set.all()
+            ]
+            item_count = sum(line['quantity'] for line in lines)
+            batch.append(OrderSummary(
+                order=order, user_id=order.user_id, date=order.date,
+                total=order.total, item_count=item_count, lines=lines,
+            ))
+            s = stats.setdefault(order.user_id, CustomerStats(
+                user_id=order.user_id, first_order_at=order.date,
+            ))
+            s.order_count += 1
+            s.items_purchased += item_count
+            s.lifetime_total += order.total
+            s.last_order_at = order.date
+            if len(batch) >= batch_size:
+                OrderSummary.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+                if log:
+                    log(f'{count} orders summarized')
+        OrderSummary.objects.bulk_create(batch)
+        count += len(batch)
+        CustomerStats.objects.bulk_create(stats.values(), batch_size=batch_size)
+    return count
+
@@ -0,0 +1,64 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from analytics import tasks as analytics_tasks
+from cart.checkout import checkout
+from movies.models import Movie
+from taskqueue.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure checkout latency against cart size. Every checkout commits, "
+        "so commit, fsync and lock waits are included; the bench user, "
+        "movies, orders and queued rollup tasks are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1,10,100,1000",
+            help="Comma-separated cart sizes (number of distinct movies).")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options["sizes"].split(",")]
+        user = User.objects.create(username="__bench_checkout__")
+        movies = Movie.objects.bulk_create([
+            Movie(name=f"Bench {i}", price=i % 20 + 1, description="", image="")
+            for i in range(max(sizes))
+        ])
+        order_ids = set()
+        try:
+            self._run(user, [m.id for m in movies], sizes, options["repeat"], order_ids)
+        finally:
+            self._clean_up(user, movies, order_ids)
+
+    def _run(self, user, movie_ids, sizes, repeat, order_ids):
+        self.stdout.write(f"{'lines':>8} {'p50 ms':>10} {'p95 ms':>10} {'ms/line':>10}")
+        for size in sizes:
+            lines = {movie_id: 1 for movie_id in movie_ids[:size]}
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                order = checkout(user, lines)
+                timings.append((time.perf_counter() - start) * 1000)
+                order_ids.add(order.id)
+            timings.sort()
+            p50 = statistics.median(timings)
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(f"{size:>8} {p50:>10.2f} {p95:>10.2f} {p50 / size:>10.3f}")
+
+    def _clean_up(self, user, movies, order_ids):
+        # rollup tasks queued by the checkouts; any that already ran only
+        # wrote rollup rows for the bench movies, deleted with them
+        queued = Task.objects.filter(
+            name=analytics_tasks.record_order.name, status=Task.QUEUED,
+        ).values_list("id", "args")
+        Task.objects.filter(
+            id__in=[task_id for task_id, args in queued if args and args[0] in order_ids]
+        ).delete()
+        # orders, items, history and stats go with the user
+        user.delete()
+        Movie.objects.filter(id__in=[m.id for m in movies]).delete()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from cart import history
+
+
+class Command(BaseCommand):
+    help = "Rebuild order summaries and per-customer totals from Order/Item."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = history.rebuild(batch_size=options["batch_size"], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"Summarized {count} orders."))
@@ -0,0 +1,76 @@
+# Generated by Django 5.0.14 on 2026-10-17 15:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    Order = apps.get_model('cart', 'Order')
+    Item = apps.get_model('cart', 'Item')
+    OrderSummary = apps.get_model('cart', 'OrderSummary')
+    CustomerStats = apps.get_model('cart', 'CustomerStats')
+
+    lines = {}
+    for item in Item.objects.select_related('movie').order_by('id').iterator():
+        lines.setdefault(item.order_id, []).append({
+            'movie_id': item.movie_id, 'name': item.movie.name,
+            'price': item.price, 'quantity': item.quantity,
+        })
+    summaries = []
+    stats = {}
+    for order in Order.objects.order_by('id').iterator():
+        order_lines = lines.get(order.id, [])
+        item_count = sum(line['quantity'] for line in order_lines)
+        summaries.append(OrderSummary(
+            order_id=order.id, user_id=order.user_id, date=order.date,
+            total=order.total, item_count=item_count, lines=order_lines,
+        ))
+        s = stats.setdefault(order.user_id, CustomerStats(
+            user_id=order.user_id, first_order_at=order.date,
+            order_count=0, items_purchased=0, lifetime_total=0,
+        ))
+        s.order_count += 1
+        s.items_purchased += item_count
+        s.lifetime_total += order.total
+        s.last_order_at = order.date
+    OrderSummary.objects.bulk_create(summaries, batch_size=1000)
+    CustomerStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('cart', '0003_cart_cartline'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('items_purchased', models.PositiveIntegerField(default=0)),
+                ('lifetime_total', models.BigIntegerField(default=0)),
+                ('first_order_at', models.DateTimeField(blank=True, null=True)),
+                ('last_order_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrderSummary',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='cart.order')),
+                ('date', models.DateTimeField()),
+                ('total', models.IntegerField()),
+                ('item_count', models.PositiveIntegerField()),
+                ('lines', models.JSONField(default=list)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-date', '-order'], name='ordersummary_user_date_idx')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0005_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='rolled_up',
+            field=models.BooleanField(default=False),
+        ),
+    ]
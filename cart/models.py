@@ -3,12 +3,33 @@ from django.db import models
 from django.contrib.auth.models import User
 from movies.models import Movie
 
+class OrderQuerySet(models.QuerySet):
+    def with_items(self):
+        # one query for the orders, one for all their items and movies
+        return self.prefetch_related(models.Prefetch(
+            'item_set',
+            queryset=Item.objects.select_related('movie').only(
+                'id', 'price', 'quantity', 'order_id',
+                'movie__id', 'movie__name', 'movie__price',
+            ),
+        ))
+
 class Order(models.Model):
     id = models.AutoField(primary_key=True)
     total = models.IntegerField()
     date = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(User,
         on_delete=models.CASCADE)
+    # set in the same transaction that adds the order to the sales rollup,
+    # so the rollup task and rollup rebuilds never count it twice
+    rolled_up = models.BooleanField(default=False)
+    objects = OrderQuerySet.as_manager()
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-date'], name='order_user_date_idx'),
+            # sales rollups rebuild by date range
+            models.Index(fields=['date'], name='order_date_idx'),
+        ]
     def __str__(self):
         return str(self.id) + ' - ' + self.user.username
     
@@ -22,4 +43,56 @@ class Item(models.Model):
         on_delete=models.CASCADE)
     def __str__(self):
         return str(self.id) + ' - ' + self.movie.name
-# Create your models here.
+
+class Cart(models.Model):
+    id = models.AutoField(primary_key=True)
+    user = models.OneToOneField(User, null=True, blank=True,
+        on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    def __str__(self):
+        owner = self.user.username if self.user_id else 'anonymous'
+        return str(self.id) + ' - ' + owner
+
+class CartLine(models.Model):
+    id = models.AutoField(primary_key=True)
+    quantity = models.PositiveIntegerField()
+    cart = models.ForeignKey(Cart, related_name='lines',
+        on_delete=models.CASCADE)
+    movie = models.ForeignKey(Movie,
+        on_delete=models.CASCADE)
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'movie'], name='unique_cart_movie'),
+        ]
+    def __str__(self):
+        return str(self.cart_id) + ' - ' + str(self.movie_id) + ' x' + str(self.quantity)
+
+class OrderSummary(models.Model):
+    # denormalized copy of an order for the history page, written at checkout
+    order = models.OneToOneField(Order, primary_key=True,
+        on_delete=models.CASCADE)
+    user = models.ForeignKey(User,
+        on_delete=models.CASCADE)
+    date = models.DateTimeField()
+    total = models.IntegerField()
+    item_count = models.PositiveIntegerField()
+    # [{"movie_id", "name", "price", "quantity"}] as purchased
+    lines = models.JSONField(default=list)
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-date', '-order'], name='ordersummary_user_date_idx'),
+        ]
+    def __str__(self):
+        return str(self.order_id) + ' - ' + str(self.item_count) + ' items'
+
+class CustomerStats(models.Model):
+    # lifetime purchase aggregates per user, maintained at checkout
+    user = models.OneToOneField(User, primary_key=True,
+        on_delete=models.CASCADE)
+    order_count = models.PositiveIntegerField(default=0)
+    items_purchased = models.PositiveIntegerField(default=0)
+    lifetime_total = models.BigIntegerField(default=0)
+    first_order_at = models.DateTimeField(null=True, blank=True)
+    last_order_at = models.DateTimeField(null=True, blank=True)
+    def __str__(self):
+        return str(self.user_id) + ' - ' + str(self.order_count) + ' orders'
@@ -0,0 +1,130 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from movies.models import Movie
+
+# -------------------------
+# Cart pricing engine
+# -------------------------
+# Prices a whole cart from (movie_id, price) pairs in one pass, then lets
+# configurable rules adjust the total. Rules come from the
+# CART_PRICING_RULES setting, a list of (dotted path, kwargs) pairs, e.g.
+#
+#   CART_PRICING_RULES = [
+#       ('cart.pricing.QuantityDiscount', {'min_quantity': 5, 'percent': 10}),
+#       ('cart.pricing.SalesTax', {'percent': 8}),
+#   ]
+
+
+def _round(amount):
+    return int(Decimal(amount).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+class Quote:
+    def __init__(self, unit_prices, quantities):
+        self.unit_prices = unit_prices      # {movie_id: price}
+        self.quantities = quantities        # {movie_id: quantity}
+        self.line_totals = {
+            movie_id: price * quantities[movie_id]
+            for movie_id, price in unit_prices.items()
+        }
+        self.subtotal = sum(self.line_totals.values())
+        self.adjustments = []               # [(label, amount)]
+
+    @property
+    def total(self):
+        return self.subtotal + sum(amount for _, amount in self.adjustments)
+
+    def adjust(self, label, amount):
+        if amount:
+            self.adjustments.append((label, amount))
+
+
+class PricingRule:
+    label = ''
+
+    def apply(self, quote):
+        raise NotImplementedError
+
+
+class PercentDiscount(PricingRule):
+    def __init__(self, percent, label='Discount'):
+        self.percent = Decimal(percent)
+        self.label = label
+
+    def apply(self, quote):
+        quote.adjust(self.label, -_round(Decimal(quote.total) * self.percent / 100))
+
+
+class QuantityDiscount(PricingRule):
+    """Take `percent` off every line bought `min_quantity` times or more."""
+
+    def __init__(self, min_quantity, percent, label='Volume discount'):
+        self.min_quantity = min_quantity
+        self.percent = Decimal(percent)
+        self.label = label
+
+    def apply(self, quote):
+        eligible = sum(
+            line_total for movie_id, line_total in quote.line_totals.items()
+            if quote.quantities[movie_id] >= self.min_quantity
+        )
+        quote.adjust(self.label, -_round(Decimal(eligible) * self.percent / 100))
+
+
+class BundleDiscount(PricingRule):
+    """Take a fixed `amount` off once per complete set of `movie_ids`."""
+
+    def __init__(self, movie_ids, amount, label='Bundle discount'):
+        self.movie_ids = list(movie_ids)
+        self.amount = amount
+        self.label = label
+
+    def apply(self, quote):
+        if not self.movie_ids:
+            return
+        bundles = min(quote.quantities.get(m, 0) for m in self.movie_ids)
+        quote.adjust(self.label, -self.amount * bundles)
+
+
+class SalesTax(PricingRule):
+    def __init__(self, percent, label='Tax'):
+        self.percent = Decimal(percent)
+        self.label = label
+
+    def apply(self, quote):
+        quote.adjust(self.label, _round(Decimal(quote.total) * self.percent / 100))
+
+
+def get_rules():
+    return [
+        import_string(path)(**kwargs)
+        for path, kwargs in getattr(settings, 'CART_PRICING_RULES', [])
+    ]
+
+
+def quote_lines(lines, unit_prices, rules=None):
+    """
+    Price `lines` ({movie_id: quantity}) against already-fetched
+    `unit_prices` ({movie_id: price}). Movies missing from `unit_prices`
+    are dropped. Pure function, so bulk repricing jobs can feed it prices
+    fetched in batches.
+    """
+    unit_prices = {m: p for m, p in unit_prices.items() if m in lines}
+    quantities = {m: int(lines[m]) for m in unit_prices}
+    quote = Quote(unit_prices, quantities)
+    for rule in get_rules() if rules is None else rules:
+        rule.apply(quote)
+    return quote
+
+
+def quote_cart(lines, rules=None):
+    """Price `lines` with a single (id, price) query."""
+    if not lines:
+        return Quote({}, {})
+    unit_prices = dict(
+        Movie.objects.filter(id__in=list(lines)).values_list('id', 'price')
+    )
+    return quote_lines(lines, unit_prices, rules)
@@ -0,0 +1,141 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from moviesstore import sessions
+
+from .models import Cart, CartLine
+from .pricing import quote_cart
+
+# -------------------------
+# Server-side cart store
+# -------------------------
+# Carts live in Cart/CartLine rows, fronted by a cache entry per cart. Every
+# mutation is a single-row upsert or delete that then drops the cache
+# entry, so changing one line never re-serializes the session and two
+# racing writes cannot leave a stale copy behind. The cached lines are for
+# display only; checkout reads the rows (cart.checkout.checkout_cart). The
+# session only remembers the cart id, written once when the cart is created.
+#
+# Lines are only cached when CART_CACHE_ALIAS is shared by every process.
+# A per-process copy (locmem) would only be dropped in the worker that made
+# the change, so with one the cart page reads the rows (one indexed query).
+
+CART_SESSION_KEY = 'cart_id'
+CACHE_ALIAS = getattr(settings, 'CART_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'CART_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _cache_key(cart_id):
+    return f'cart:{cart_id}:lines'
+
+
+def _lines_cache():
+    if not sessions.is_shared(settings.CACHES.get(CACHE_ALIAS, {})):
+        return None
+    return caches[CACHE_ALIAS]
+
+
+class CartStore:
+    def __init__(self, cart_id):
+        self.cart_id = cart_id
+        self._cache = _lines_cache()
+
+    @classmethod
+    def for_request(cls, request, create=False):
+        """
+        Return the store for the current visitor, or None when they have no
+        cart yet and `create` is False.
+        """
+        cart_id = request.session.get(CART_SESSION_KEY)
+        if cart_id is None:
+            if request.user.is_authenticated:
+                if create:
+                    cart, _ = Cart.objects.get_or_create(user=request.user)
+                    cart_id = cart.id
+                else:
+                    cart_id = (
+                        Cart.objects.filter(user=request.user)
+                        .values_list('id', flat=True).first()
+                    )
+            elif create:
+                cart_id = Cart.objects.create().id
+            if cart_id is None:
+                return None
+            request.session[CART_SESSION_KEY] = cart_id
+        return cls(cart_id)
+
+    # --- reads ---
+    def lines(self):
+        """Return {movie_id: quantity} for every line in the cart."""
+        if self._cache is None:
+            return self._read_lines()
+        lines = self._cache.get(_cache_key(self.cart_id))
+        if lines is None:
+            lines = self._read_lines()
+            self._cache.set(_cache_key(self.cart_id), lines, CACHE_TIMEOUT)
+        return lines
+
+    def _read_lines(self):
+        return dict(
+            CartLine.objects.filter(cart_id=self.cart_id)
+            .values_list('movie_id', 'quantity')
+        )
+
+    def total(self):
+        return quote_cart(self.lines()).total
+
+    # --- writes ---
+    def add(self, movie_id, quantity=1):
+        self.set_quantity(movie_id, self.lines().get(movie_id, 0) + quantity)
+
+    def set_quantity(self, movie_id, quantity):
+        if quantity <= 0:
+            self.remove(movie_id)
+            return
+        CartLine.objects.bulk_create(
+            [CartLine(cart_id=self.cart_id, movie_id=movie_id, quantity=quantity)],
+            update_conflicts=True,
+            unique_fields=['cart', 'movie'],
+            update_fields=['quantity'],
+        )
+        self.invalidate()
+
+    def remove(self, movie_id):
+        CartLine.objects.filter(cart_id=self.cart_id, movie_id=movie_id).delete()
+        self.invalidate()
+
+    def clear(self):
+        CartLine.objects.filter(cart_id=self.cart_id).delete()
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop the cached lines; the next read goes to the database."""
+        if self._cache is not None:
+            self._cache.delete(_cache_key(self.cart_id))
+
+
+def attach_cart_to_user(request, user):
+    """
+    On login, fold the anonymous session cart into the user's saved cart so
+    the cart follows the account across devices.
+    """
+    anon_id = request.session.get(CART_SESSION_KEY)
+    user_cart = Cart.objects.filter(user=user).first()
+    if anon_id is None:
+        if user_cart is not None:
+            request.session[CART_SESSION_KEY] = user_cart.id
+        return
+    if user_cart is None:
+        Cart.objects.filter(id=anon_id, user__isnull=True).update(user=user)
+        return
+    if user_cart.id == anon_id:
+        return
+
+    with transaction.atomic():
+        user_store = CartStore(user_cart.id)
+        for movie_id, quantity in CartStore(anon_id).lines().items():
+            user_store.set_quantity(movie_id, quantity)
+        Cart.objects.filter(id=anon_id, user__isnull=True).delete()
+    CartStore(anon_id).invalidate()
+    request.session[CART_SESSION_KEY] = user_cart.id
@@ -1,3 +1,183 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from movies.models import Movie
+from .checkout import EmptyCartError, PriceChangedError, checkout, checkout_cart
+from .models import Cart, CartLine, CustomerStats, Item, Order, OrderSummary
+from .pricing import (
+    BundleDiscount, PercentDiscount, QuantityDiscount, SalesTax, get_rules, quote_lines,
+)
+from .store import CACHE_ALIAS, CART_SESSION_KEY, CartStore, _cache_key
+
+
+class PricingTests(TestCase):
+    prices = {1: 10, 2: 15, 3: 999}
+
+    def test_lines_without_a_price_are_dropped(self):
+        quote = quote_lines({1: 2, 2: 1, 4: 3}, self.prices, rules=[])
+        self.assertEqual(quote.line_totals, {1: 20, 2: 15})
+        self.assertEqual(quote.total, 35)
+
+    def test_percent_discount_rounds_half_up(self):
+        # 10% of 35 is 3.5
+        quote = quote_lines({1: 2, 2: 1}, self.prices, rules=[PercentDiscount(10)])
+        self.assertEqual(quote.adjustments, [('Discount', -4)])
+        self.assertEqual(quote.total, 31)
+
+    def test_quantity_discount_only_counts_eligible_lines(self):
+        rule = QuantityDiscount(min_quantity=3, percent=15)
+        quote = quote_lines({1: 3, 2: 1}, self.prices, rules=[rule])
+        # 15% of the 30 from movie 1 only
+        self.assertEqual(quote.adjustments, [('Volume discount', -5)])
+        self.assertEqual(quote.total, 40)
+
+    def test_bundle_discount_applies_once_per_complete_set(self):
+        rule = BundleDiscount([1, 2], amount=4)
+        self.assertEqual(quote_lines({1: 3, 2: 2}, self.prices, rules=[rule]).total, 52)
+        quote = quote_lines({1: 3}, self.prices, rules=[rule])
+        self.assertEqual((quote.adjustments, quote.total), ([], 30))
+
+    def test_rules_apply_in_order(self):
+        # 35 -10% = 31, +8% tax on 31 = 2.48 -> 2
+        discount_first = quote_lines(
+            {1: 2, 2: 1}, self.prices, rules=[PercentDiscount(10), SalesTax(8)],
+        )
+        self.assertEqual(discount_first.adjustments, [('Discount', -4), ('Tax', 2)])
+        self.assertEqual(discount_first.total, 33)
+        # 35 +8% = 2.8 -> 3, then -10% of 38 = 3.8 -> 4
+        tax_first = quote_lines(
+            {1: 2, 2: 1}, self.prices, rules=[SalesTax(8), PercentDiscount(10)],
+        )
+        self.assertEqual(tax_first.adjustments, [('Tax', 3), ('Discount', -4)])
+        self.assertEqual(tax_first.total, 34)
+
+    @override_settings(CART_PRICING_RULES=[
+        ('cart.pricing.QuantityDiscount', {'min_quantity': 2, 'percent': 50}),
+        ('cart.pricing.SalesTax', {'percent': 10, 'label': 'VAT'}),
+    ])
+    def test_rules_come_from_settings(self):
+        rules = get_rules()
+        self.assertEqual([type(r) for r in rules], [QuantityDiscount, SalesTax])
+        quote = quote_lines({1: 2}, self.prices)
+        self.assertEqual(quote.adjustments, [('Volume discount', -10), ('VAT', 1)])
+        self.assertEqual(quote.total, 11)
+
+
+class CheckoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='pw')
+        cls.movie = Movie.objects.create(
+            name='Movie', price=5, description='desc', image='movie_images/x.jpg'
+        )
+
+    def _assert_nothing_written(self):
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Item.objects.exists())
+        self.assertFalse(OrderSummary.objects.exists())
+        self.assertFalse(CustomerStats.objects.filter(order_count__gt=0).exists())
+
+    def test_changed_price_writes_nothing(self):
+        with self.assertRaises(PriceChangedError) as ctx:
+            checkout(self.user, {self.movie.id: 2}, expected_total=8)
+        self.assertEqual((ctx.exception.expected_total, ctx.exception.actual_total), (8, 10))
+        self._assert_nothing_written()
+
+    def test_missing_movies_are_an_empty_cart(self):
+        with self.assertRaises(EmptyCartError):
+            checkout(self.user, {self.movie.id + 100: 1})
+        self._assert_nothing_written()
+
+    def test_failure_leaves_no_partial_order(self):
+        with mock.patch('cart.checkout.history.record_order', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                checkout(self.user, {self.movie.id: 2})
+        self._assert_nothing_written()
+
+    def test_failed_cart_checkout_keeps_the_cart(self):
+        cart = Cart.objects.create(user=self.user)
+        CartLine.objects.create(cart=cart, movie=self.movie, quantity=2)
+        with self.assertRaises(PriceChangedError):
+            checkout_cart(self.user, cart.id, expected_total=1)
+        self.assertEqual(CartLine.objects.filter(cart=cart).count(), 1)
+        self._assert_nothing_written()
+
+
+class CartStoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='pw')
+        cls.first = Movie.objects.create(
+            name='First', price=5, description='desc', image='movie_images/x.jpg'
+        )
+        cls.second = Movie.objects.create(
+            name='Second', price=7, description='desc', image='movie_images/x.jpg'
+        )
+
+    def setUp(self):
+        # as with Redis or Memcached; locmem turns the line cache off
+        self.enterContext(mock.patch('cart.store.sessions.is_shared', return_value=True))
+        caches[CACHE_ALIAS].clear()
+        self.cart = Cart.objects.create(user=self.user)
+        self.store = CartStore(self.cart.id)
+
+    def test_per_process_cache_is_not_used(self):
+        with mock.patch('cart.store.sessions.is_shared', return_value=False):
+            store = CartStore(self.cart.id)
+            store.set_quantity(self.first.id, 1)
+            self.assertEqual(store.lines(), {self.first.id: 1})
+            # a write in another worker shows up at once
+            CartLine.objects.filter(cart=self.cart).update(quantity=4)
+            self.assertEqual(store.lines(), {self.first.id: 4})
+        self.assertIsNone(caches[CACHE_ALIAS].get(_cache_key(self.cart.id)))
+
+    def test_writes_drop_the_cached_lines(self):
+        self.store.set_quantity(self.first.id, 1)
+        self.assertEqual(self.store.lines(), {self.first.id: 1})
+        # another worker adds a line behind this process's cache
+        CartLine.objects.create(cart=self.cart, movie=self.second, quantity=2)
+        self.store.set_quantity(self.first.id, 3)
+        self.assertEqual(self.store.lines(), {self.first.id: 3, self.second.id: 2})
+        self.store.remove(self.first.id)
+        self.assertEqual(self.store.lines(), {self.second.id: 2})
+
+    def test_purchase_checks_out_the_saved_rows(self):
+        self.store.set_quantity(self.first.id, 1)
+        self.store.lines()  # cached in this process
+        CartLine.objects.create(cart=self.cart, movie=self.second, quantity=2)
+
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[CART_SESSION_KEY] = self.cart.id
+        session.save()
+        response = self.client.get(reverse('cart.purchase'))
+
+        self.assertEqual(response.status_code, 200)
+        items = dict(Item.objects.values_list('movie_id', 'quantity'))
+        self.assertEqual(items, {self.first.id: 1, self.second.id: 2})
+        self.assertFalse(CartLine.objects.filter(cart=self.cart).exists())
+        self.assertEqual(self.store.lines(), {})
+
+    def test_failed_purchase_shows_the_new_total(self):
+        self.store.set_quantity(self.first.id, 1)
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[CART_SESSION_KEY] = self.cart.id
+        session.save()
+        seen = self.client.get(reverse('cart.index')).context['template_data']['cart_total']
+        # another worker changes the line behind this process's cache, and
+        # the price moves
+        CartLine.objects.filter(cart=self.cart).update(quantity=2)
+        Movie.objects.filter(id=self.first.id).update(price=6)
+
+        response = self.client.get(reverse('cart.purchase'), {'total': seen})
+        self.assertRedirects(response, reverse('cart.index'))
+        total = self.client.get(reverse('cart.index')).context['template_data']['cart_total']
+        self.assertEqual(total, 12)
+        response = self.client.get(reverse('cart.purchase'), {'total': total})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(dict(Item.objects.values_list('movie_id', 'quantity')), {self.first.id: 2})
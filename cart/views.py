@@ -1,62 +1,80 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from django.shortcuts import get_object_or_404, redirect
 from movies.models import Movie
-from .utils import calculate_cart_total
-from .models import Order, Item
+from .pricing import quote_lines
+from .checkout import checkout_cart, EmptyCartError, PriceChangedError
+from .store import CartStore
 from django.contrib.auth.decorators import login_required
+from django.contrib import messages
 
-def index(request):
+async def index(request):
+    # resolve the user before rendering so templates stay off the database
+    request.user = await request.auser()
     cart_total = 0
     movies_in_cart = []
-    cart = request.session.get('cart', {})
+    cart = {}
+    store = await sync_to_async(CartStore.for_request)(request)
+    if store is not None:
+        cart = await sync_to_async(store.lines)()
     movie_ids = list(cart.keys())
     if (movie_ids != []):
-        movies_in_cart = Movie.objects.filter(id__in=movie_ids)
-        cart_total = calculate_cart_total(cart, movies_in_cart)
+        # only the columns the page shows; prices feed the quote directly
+        movies_in_cart = [
+            movie async for movie in
+            Movie.objects.filter(id__in=movie_ids).only('id', 'name', 'price')
+        ]
+        quote = quote_lines(cart, {m.id: m.price for m in movies_in_cart})
+        cart_total = quote.total
 
     template_data = {}
     template_data['title'] = 'Cart'
     template_data['movies_in_cart'] = movies_in_cart
+    template_data['cart'] = cart
     template_data['cart_total'] = cart_total
     return render(request, 'cart/index.html', {'template_data': template_data})
 
 def add(request, id):
     get_object_or_404(Movie, id=id)
-    cart = request.session.get('cart', {})
-    cart[id] = request.POST['quantity']
-    request.session['cart'] = cart
+    try:
+        quantity = int(request.POST['quantity'])
+    except (KeyError, ValueError):
+        return redirect('movies.show', id=id)
+    CartStore.for_request(request, create=True).set_quantity(id, quantity)
     return redirect('cart.index')
 
 def clear(request):
-    request.session['cart'] = {}
+    store = CartStore.for_request(request)
+    if store is not None:
+        store.clear()
     return redirect('cart.index')
 
 @login_required
 def purchase(request):
-    cart = request.session.get('cart', {})
-    movie_ids = list(cart.keys())
+    store = CartStore.for_request(request)
+    if store is None:
+        return redirect('cart.index')
+
+    # total the customer saw on the cart page, if the link carried it
+    try:
+        expected_total = int(request.GET['total'])
+    except (KeyError, ValueError):
+        expected_total = None
 
-    if (movie_ids == []):
+    try:
+        order = checkout_cart(request.user, store.cart_id, expected_total)
+    except PriceChangedError:
+        # the cart page may have totalled stale cached lines; show the rows
+        store.invalidate()
+        messages.warning(request, 'Prices changed since you loaded your cart. '
+            'Please review the new total.')
         return redirect('cart.index')
-    
-    movies_in_cart = Movie.objects.filter(id__in=movie_ids)
-    cart_total = calculate_cart_total(cart, movies_in_cart)
-
-    order = Order()
-    order.user = request.user
-    order.total = cart_total
-    order.save()
-
-    for movie in movies_in_cart:
-        item = Item()
-        item.movie = movie
-        item.price = movie.price
-        item.order = order
-        item.quantity = cart[str(movie.id)]
-        item.save()
-
-    request.session['cart'] = {}
+    except EmptyCartError:
+        store.invalidate()
+        return redirect('cart.index')
+
+    store.invalidate()
     template_data = {}
     template_data['title'] = 'Purchase confirmation'
     template_data['order_id'] = order.id
-    return render(request, 'cart/purchase.html', {'template_data': template_data})
\ No newline at end of file
+    return render(request, 'cart/purchase.html', {'template_data': template_data})
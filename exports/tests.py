@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from cart.checkout import checkout
+from movies.models import Movie, Review
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        cls.customer = User.objects.create_user('=cmd|calc', password='pw')
+        cls.movie = Movie.objects.create(
+            name='Movie', price=5, description='desc', image='movie_images/x.jpg'
+        )
+        cls.other = Movie.objects.create(
+            name='Other', price=7, description='desc', image='movie_images/x.jpg'
+        )
+        checkout(cls.customer, {cls.movie.id: 2, cls.other.id: 1})
+        Review.objects.create(movie=cls.movie, user=cls.customer, comment='@SUM(A1:A9)')
+        Review.objects.create(movie=cls.other, user=cls.customer, comment='fine',
+                              is_reported=True)
+
+    def _get(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def _csv(self, name, **params):
+        return list(csv.DictReader(io.StringIO(self._get(name, **params))))
+
+    def test_only_staff_can_export(self):
+        for name in ('exports.index', 'exports.orders', 'exports.reviews'):
+            with self.subTest(name=name):
+                self.client.logout()
+                self.assertEqual(self.client.get(reverse(name)).status_code, 302)
+                self.client.force_login(self.customer)
+                self.assertEqual(self.client.get(reverse(name)).status_code, 302)
+
+    def test_orders_stream_one_row_per_item(self):
+        self.client.force_login(self.staff)
+        rows = self._csv('exports.orders')
+        self.assertEqual(
+            [(int(r['movie_id']), int(r['quantity'])) for r in rows],
+            [(self.movie.id, 2), (self.other.id, 1)],
+        )
+        self.assertEqual({r['order_total'] for r in rows}, {'17'})
+        data = json.loads(self._get('exports.orders', format='json', movie=self.other.id))
+        self.assertEqual([row['movie_name'] for row in data], ['Other'])
+
+    def test_filters(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(len(self._csv('exports.reviews')), 2)
+        self.assertEqual(len(self._csv('exports.reviews', reported='1')), 1)
+        self.assertEqual(len(self._csv('exports.reviews', movie=self.movie.id)), 1)
+        self.assertEqual(len(self._csv('exports.orders', end='2000-01-01')), 0)
+        self.assertEqual(len(self._csv('exports.orders', start='2000-01-01')), 2)
+        for params in ({'format': 'xml'}, {'start': 'yesterday'}, {'movie': 'x'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('exports.orders'), params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_csv_cells_cannot_start_formulas(self):
+        self.client.force_login(self.staff)
+        rows = self._csv('exports.reviews')
+        self.assertEqual(rows[0]['comment'], "'@SUM(A1:A9)")
+        self.assertEqual(rows[0]['username'], "'=cmd|calc")
+        self.assertEqual(rows[1]['comment'], 'fine')
+        # JSON is not opened by spreadsheets and stays as written
+        data = json.loads(self._get('exports.reviews', format='json'))
+        self.assertEqual(data[0]['comment'], '@SUM(A1:A9)')
+
+    async def test_asgi_requests_stream_asynchronously(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse('exports.orders'))
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.decode().splitlines()), 3)
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.index, name='exports.index'),
+    path('orders/', views.orders, name='exports.orders'),
+    path('reviews/', views.reviews, name='exports.reviews'),
+]
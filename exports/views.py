@@ -0,0 +1,108 @@
+import datetime
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponseBadRequest
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils import timezone
+
+from cart.models import Item
+from movies.models import Review
+from . import streams
+
+ORDER_FIELDS = [
+    'order_id', 'order_date', 'username', 'movie_id', 'movie_name',
+    'price', 'quantity', 'order_total',
+]
+REVIEW_FIELDS = [
+    'review_id', 'date', 'movie_id', 'movie_name', 'username', 'comment',
+    'is_reported',
+]
+
+
+class _BadFilter(ValueError):
+    pass
+
+
+def _filters(request):
+    """Parse ?format, ?start, ?end (YYYY-MM-DD, inclusive) and ?movie."""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in streams.FORMATS:
+        raise _BadFilter('format must be csv or json.')
+    tz = timezone.get_current_timezone()
+    bounds = {}
+    for param in ('start', 'end'):
+        value = request.GET.get(param)
+        if not value:
+            continue
+        try:
+            day = datetime.date.fromisoformat(value)
+        except ValueError:
+            raise _BadFilter(f'{param} must be a date like 2024-01-31.')
+        if param == 'end':
+            day += datetime.timedelta(days=1)
+        # compare the raw column against datetimes so its index is usable
+        bounds[param] = datetime.datetime.combine(day, datetime.time.min, tzinfo=tz)
+    movie = request.GET.get('movie')
+    if movie:
+        try:
+            movie = int(movie)
+        except ValueError:
+            raise _BadFilter('movie must be a movie id.')
+    return fmt, bounds, movie or None
+
+
+def _date_range(qs, field, bounds):
+    if 'start' in bounds:
+        qs = qs.filter(**{f'{field}__gte': bounds['start']})
+    if 'end' in bounds:
+        qs = qs.filter(**{f'{field}__lt': bounds['end']})
+    return qs
+
+
+@staff_member_required
+def index(request):
+    template_data = {
+        'title': 'Exports',
+        'exports': [
+            {'name': 'Orders', 'url': reverse('exports.orders')},
+            {'name': 'Reviews', 'url': reverse('exports.reviews'), 'reported_filter': True},
+        ],
+    }
+    return render(request, 'exports/index.html', {'template_data': template_data})
+
+
+@staff_member_required
+def orders(request):
+    """One row per order item, oldest order first."""
+    try:
+        fmt, bounds, movie = _filters(request)
+    except _BadFilter as e:
+        return HttpResponseBadRequest(str(e))
+    qs = _date_range(Item.objects.all(), 'order__date', bounds)
+    if movie:
+        qs = qs.filter(movie_id=movie)
+    qs = qs.order_by('order_id', 'id').values_list(
+        'order_id', 'order__date', 'order__user__username', 'movie_id',
+        'movie__name', 'price', 'quantity', 'order__total',
+    )
+    return streams.stream(request, qs, ORDER_FIELDS, fmt, 'orders')
+
+
+@staff_member_required
+def reviews(request):
+    """Every review, reported ones included (?reported=1 for only those)."""
+    try:
+        fmt, bounds, movie = _filters(request)
+    except _BadFilter as e:
+        return HttpResponseBadRequest(str(e))
+    qs = _date_range(Review.objects.all(), 'date', bounds)
+    if movie:
+        qs = qs.filter(movie_id=movie)
+    if request.GET.get('reported') == '1':
+        qs = qs.filter(is_reported=True)
+    qs = qs.order_by('id').values_list(
+        'id', 'date', 'movie_id', 'movie__name', 'user__username', 'comment',
+        'is_reported',
+    )
+    return streams.stream(request, qs, REVIEW_FIELDS, fmt, 'reviews')
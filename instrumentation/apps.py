@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class InstrumentationConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'instrumentation'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .recorder import install_query_hook
+
+        connection_created.connect(install_query_hook)
@@ -0,0 +1,50 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import recorder
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, duplicate queries, DB time, template time and total
+    latency for every request. Works for sync and async views alike, so it
+    adds no thread hop in front of async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics, token = recorder.start(request.method, request.path)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            metrics.status = response.status_code
+            return response
+        finally:
+            self._finish(request, metrics, token, start)
+
+    async def __acall__(self, request):
+        metrics, token = recorder.start(request.method, request.path)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            metrics.status = response.status_code
+            return response
+        finally:
+            self._finish(request, metrics, token, start)
+
+    def _finish(self, request, metrics, token, start):
+        metrics.total_ms = (time.perf_counter() - start) * 1000
+        match = getattr(request, 'resolver_match', None)
+        metrics.view = match.view_name if match else None
+        recorder.finish(metrics, token)
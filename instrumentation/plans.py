@@ -0,0 +1,63 @@
+import re
+
+from django.db import connection as default_connection
+
+# -------------------------
+# Query plans
+# -------------------------
+# EXPLAIN QUERY PLAN helpers for SQLite, used by the index tests to prove
+# that hot queries are answered from an index. A plan step such as
+# "SCAN movies_review" reads every row of the table, unless the scan
+# already yields rows in ORDER BY order and the statement has a LIMIT (a
+# rowid walk that stops after one page). "SEARCH ... USING INDEX" and
+# "SCAN ... USING INDEX" steps are fine, and so is sorting rows a SEARCH
+# has already narrowed down.
+
+_FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+_TEMP_SORT = re.compile(r'^USE TEMP B-TREE FOR (RIGHT PART OF )?ORDER BY$')
+_LIMIT = re.compile(r'\bLIMIT\s+\d+\s*$', re.IGNORECASE)
+
+
+def explain(sql, params=(), connection=None):
+    """The EXPLAIN QUERY PLAN detail lines for one statement."""
+    connection = connection or default_connection
+    if connection.vendor != 'sqlite':
+        raise NotImplementedError('Query plans are only parsed for SQLite.')
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def problems(plan, limited=False, allow_scans=()):
+    """
+    Plan steps that read a whole table. `limited` says the statement ends
+    in a LIMIT; `allow_scans` names tables that may be scanned anyway.
+    """
+    steps = [step.strip() for step in plan]
+    sorts = any(_TEMP_SORT.match(step) for step in steps)
+    found = []
+    for step in steps:
+        match = _FULL_SCAN.match(step)
+        if not match or match.group(1) in allow_scans:
+            continue
+        if limited and not sorts:
+            continue
+        found.append(step)
+    return found
+
+
+def check_queries(captured, allow_scans=(), connection=None):
+    """
+    Explain every SELECT in `captured` (CaptureQueriesContext.captured_queries)
+    and return {sql: problems} for the ones that need a full scan or sort.
+    """
+    report = {}
+    for query in captured:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        plan = explain(sql, connection=connection)
+        found = problems(plan, bool(_LIMIT.search(sql)), allow_scans)
+        if found:
+            report[sql] = found
+    return report
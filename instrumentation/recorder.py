@@ -0,0 +1,149 @@
+import collections
+import contextvars
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Per-request metrics
+# -------------------------
+# The active RequestMetrics lives in a context variable, so queries issued
+# from sync_to_async threads in async views are still attributed to the
+# request that made them. Finished requests go into a bounded ring buffer
+# per process.
+
+BUFFER_SIZE = getattr(settings, 'INSTRUMENTATION_BUFFER_SIZE', 1000)
+QUERY_BUDGET = getattr(settings, 'INSTRUMENTATION_QUERY_BUDGET', 20)
+
+_current = contextvars.ContextVar('instrumentation_request', default=None)
+
+
+class RequestMetrics:
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.view = None
+        self.status = None
+        self.started = time.time()
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.queries = collections.Counter()     # (sql, params) -> count
+        self.statements = collections.Counter()  # sql -> count
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    @property
+    def duplicate_queries(self):
+        """Queries repeated with identical parameters."""
+        return sum(n - 1 for n in self.queries.values() if n > 1)
+
+    @property
+    def similar_queries(self):
+        """Repeats of one statement with different parameters (N+1 shape)."""
+        return sum(n - 1 for n in self.statements.values() if n > 1)
+
+    def as_dict(self):
+        return {
+            'method': self.method,
+            'path': self.path,
+            'view': self.view,
+            'status': self.status,
+            'started': self.started,
+            'total_ms': round(self.total_ms, 2),
+            'db_ms': round(self.db_ms, 2),
+            'template_ms': round(self.template_ms, 2),
+            'queries': self.query_count,
+            'duplicate_queries': self.duplicate_queries,
+            'similar_queries': self.similar_queries,
+        }
+
+
+class RingBuffer:
+    def __init__(self, size):
+        self._items = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def append(self, item):
+        with self._lock:
+            self._items.append(item)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+buffer = RingBuffer(BUFFER_SIZE)
+
+
+def start(method, path):
+    metrics = RequestMetrics(method, path)
+    return metrics, _current.set(metrics)
+
+
+def finish(metrics, token):
+    _current.reset(token)
+    buffer.append(metrics.as_dict())
+    if metrics.query_count > QUERY_BUDGET:
+        logger.warning(
+            '%s (%s) ran %d queries (budget %d, %d similar, %d duplicate)',
+            metrics.view or metrics.path, metrics.path, metrics.query_count,
+            QUERY_BUDGET, metrics.similar_queries, metrics.duplicate_queries,
+        )
+
+
+def current():
+    return _current.get()
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start_time = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_ms += (time.perf_counter() - start_time) * 1000
+        metrics.statements[sql] += 1
+        metrics.queries[(sql, repr(params))] += 1
+
+
+def install_query_hook(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        # outermost, so execute_wrapper() context managers pop their own
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def summarize(records):
+    """Aggregate buffered requests per view, slowest p95 first."""
+    by_view = collections.defaultdict(list)
+    for record in records:
+        by_view[record['view'] or record['path']].append(record)
+    rows = []
+    for view, group in by_view.items():
+        latencies = sorted(r['total_ms'] for r in group)
+        rows.append({
+            'view': view,
+            'count': len(group),
+            'p50_ms': latencies[len(latencies) // 2],
+            'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            'max_queries': max(r['queries'] for r in group),
+            'avg_queries': round(sum(r['queries'] for r in group) / len(group), 1),
+            'max_similar': max(r['similar_queries'] for r in group),
+            'avg_db_ms': round(sum(r['db_ms'] for r in group) / len(group), 2),
+            'avg_template_ms': round(sum(r['template_ms'] for r in group) / len(group), 2),
+            'over_budget': sum(1 for r in group if r['queries'] > QUERY_BUDGET),
+        })
+    rows.sort(key=lambda r: r['p95_ms'], reverse=True)
+    return rows
@@ -0,0 +1,33 @@
+import time
+
+from django.template.backends.django import DjangoTemplates
+
+from . import recorder
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        metrics = recorder.current()
+        if metrics is None:
+            return self._template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self._template.render(context, request)
+        finally:
+            metrics.template_ms += (time.perf_counter() - start) * 1000
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend that adds render time to the request metrics."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
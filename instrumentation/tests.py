@@ -0,0 +1,63 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from movies.models import Movie
+from . import recorder
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        recorder.buffer.clear()
+
+    def test_each_request_is_recorded(self):
+        self.client.get(reverse('movies.index'))
+        [record] = recorder.buffer.snapshot()
+        self.assertEqual(record['view'], 'movies.index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['total_ms'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertGreaterEqual(record['total_ms'], record['db_ms'])
+
+    def test_budget_warning(self):
+        url = reverse('movies.index')
+        with mock.patch.object(recorder, 'QUERY_BUDGET', 0):
+            with self.assertLogs('instrumentation.recorder', 'WARNING') as logs:
+                self.client.get(url)
+        self.assertIn('movies.index', logs.output[0])
+        with mock.patch.object(recorder, 'QUERY_BUDGET', 1000):
+            with self.assertNoLogs('instrumentation.recorder', 'WARNING'):
+                self.client.get(url)
+
+    async def test_concurrent_requests_keep_their_own_counts(self):
+        async def request(path, queries):
+            metrics, token = recorder.start('GET', path)
+            for _ in range(queries):
+                await sync_to_async(Movie.objects.count)()
+                await asyncio.sleep(0)  # let the other request run
+            recorder.finish(metrics, token)
+            return metrics
+
+        first, second = await asyncio.gather(request('/a/', 1), request('/b/', 3))
+        self.assertEqual((first.query_count, second.query_count), (1, 3))
+        self.assertIsNone(recorder.current())
+
+
+class DashboardTests(TestCase):
+    def test_staff_only(self):
+        urls = [reverse('instrumentation.dashboard'), reverse('instrumentation.json')]
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_user('customer'))
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.dashboard, name='instrumentation.dashboard'),
+    path('json/', views.metrics_json, name='instrumentation.json'),
+]
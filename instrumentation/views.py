@@ -0,0 +1,29 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from . import recorder
+
+
+@staff_member_required
+def dashboard(request):
+    records = recorder.buffer.snapshot()
+    template_data = {
+        'title': 'Request metrics',
+        'views': recorder.summarize(records),
+        'recent': list(reversed(records[-50:])),
+        'buffered': len(records),
+        'query_budget': recorder.QUERY_BUDGET,
+    }
+    return render(request, 'instrumentation/dashboard.html',
+        {'template_data': template_data})
+
+
+@staff_member_required
+def metrics_json(request):
+    records = recorder.buffer.snapshot()
+    return JsonResponse({
+        'query_budget': recorder.QUERY_BUDGET,
+        'views': recorder.summarize(records),
+        'requests': records,
+    })
@@ -1,9 +1,19 @@
 from django.contrib import admin
-from .models import Movie, Review
+from .models import Favorite, Movie, Review
 
 class MovieAdmin(admin.ModelAdmin):
     ordering = ['name']
     search_fields = ['name']
 
+class ReviewAdmin(admin.ModelAdmin):
+    # Review.__str__ reads movie.name
+    list_select_related = ['movie']
+
+class FavoriteAdmin(admin.ModelAdmin):
+    list_display = ['user', 'movie', 'created_at']
+    list_select_related = ['user', 'movie']
+    raw_id_fields = ['user', 'movie']
+
 admin.site.register(Movie, MovieAdmin)
-admin.site.register(Review)
\ No newline at end of file
+admin.site.register(Review, ReviewAdmin)
+admin.site.register(Favorite, FavoriteAdmin)
\ No newline at end of file
@@ -0,0 +1,240 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+
+from . import cache as catalog_cache
+from . import images
+from . import search
+from .models import Movie
+
+# -------------------------
+# Bulk catalog import / export
+# -------------------------
+# Both directions stream: export walks the table with .iterator() and
+# import reads, validates and writes one batch at a time, so memory stays
+# flat whatever the catalog size. Rows carrying an id are upserted on it,
+# which makes an export re-importable; rows without one are inserted.
+# bulk_create() skips the Movie signals, so each batch is added to the
+# search index and bumps its movies' cache stamps here, and the catalog
+# stamp is bumped once at the end. Rows inserted with explicit ids do not
+# advance the id sequence (PostgreSQL), so it is reset right after each
+# batch that has them, before that batch's id-less rows draw from it.
+
+FIELDS = ['id', 'name', 'price', 'description', 'image']
+FORMATS = ('csv', 'jsonl')
+IMAGE_DIR = Movie._meta.get_field('image').upload_to
+
+
+class RowError(ValueError):
+    pass
+
+
+def guess_format(path):
+    ext = os.path.splitext(path or '')[1].lower().lstrip('.')
+    return ext if ext in FORMATS else None
+
+
+# --- export ---
+def export_movies(out, fmt, chunk_size=2000):
+    """Write every movie to the text stream `out`. Returns the row count."""
+    rows = Movie.objects.order_by('id').values_list(*FIELDS)
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(FIELDS)
+        write = writer.writerow
+    else:
+        def write(row):
+            out.write(json.dumps(dict(zip(FIELDS, row))) + '\n')
+    count = 0
+    # a server-side cursor where the backend has one (fetchmany on SQLite)
+    for row in rows.iterator(chunk_size=chunk_size):
+        write(row)
+        count += 1
+    return count
+
+
+# --- import ---
+def read_rows(f, fmt):
+    """Yield (line_number, dict) from a CSV (with header) or JSONL stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, RowError(f'invalid JSON: {e}')
+                continue
+            yield line_number, row
+
+
+def _to_movie(row):
+    if isinstance(row, RowError):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError('expected an object')
+    name = (row.get('name') or '').strip()
+    if not name:
+        raise RowError('name is required')
+    try:
+        price = int(row.get('price'))
+        movie_id = int(row['id']) if row.get('id') not in (None, '') else None
+    except (TypeError, ValueError):
+        raise RowError('id and price must be integers')
+    if price < 0:
+        raise RowError('price must not be negative')
+    return Movie(
+        id=movie_id, name=name[:255], price=price,
+        description=row.get('description') or '',
+        image=(row.get('image') or '').strip(),
+    )
+
+
+def prepare_image(image, image_root):
+    """
+    Process-pool job: check that `image` decodes, make sure it is in
+    storage and build its renditions. `image` is a storage name, or a file
+    path (absolute or relative to `image_root`) that is copied into
+    movie_images/ once it has been validated. Returns (storage name,
+    renditions, error); on error the row is rejected. Never touches the
+    database.
+    """
+    if not image:
+        return '', {}, None
+    try:
+        if default_storage.exists(image):
+            name = image
+            with default_storage.open(name, 'rb') as f:
+                original = f.read()
+            images.decode_image(original)
+        else:
+            path = os.path.join(image_root or '', image)
+            with open(path, 'rb') as f:
+                original = f.read()
+            images.decode_image(original)
+            name = f'{IMAGE_DIR}{os.path.basename(path)}'
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(original))
+        return name, images.build_renditions_from_bytes(original, name), None
+    except (OSError, ValueError) as e:
+        return None, {}, f'{image}: {e}'
+
+
+def _reset_id_sequence():
+    # past the highest id, so Movie.objects.create() does not collide with
+    # an imported row; SQLite and MySQL need no statements here
+    statements = connection.ops.sequence_reset_sql(no_style(), [Movie])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+class Importer:
+    """
+    Upserts movies in batches of `batch_size`. With `workers` > 0 images
+    are copied and resized in a process pool of that size; with 0 the
+    image column is stored as given and renditions are left to
+    `manage.py generate_image_renditions`.
+    """
+
+    def __init__(self, batch_size=1000, workers=4, image_root=None, log=print):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.image_root = image_root
+        self.log = log
+        self.imported = 0
+        self.errors = []
+
+    def run(self, rows):
+        pool = None
+        if self.workers:
+            # spawned rather than forked, so workers share no database
+            # connections or threads with this process; they only need
+            # settings and storage
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=django.setup,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        started = time.perf_counter()
+        try:
+            batch = []
+            for line_number, row in rows:
+                try:
+                    batch.append(_to_movie(row))
+                except RowError as e:
+                    self.errors.append(f'line {line_number}: {e}')
+                    continue
+                if len(batch) >= self.batch_size:
+                    self._write(batch, pool)
+                    batch = []
+                    self._progress(started)
+            if batch:
+                self._write(batch, pool)
+                self._progress(started)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        if self.imported:
+            catalog_cache.bump_catalog()
+        return self.imported
+
+    def _progress(self, started):
+        elapsed = time.perf_counter() - started
+        self.log(f'{self.imported} movies imported ({self.imported / elapsed:.0f}/s), '
+                 f'{len(self.errors)} problems')
+
+    def _write(self, batch, pool):
+        update_fields = ['name', 'price', 'description', 'image']
+        if pool is not None:
+            results = pool.map(
+                prepare_image, [m.image.name for m in batch],
+                [self.image_root] * len(batch), chunksize=16,
+            )
+            prepared = []
+            for movie, (name, renditions, error) in zip(batch, results):
+                if error:
+                    # an unreadable image rejects the row, not just the image
+                    self.errors.append(f'image {error}')
+                    continue
+                movie.image = name
+                movie.image_renditions = renditions
+                prepared.append(movie)
+            batch = prepared
+            update_fields.append('image_renditions')
+
+        # ids in a file may repeat; the last row wins, as with sequential saves
+        with_id = list({m.id: m for m in batch if m.id is not None}.values())
+        without_id = [m for m in batch if m.id is None]
+        batch = with_id + without_id
+        with transaction.atomic():
+            if with_id:
+                Movie.objects.bulk_create(
+                    with_id, batch_size=self.batch_size,
+                    update_conflicts=True, unique_fields=['id'],
+                    update_fields=update_fields,
+                )
+                _reset_id_sequence()
+            # plain inserts: a conflict here must fail, never overwrite
+            Movie.objects.bulk_create(without_id, batch_size=self.batch_size)
+            search.index_movies(batch)
+        # as the post_save signal would: detail pages and their ETags are
+        # keyed on the movie's own stamp
+        for movie in batch:
+            if movie.id is not None:
+                catalog_cache.bump_movie(movie.id)
+        self.imported += len(batch)
@@ -0,0 +1,157 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Movie
+
+# -------------------------
+# Catalog caching
+# -------------------------
+# Cached catalog data is keyed by a version stamp instead of being deleted
+# key by key. Saving or deleting a Movie bumps the catalog stamp (every
+# listing is stale) and that movie's stamp; a Review change bumps only its
+# movie's stamp. Old entries are simply never read again and age out.
+# Per-visitor parts (favorite hearts, messages, review controls) are never
+# cached.
+#
+# A stamp is the time of the last change in milliseconds (always moving
+# forward), so it also serves as Last-Modified for conditional GETs, see
+# movies/conditional.py. A stamp missing from the cache starts at "now";
+# a movie's stamp is only started once the movie is known to exist, and is
+# dropped when it is deleted.
+
+CATALOG_CACHE_TIMEOUT = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 10)
+
+_CATALOG_VERSION_KEY = 'movies:catalog:version'
+_PETITIONS_VERSION_KEY = 'movies:petitions:version'
+_RECOMMENDATIONS_VERSION_KEY = 'movies:recommendations:version'
+
+
+def _movie_version_key(movie_id):
+    return f'movies:movie:{movie_id}:version'
+
+
+def _visitor_version_key(user_id):
+    return f'movies:visitor:{user_id}:version'
+
+
+def _now():
+    return time.time_ns() // 1_000_000
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # timeout=None: a stamp must outlive everything keyed on it
+        cache.add(key, _now(), timeout=None)
+        version = cache.get(key) or _now()
+    return version
+
+
+async def _aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _now(), timeout=None)
+        version = await cache.aget(key) or _now()
+    return version
+
+
+def _bump(key):
+    # two racing bumps may store the same value; it still differs from the
+    # one both replaced
+    cache.set(key, max(cache.get(key, 0) + 1, _now()), timeout=None)
+
+
+def catalog_version():
+    return _get_version(_CATALOG_VERSION_KEY)
+
+
+def movie_version(movie_id):
+    return _get_version(_movie_version_key(movie_id))
+
+
+async def acatalog_version():
+    return await _aget_version(_CATALOG_VERSION_KEY)
+
+
+async def amovie_version(movie_id):
+    return await _aget_version(_movie_version_key(movie_id))
+
+
+async def aknown_movie_version(movie_id):
+    """The movie's stamp, or None (and no stamp stored) if it does not exist."""
+    version = await cache.aget(_movie_version_key(movie_id))
+    if version is None:
+        if not await Movie.objects.filter(id=movie_id).aexists():
+            return None
+        version = await _aget_version(_movie_version_key(movie_id))
+    return version
+
+
+def petitions_version():
+    return _get_version(_PETITIONS_VERSION_KEY)
+
+
+def recommendations_version():
+    return _get_version(_RECOMMENDATIONS_VERSION_KEY)
+
+
+def visitor_version(user_id):
+    """Stamp of one user's own favorites and votes."""
+    return _get_version(_visitor_version_key(user_id))
+
+
+async def apetitions_version():
+    return await _aget_version(_PETITIONS_VERSION_KEY)
+
+
+async def arecommendations_version():
+    return await _aget_version(_RECOMMENDATIONS_VERSION_KEY)
+
+
+def bump_catalog():
+    _bump(_CATALOG_VERSION_KEY)
+
+
+def bump_movie(movie_id):
+    _bump(_movie_version_key(movie_id))
+
+
+def forget_movie(movie_id):
+    cache.delete(_movie_version_key(movie_id))
+
+
+def bump_petitions():
+    _bump(_PETITIONS_VERSION_KEY)
+
+
+def bump_recommendations():
+    _bump(_RECOMMENDATIONS_VERSION_KEY)
+
+
+def bump_visitor(user_id):
+    _bump(_visitor_version_key(user_id))
+
+
+def make_key(prefix, version, *parts):
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'movies:{prefix}:v{version}:{digest}'
+
+
+def get_or_build(key, builder):
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, CATALOG_CACHE_TIMEOUT)
+    return value
+
+
+async def aget_or_build(key, builder):
+    """Async get_or_build(); `builder` is a coroutine function."""
+    value = await cache.aget(key)
+    if value is None:
+        value = await builder()
+        await cache.aset(key, value, CATALOG_CACHE_TIMEOUT)
+    return value
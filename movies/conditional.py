@@ -0,0 +1,110 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import checks
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.messages.storage.session import SessionStorage
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from moviesstore import sessions
+
+from . import cache as catalog_cache
+from .favorites import FAV_SESSION_KEY
+
+# -------------------------
+# Conditional GET
+# -------------------------
+# The movie list, movie page and petition list answer If-None-Match and
+# If-Modified-Since from version stamps (movies/cache.py) before running
+# any page query. The ETag covers the stamps of the shared data, the full
+# path, who is asking and the stamp of that user's own favorites and
+# votes; Last-Modified is the newest of those stamps. Responses are
+# "private, no-cache": browsers keep them but revalidate every time.
+#
+# Pages carrying a flash message, stored or queued by this request, are
+# never answered with 304, and an anonymous visitor with session favorites
+# gets no Last-Modified (their hearts have no timestamp), only the ETag.
+#
+# All of this is off unless settings.CONDITIONAL_GET is set, which it is by
+# default only with a shared cache: stamps kept in a per-process cache are
+# not bumped by writes made in other workers.
+
+
+class Validators:
+    def __init__(self, etag, last_modified):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def not_modified(self, request):
+        """The 304 (or 412) response for `request`, or None to render."""
+        if self.etag is None:
+            return None
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified,
+        )
+        return self.apply(response) if response is not None else None
+
+    def apply(self, response):
+        if self.etag is not None:
+            response.headers['ETag'] = self.etag
+            if self.last_modified is not None:
+                response.headers['Last-Modified'] = http_date(self.last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+def _has_messages(request):
+    # queued by this request, not yet stored
+    storage = getattr(request, '_messages', None)
+    if storage is not None and storage._queued_messages:
+        return True
+    # an emptied message cookie may linger with no value
+    return bool(
+        request.COOKIES.get(CookieStorage.cookie_name)
+        or request.session.get(SessionStorage.session_key)
+    )
+
+
+def for_page(request, page, *stamps):
+    """Validators for `page` built from `stamps` plus the visitor's own state."""
+    if not getattr(settings, 'CONDITIONAL_GET', False) or _has_messages(request):
+        return Validators(None, None)
+    stamps = list(stamps)
+    user = request.user
+    dated = True
+    if user.is_authenticated:
+        visitor = (user.id, catalog_cache.visitor_version(user.id))
+        stamps.append(visitor[1])
+    else:
+        favorites = sorted(request.session.get(FAV_SESSION_KEY, []))
+        visitor = (None, favorites)
+        dated = not favorites
+    digest = hashlib.md5(
+        repr((page, request.get_full_path(), stamps, visitor)).encode()
+    ).hexdigest()
+    # whole seconds, as If-Modified-Since will come back
+    last_modified = max(stamps) // 1000 if dated else None
+    return Validators(f'W/"{digest}"', last_modified)
+
+
+async def afor_page(request, page, *stamps):
+    # the session and the visitor stamp are read off the event loop
+    return await sync_to_async(for_page)(request, page, *stamps)
+
+
+@checks.register(checks.Tags.caches)
+def check_stamp_cache(app_configs, **kwargs):
+    if not getattr(settings, 'CONDITIONAL_GET', False):
+        return []
+    if sessions.is_shared(settings.CACHES.get('default', {})):
+        return []
+    return [checks.Warning(
+        'CONDITIONAL_GET answers from version stamps in the per-process cache '
+        "'default'.",
+        hint='With several worker processes, a write in one leaves the others '
+             'answering 304 for stale pages. Point the cache at Redis or '
+             'Memcached, or set CONDITIONAL_GET = False.',
+        id='moviesstore.W002',
+    )]
@@ -0,0 +1,145 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from . import cache as catalog_cache
+from .models import Favorite, Movie
+
+# -------------------------
+# Favorites
+# -------------------------
+# Signed-in users' favorites are Favorite rows; anonymous visitors keep a
+# list in their session, which is folded into the account at login. The
+# id set a page needs comes from one cache entry per user (one indexed
+# query on a miss) and is memoized on the request. Movie.favorite_count
+# moves by one with each add or remove, so "N users favorited this" is
+# never an aggregate at read time.
+
+FAV_SESSION_KEY = "favorite_movie_ids"
+CACHE_TIMEOUT = getattr(settings, 'FAVORITES_CACHE_TIMEOUT', 60 * 60 * 24)
+_REQUEST_ATTR = '_favorite_ids'
+
+
+def _cache_key(user_id):
+    return f'movies:favorites:user:{user_id}'
+
+
+def user_ids(user_id):
+    """frozenset of the movie ids `user_id` has favorited."""
+    ids = cache.get(_cache_key(user_id))
+    if ids is None:
+        ids = frozenset(
+            Favorite.objects.filter(user_id=user_id).values_list('movie_id', flat=True)
+        )
+        cache.set(_cache_key(user_id), ids, CACHE_TIMEOUT)
+    return ids
+
+
+def ids_for_request(request):
+    """The visitor's favorite ids; computed once per request."""
+    ids = getattr(request, _REQUEST_ATTR, None)
+    if ids is None:
+        if request.user.is_authenticated:
+            ids = user_ids(request.user.id)
+        else:
+            ids = frozenset(request.session.get(FAV_SESSION_KEY, []))
+        setattr(request, _REQUEST_ATTR, ids)
+    return ids
+
+
+def _stale(request, user_id):
+    # the cached id set disagreed with the table; drop it so the next
+    # toggle reads the rows instead of repeating the same no-op
+    cache.delete(_cache_key(user_id))
+    catalog_cache.bump_visitor(user_id)
+    if hasattr(request, _REQUEST_ATTR):
+        delattr(request, _REQUEST_ATTR)
+
+
+def _changed(request, user_id, movie_id):
+    if user_id is not None:
+        cache.delete(_cache_key(user_id))
+        catalog_cache.bump_visitor(user_id)
+        # the detail page shows favorite_count, which only accounts move
+        catalog_cache.bump_movie(movie_id)
+    if hasattr(request, _REQUEST_ATTR):
+        delattr(request, _REQUEST_ATTR)
+
+
+def add(request, movie_id):
+    """Favorite `movie_id`; returns False if it already was."""
+    if not request.user.is_authenticated:
+        ids = set(request.session.get(FAV_SESSION_KEY, []))
+        if movie_id in ids:
+            return False
+        ids.add(movie_id)
+        request.session[FAV_SESSION_KEY] = sorted(ids)
+        _changed(request, None, movie_id)
+        return True
+    try:
+        with transaction.atomic():
+            Favorite.objects.create(user=request.user, movie_id=movie_id)
+            Movie.objects.filter(id=movie_id).update(favorite_count=F('favorite_count') + 1)
+    except IntegrityError:
+        _stale(request, request.user.id)
+        return False
+    _changed(request, request.user.id, movie_id)
+    return True
+
+
+def remove(request, movie_id):
+    """Unfavorite `movie_id`; returns False if it was not a favorite."""
+    if not request.user.is_authenticated:
+        ids = set(request.session.get(FAV_SESSION_KEY, []))
+        if movie_id not in ids:
+            return False
+        ids.discard(movie_id)
+        request.session[FAV_SESSION_KEY] = sorted(ids)
+        _changed(request, None, movie_id)
+        return True
+    with transaction.atomic():
+        deleted, _ = Favorite.objects.filter(user=request.user, movie_id=movie_id).delete()
+        if deleted:
+            Movie.objects.filter(id=movie_id, favorite_count__gt=0).update(
+                favorite_count=F('favorite_count') - 1
+            )
+    if not deleted:
+        _stale(request, request.user.id)
+        return False
+    _changed(request, request.user.id, movie_id)
+    return True
+
+
+def toggle(request, movie_id):
+    """
+    Flip `movie_id`. Returns True if it was added, False if it was removed
+    and None if a concurrent request had already made the change.
+    """
+    if movie_id in ids_for_request(request):
+        return False if remove(request, movie_id) else None
+    return True if add(request, movie_id) else None
+
+
+def merge_session_favorites(request, user):
+    """At login, move the anonymous session list into `user`'s favorites."""
+    session_ids = set(request.session.pop(FAV_SESSION_KEY, []))
+    if not session_ids:
+        return
+    with transaction.atomic():
+        existing = set(
+            Favorite.objects.filter(user=user, movie_id__in=session_ids)
+            .values_list('movie_id', flat=True)
+        )
+        live = set(
+            Movie.objects.filter(id__in=session_ids - existing).values_list('id', flat=True)
+        )
+        Favorite.objects.bulk_create(
+            [Favorite(user=user, movie_id=movie_id) for movie_id in live],
+            ignore_conflicts=True,
+        )
+        Movie.objects.filter(id__in=live).update(favorite_count=F('favorite_count') + 1)
+    cache.delete(_cache_key(user.id))
+    catalog_cache.bump_visitor(user.id)
+    for movie_id in live:
+        catalog_cache.bump_movie(movie_id)
@@ -0,0 +1,111 @@
+import hashlib
+import io
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from . import cache as catalog_cache
+from .models import Movie
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Image renditions
+# -------------------------
+# Uploads are resized to a few fixed widths and re-encoded as WebP. Each
+# rendition's filename embeds a hash of the original's bytes, so a URL never
+# changes meaning and can be served with a far-future Cache-Control header.
+
+RENDITION_WIDTHS = getattr(settings, 'MOVIE_IMAGE_WIDTHS', [200, 400, 800])
+RENDITION_DIR = 'movie_images/renditions'
+WEBP_QUALITY = 80
+
+def needs_renditions(movie):
+    return bool(movie.image) and movie.image_renditions.get('source') != movie.image.name
+
+
+def build_renditions(movie):
+    """
+    Write every rendition for `movie.image` and return the mapping stored
+    in Movie.image_renditions: {'source': name, 'widths': {width: name}}.
+    """
+    with movie.image.open('rb') as f:
+        original = f.read()
+    return build_renditions_from_bytes(original, movie.image.name)
+
+
+class InvalidImage(ValueError):
+    """The bytes are not an image that can be decoded safely."""
+
+
+# raised by Pillow for data it cannot (or must not) decode; the bytes are in
+# memory here, so an OSError says nothing about storage
+_DECODE_ERRORS = (OSError, ValueError, SyntaxError, Image.DecompressionBombError)
+
+
+def decode_image(original):
+    """Open, orient and convert image bytes, or raise InvalidImage."""
+    try:
+        with Image.open(io.BytesIO(original)) as img:
+            img.load()
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+            return img
+    except _DECODE_ERRORS as e:
+        raise InvalidImage(str(e) or type(e).__name__) from e
+
+
+def build_renditions_from_bytes(original, source_name):
+    """
+    build_renditions() for image bytes already in memory; no database
+    access. Raises InvalidImage for bytes that are not a usable image;
+    storage errors propagate as they are.
+    """
+    digest = hashlib.sha256(original).hexdigest()[:16]
+    img = decode_image(original)
+
+    widths = {}
+    for width in RENDITION_WIDTHS:
+        # never upscale; small originals get a single rendition
+        width = min(width, img.width)
+        if str(width) in widths:
+            continue
+        name = f'{RENDITION_DIR}/{digest}-{width}.webp'
+        if not default_storage.exists(name):
+            height = round(img.height * width / img.width)
+            buf = io.BytesIO()
+            try:
+                img.resize((width, height), Image.LANCZOS).save(
+                    buf, 'WEBP', quality=WEBP_QUALITY, method=6
+                )
+            except _DECODE_ERRORS as e:
+                raise InvalidImage(str(e) or type(e).__name__) from e
+            default_storage.save(name, ContentFile(buf.getvalue()))
+        widths[str(width)] = name
+    return {'source': source_name, 'widths': widths}
+
+
+def generate_renditions(movie_id):
+    """
+    Store renditions for the movie's image. A file that is not a usable
+    image is logged and left alone; storage errors are raised so the task
+    is retried.
+    """
+    movie = Movie.objects.filter(id=movie_id).first()
+    if movie is None or not needs_renditions(movie):
+        return
+    try:
+        renditions = build_renditions(movie)
+    except InvalidImage:
+        logger.exception('Movie %s has no usable image', movie_id)
+        return
+    # update() rather than save(): no signal round-trip back into this queue
+    Movie.objects.filter(id=movie_id, image=movie.image.name).update(
+        image_renditions=renditions
+    )
+    catalog_cache.bump_catalog()
+    catalog_cache.bump_movie(movie_id)
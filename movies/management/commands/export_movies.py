@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from movies import bulk
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the movie catalog to CSV or JSONL without loading it into "
+        "memory. The output can be fed back to import_movies."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", nargs="?", default="-",
+            help="File to write, or - for stdout (default).")
+        parser.add_argument("--format", choices=bulk.FORMATS,
+            help="Defaults to the output file's extension, else csv.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        fmt = options["format"] or bulk.guess_format(output) or "csv"
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        if output == "-":
+            count = bulk.export_movies(sys.stdout, fmt, options["chunk_size"])
+        else:
+            with open(output, "w", newline="", encoding="utf-8") as f:
+                count = bulk.export_movies(f, fmt, options["chunk_size"])
+        self.stderr.write(f"Exported {count} movies.")
@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from movies import images
+from movies.models import Movie
+
+
+class Command(BaseCommand):
+    help = "Build resized WebP renditions for movie images that lack them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true",
+            help="Rebuild renditions even where they are up to date.")
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        if options["force"]:
+            Movie.objects.exclude(image_renditions={}).update(image_renditions={})
+        movie_ids = [
+            m.id for m in Movie.objects.only("id", "image", "image_renditions")
+            if images.needs_renditions(m)
+        ]
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            list(pool.map(images.generate_renditions, movie_ids))
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {len(movie_ids)} movie images."
+        ))
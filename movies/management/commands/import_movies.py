@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from movies import bulk
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load movies from CSV or JSONL (columns: id, name, price, "
+        "description, image). Rows are upserted by id in batches; rows "
+        "without an id are added. Images may be storage names or file paths "
+        "and are copied and resized in a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="File to read, or - for stdin.")
+        parser.add_argument("--format", choices=bulk.FORMATS,
+            help="Defaults to the input file's extension.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=4,
+            help="Image processes; 0 stores the image column as given.")
+        parser.add_argument("--image-root",
+            help="Directory that relative image paths are resolved against.")
+
+    def handle(self, *args, **options):
+        source = options["input"]
+        fmt = options["format"] or bulk.guess_format(source)
+        if fmt is None:
+            raise CommandError("Cannot tell the format; pass --format csv or jsonl.")
+        if options["batch_size"] < 1 or options["workers"] < 0:
+            raise CommandError("--batch-size must be positive and --workers not negative.")
+
+        importer = bulk.Importer(
+            batch_size=options["batch_size"], workers=options["workers"],
+            image_root=options["image_root"], log=self.stdout.write,
+        )
+        try:
+            if source == "-":
+                count = importer.run(bulk.read_rows(sys.stdin, fmt))
+            else:
+                with open(source, newline="", encoding="utf-8") as f:
+                    count = importer.run(bulk.read_rows(f, fmt))
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in importer.errors[:20]:
+            self.stderr.write(error)
+        if len(importer.errors) > 20:
+            self.stderr.write(f"... and {len(importer.errors) - 20} more.")
+        self.stdout.write(self.style.SUCCESS(f"Imported {count} movies."))
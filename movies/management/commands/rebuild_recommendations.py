@@ -0,0 +1,27 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from movies import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the \"customers also bought\" neighbors of every movie "
+        "from purchases and reviews. The rebuild_recommendations task runs "
+        "this nightly; use --workers to spread a large catalog over cores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--top-k", type=int, default=recommendations.TOP_K)
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["top_k"] < 1:
+            raise CommandError("--workers and --top-k must be positive.")
+        started = time.perf_counter()
+        count = recommendations.rebuild(options["workers"], options["top_k"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} neighbors in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from movies import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over movie names and descriptions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            self.stdout.write(self.style.WARNING(
+                "Full-text search needs SQLite FTS5; searches fall back to LIKE."
+            ))
+            return
+        count = search.rebuild_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} movies."))
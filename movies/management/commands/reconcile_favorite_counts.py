@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from movies import cache as catalog_cache
+from movies.models import Movie
+
+
+class Command(BaseCommand):
+    help = "Recount favorites and repair any drift in Movie.favorite_count."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Report drifted movies without writing.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = (
+            Movie.objects
+            .annotate(actual=Count("favorited_by"))
+            .exclude(favorite_count=F("actual"))
+            .values_list("id", "actual")
+        )
+        batch_size = options["batch_size"]
+        fixed = 0
+        batch = []
+        for movie_id, actual in drifted.iterator(chunk_size=batch_size):
+            batch.append(Movie(id=movie_id, favorite_count=actual))
+            if len(batch) >= batch_size:
+                fixed += self._save(batch, options["dry_run"])
+                batch = []
+        if batch:
+            fixed += self._save(batch, options["dry_run"])
+
+        verb = "Would repair" if options["dry_run"] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {fixed} movie favorite counts."))
+
+    def _save(self, batch, dry_run):
+        if not dry_run:
+            with transaction.atomic():
+                Movie.objects.bulk_update(batch, ["favorite_count"])
+            for movie in batch:
+                catalog_cache.bump_movie(movie.id)
+        return len(batch)
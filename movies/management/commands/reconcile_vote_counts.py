@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from movies import cache as catalog_cache
+from movies.models import Petition
+
+
+class Command(BaseCommand):
+    help = "Recount petition votes and repair any drift in Petition.vote_count."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Report drifted petitions without writing.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = (
+            Petition.objects
+            .annotate(actual=Count("votes"))
+            .exclude(vote_count=F("actual"))
+            .values_list("id", "actual")
+        )
+        batch_size = options["batch_size"]
+        fixed = 0
+        batch = []
+        for petition_id, actual in drifted.iterator(chunk_size=batch_size):
+            batch.append(Petition(id=petition_id, vote_count=actual))
+            if len(batch) >= batch_size:
+                fixed += self._save(batch, options["dry_run"])
+                batch = []
+        if batch:
+            fixed += self._save(batch, options["dry_run"])
+
+        verb = "Would repair" if options["dry_run"] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {fixed} petition vote counts."))
+
+    def _save(self, batch, dry_run):
+        if not dry_run:
+            with transaction.atomic():
+                Petition.objects.bulk_update(batch, ["vote_count"])
+            # the petitions list shows the counts
+            catalog_cache.bump_petitions()
+        return len(batch)
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-17 15:16
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_count(apps, schema_editor):
+    Petition = apps.get_model('movies', 'Petition')
+    PetitionVote = apps.get_model('movies', 'PetitionVote')
+    votes = (
+        PetitionVote.objects.filter(petition=OuterRef('pk'))
+        .values('petition').annotate(c=Count('id')).values('c')
+    )
+    Petition.objects.update(vote_count=Coalesce(Subquery(votes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_movie_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petition',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_vote_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='petition',
+            index=models.Index(fields=['-vote_count', '-created_at'], name='petition_votes_idx'),
+        ),
+    ]
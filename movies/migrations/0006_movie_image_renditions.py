@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_petition_vote_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
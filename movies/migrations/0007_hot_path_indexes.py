@@ -0,0 +1,39 @@
+# Generated by Django 5.0.14 on 2026-10-17 15:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_movie_image_renditions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='petition',
+            name='petition_votes_idx',
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['name', 'id'], name='movie_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['price', 'id'], name='movie_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petition',
+            index=models.Index(fields=['-vote_count', '-created_at', '-id'], name='petition_votes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petitionvote',
+            index=models.Index(fields=['user', 'petition'], name='petitionvote_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('is_reported', False)), fields=['movie', 'id'], name='review_visible_idx'),
+        ),
+    ]
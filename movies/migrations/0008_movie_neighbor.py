@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-17 15:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='movies.movie')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='movies.movie')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='movieneighbor',
+            constraint=models.UniqueConstraint(fields=('movie', 'rank'), name='unique_movie_neighbor_rank'),
+        ),
+    ]
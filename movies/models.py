@@ -1,16 +1,79 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+class MovieQuerySet(models.QuerySet):
+    def for_listing(self):
+        # columns the movie cards and keyset ordering need; skips description
+        return self.only('id', 'name', 'price', 'image', 'image_renditions')
+
+
 class Movie(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255)
     price = models.IntegerField()
     description = models.TextField()
     image = models.ImageField(upload_to='movie_images/')
+    # resized WebP copies of `image`, filled in by movies.images
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    # denormalized count of Favorite rows, kept in step by movies.favorites;
+    # `manage.py reconcile_favorite_counts` repairs drift
+    favorite_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = MovieQuerySet.as_manager()
+
+    class Meta:
+        # the index sort options and their keyset cursors walk these
+        indexes = [
+            models.Index(fields=['name', 'id'], name='movie_name_idx'),
+            models.Index(fields=['price', 'id'], name='movie_price_idx'),
+        ]
 
     def __str__(self):
         return str(self.id) + ' - ' + self.name
 
+    def _renditions(self):
+        if not self.image or self.image_renditions.get('source') != self.image.name:
+            return {}
+        return self.image_renditions.get('widths', {})
+
+    def image_url(self, width):
+        """URL of the smallest rendition at least `width` wide, else the original."""
+        renditions = self._renditions()
+        for w in sorted(renditions, key=int):
+            if int(w) >= width:
+                return self.image.storage.url(renditions[w])
+        if renditions:
+            return self.image.storage.url(renditions[max(renditions, key=int)])
+        return self.image.url
+
+    @property
+    def image_srcset(self):
+        renditions = self._renditions()
+        return ', '.join(
+            f'{self.image.storage.url(name)} {w}w'
+            for w, name in sorted(renditions.items(), key=lambda kv: int(kv[0]))
+        )
+
+    @property
+    def image_card_url(self):
+        return self.image_url(200)
+
+    @property
+    def image_detail_url(self):
+        return self.image_url(400)
+
+class ReviewQuerySet(models.QuerySet):
+    def visible(self):
+        # reported reviews are hidden from everyone
+        return self.filter(is_reported=False)
+
+    def for_display(self):
+        return self.select_related('user').only(
+            'id', 'comment', 'date', 'movie_id', 'is_reported',
+            'user__id', 'user__username',
+        )
+
+
 class Review(models.Model):
     id = models.AutoField(primary_key=True)
     comment = models.CharField(max_length=255)
@@ -19,12 +82,31 @@ class Review(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     is_reported = models.BooleanField(default=False)
 
+    objects = ReviewQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # movie pages only read visible reviews; reported ones stay
+            # out of the index entirely
+            models.Index(
+                fields=['movie', 'id'], name='review_visible_idx',
+                condition=models.Q(is_reported=False),
+            ),
+        ]
 
     def __str__(self):
         return str(self.id) + ' - ' + self.movie.name
 
 
 # ---------- Petitions ----------
+class PetitionQuerySet(models.QuerySet):
+    def for_listing(self):
+        return self.select_related('created_by').only(
+            'id', 'title', 'description', 'created_at', 'vote_count',
+            'created_by__id', 'created_by__username',
+        )
+
+
 class Petition(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -32,6 +114,16 @@ class Petition(models.Model):
         User, on_delete=models.CASCADE, related_name="petitions"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # denormalized count of PetitionVote rows, bumped by each buffered vote
+    # flush (movies/votes.py); `manage.py reconcile_vote_counts` repairs drift
+    vote_count = models.PositiveIntegerField(default=0)
+
+    objects = PetitionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-vote_count", "-created_at", "-id"], name="petition_votes_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -39,7 +131,7 @@ class Petition(models.Model):
     @property
     def yes_count(self):
         # count of affirmative votes
-        return self.votes.count()
+        return self.vote_count
 
 
 class PetitionVote(models.Model):
@@ -53,6 +145,63 @@ class PetitionVote(models.Model):
 
     class Meta:
         unique_together = ("petition", "user")  # one 'yes' per user per petition
+        indexes = [
+            # covers "which petitions has this user voted on"
+            models.Index(fields=["user", "petition"], name="petitionvote_user_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} → {self.petition.title}"
+
+
+class Favorite(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="favorites"
+    )
+    movie = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name="favorited_by"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # one row per user per movie; also the index behind a user's id set
+            models.UniqueConstraint(fields=["user", "movie"], name="unique_user_movie_favorite"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} ♥ {self.movie_id}"
+
+
+class MovieNeighborQuerySet(models.QuerySet):
+    def for_display(self, movie_id):
+        return (
+            self.filter(movie_id=movie_id).order_by("rank")
+            .select_related("neighbor")
+            .only("id", "movie_id", "rank", "neighbor__id", "neighbor__name",
+                  "neighbor__price", "neighbor__image", "neighbor__image_renditions")
+        )
+
+
+class MovieNeighbor(models.Model):
+    # precomputed "customers also bought" list, rebuilt by
+    # movies.recommendations; rank 1 is the closest neighbor
+    movie = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name="neighbors"
+    )
+    neighbor = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name="+"
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    objects = MovieNeighborQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # also the index the movie page reads its list from
+            models.UniqueConstraint(fields=["movie", "rank"], name="unique_movie_neighbor_rank"),
+        ]
+
+    def __str__(self):
+        return f"{self.movie_id} → {self.neighbor_id} ({self.score:.3f})"
@@ -0,0 +1,199 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+# -------------------------
+# Keyset (cursor) pagination
+# -------------------------
+# Each page is fetched with a WHERE clause on the ordering columns of the
+# last row seen instead of an OFFSET, so deep pages cost the same as the
+# first one. Cursors are opaque, URL-safe tokens.
+
+PAGE_SIZE = 24
+CURSOR_PARAM = "cursor"
+
+
+class CursorPage:
+    def __init__(self, items, next_query, prev_query):
+        self.items = items
+        self.next_query = next_query
+        self.prev_query = prev_query
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    @property
+    def has_other_pages(self):
+        return bool(self.next_query or self.prev_query)
+
+
+def _json_default(o):
+    # Full-precision isoformat: DjangoJSONEncoder drops microseconds, which
+    # would break equality on the tiebreak columns.
+    if isinstance(o, (datetime.datetime, datetime.date)):
+        return o.isoformat()
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    raise TypeError(f"Cannot encode {type(o).__name__} in a cursor")
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({"v": values, "d": direction}, default=_json_default)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Return (values, direction), or None for a missing or tampered token."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload["v"], payload["d"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+    if direction not in ("next", "prev") or not isinstance(values, list):
+        return None
+    return values, direction
+
+
+def _with_tiebreaker(ordering):
+    ordering = list(ordering)
+    if not any(f.lstrip("-") in ("id", "pk") for f in ordering):
+        # same direction as the last key, so one (key, id) index serves
+        # both the ascending and the descending sort
+        descending = bool(ordering) and ordering[-1].startswith("-")
+        ordering.append("-id" if descending else "id")
+    return ordering
+
+
+def _reverse(ordering):
+    return [f[1:] if f.startswith("-") else "-" + f for f in ordering]
+
+
+def _after(ordering, values):
+    """
+    Build the keyset predicate "row sorts strictly after `values`", e.g. for
+    ("-price", "id"): price <= p AND (price < p OR (price = p AND id > i)).
+    The leading range on the first key lets the database seek into an index
+    on the ordering columns instead of filtering from its start.
+    """
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        clause = Q(**{f"{name}__{lookup}": values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            clause &= Q(**{prev_field.lstrip("-"): prev_value})
+        condition |= clause
+    if len(ordering) > 1:
+        first = ordering[0]
+        lookup = "lte" if first.startswith("-") else "gte"
+        condition &= Q(**{f"{first.lstrip('-')}__{lookup}": values[0]})
+    return condition
+
+
+def _field(qs, name):
+    if name == "pk":
+        return qs.model._meta.pk
+    annotation = qs.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    return qs.model._meta.get_field(name)
+
+
+def _clean_values(qs, ordering, values):
+    """
+    Convert cursor values with their fields' to_python(), so a tampered
+    cursor falls back to the first page instead of failing in the query.
+    Returns None when any value does not fit its column.
+    """
+    if len(values) != len(ordering):
+        return None
+    cleaned = []
+    try:
+        for field, value in zip(ordering, values):
+            value = _field(qs, field.lstrip("-")).to_python(value)
+            if value is None:
+                return None
+            cleaned.append(value)
+    except (FieldDoesNotExist, ValidationError, ValueError, TypeError):
+        return None
+    return cleaned
+
+
+def _row_values(obj, ordering):
+    return [getattr(obj, f.lstrip("-")) for f in ordering]
+
+
+def _plan(request, qs, ordering, page_size):
+    ordering = _with_tiebreaker(ordering)
+    cursor = decode_cursor(request.GET.get(CURSOR_PARAM))
+    if cursor:
+        values = _clean_values(qs, ordering, cursor[0])
+        cursor = (values, cursor[1]) if values is not None else None
+
+    if cursor and cursor[1] == "prev":
+        reverse = _reverse(ordering)
+        qs = qs.filter(_after(reverse, cursor[0])).order_by(*reverse)
+    else:
+        qs = qs.order_by(*ordering)
+        if cursor:
+            qs = qs.filter(_after(ordering, cursor[0]))
+    return ordering, cursor, qs[:page_size + 1]
+
+
+def _build_page(request, rows, ordering, cursor, page_size):
+    if cursor and cursor[1] == "prev":
+        has_prev = len(rows) > page_size
+        items = list(reversed(rows[:page_size]))
+        has_next = True
+    else:
+        has_next = len(rows) > page_size
+        items = rows[:page_size]
+        has_prev = cursor is not None
+
+    next_query = prev_query = None
+    if items and has_next:
+        next_query = _query_with_cursor(
+            request, encode_cursor(_row_values(items[-1], ordering), "next")
+        )
+    if items and has_prev:
+        prev_query = _query_with_cursor(
+            request, encode_cursor(_row_values(items[0], ordering), "prev")
+        )
+    return CursorPage(items, next_query, prev_query)
+
+
+def paginate(request, qs, ordering, page_size=PAGE_SIZE):
+    """
+    Return a CursorPage of `qs` sorted by `ordering` (a list of field or
+    annotation names, "-" for descending). An id tiebreaker is appended so
+    that rows with equal sort keys are never skipped or repeated.
+    """
+    ordering, cursor, page_qs = _plan(request, qs, ordering, page_size)
+    return _build_page(request, list(page_qs), ordering, cursor, page_size)
+
+
+async def apaginate(request, qs, ordering, page_size=PAGE_SIZE):
+    """Async counterpart of paginate() for ASGI views."""
+    ordering, cursor, page_qs = _plan(request, qs, ordering, page_size)
+    rows = [obj async for obj in page_qs]
+    return _build_page(request, rows, ordering, cursor, page_size)
+
+
+def _query_with_cursor(request, token):
+    params = request.GET.copy()
+    params[CURSOR_PARAM] = token
+    return params.urlencode()
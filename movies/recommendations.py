@@ -0,0 +1,133 @@
+import collections
+import heapq
+import math
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import connections, transaction
+
+from cart.models import Item
+from . import cache as catalog_cache
+from .models import Favorite, Movie, MovieNeighbor, Review
+
+# -------------------------
+# "Customers also bought"
+# -------------------------
+# Each customer is a sparse vector of movie weights: bought counts 1.0,
+# favorited 0.75, reviewed (visible reviews only) 0.5. Two movies are as similar as the
+# cosine of their columns, i.e. co-occurrence summed over customers and
+# divided by the movies' norms. The top k neighbors per movie go into
+# MovieNeighbor, so the movie page reads its list with one indexed query.
+#
+# The matrix is never materialized. Every worker reads the (linear) basket
+# list but only counts pairs for the anchor movies it owns (movie id modulo
+# the worker count), so the quadratic part of the work and its memory are
+# split across processes.
+
+TOP_K = getattr(settings, 'RECOMMENDATIONS_TOP_K', 8)
+PURCHASE_WEIGHT = 1.0
+FAVORITE_WEIGHT = 0.75
+REVIEW_WEIGHT = 0.5
+# pairs grow with the square of a basket; cap bulk buyers with a random
+# sample, seeded by the customer so every worker draws the same one
+MAX_BASKET = 200
+
+
+def load_baskets():
+    """{user_id: {movie_id: weight}} for every customer with any signal."""
+    baskets = collections.defaultdict(dict)
+    purchases = (
+        Item.objects.values_list('order__user_id', 'movie_id')
+        .distinct().order_by().iterator(chunk_size=5000)
+    )
+    for user_id, movie_id in purchases:
+        baskets[user_id][movie_id] = PURCHASE_WEIGHT
+    signals = [
+        (Favorite.objects.values_list('user_id', 'movie_id'), FAVORITE_WEIGHT),
+        (Review.objects.visible().values_list('user_id', 'movie_id').distinct(), REVIEW_WEIGHT),
+    ]
+    for rows, weight in signals:
+        for user_id, movie_id in rows.order_by().iterator(chunk_size=5000):
+            basket = baskets[user_id]
+            basket[movie_id] = max(basket.get(movie_id, 0.0), weight)
+    return baskets
+
+
+def _capped(user_id, basket):
+    items = sorted(basket.items())
+    if len(items) <= MAX_BASKET:
+        return items
+    return random.Random(user_id).sample(items, MAX_BASKET)
+
+
+def compute_partition(partition, partitions, top_k=TOP_K):
+    """
+    Neighbor rows (movie_id, neighbor_id, rank, score) for the anchor
+    movies with id % partitions == partition.
+    """
+    baskets = [_capped(user_id, b) for user_id, b in load_baskets().items()]
+
+    norms = collections.defaultdict(float)
+    for basket in baskets:
+        for movie_id, weight in basket:
+            norms[movie_id] += weight * weight
+
+    dots = collections.defaultdict(lambda: collections.defaultdict(float))
+    for basket in baskets:
+        for anchor, anchor_weight in basket:
+            if anchor % partitions != partition:
+                continue
+            row = dots[anchor]
+            for other, weight in basket:
+                if other != anchor:
+                    row[other] += anchor_weight * weight
+
+    rows = []
+    for anchor, row in dots.items():
+        scored = (
+            (dot / math.sqrt(norms[anchor] * norms[other]), -other)
+            for other, dot in row.items()
+        )
+        for rank, (score, neg_other) in enumerate(heapq.nlargest(top_k, scored), 1):
+            rows.append((anchor, -neg_other, rank, round(score, 6)))
+    return rows
+
+
+def rebuild(workers=1, top_k=TOP_K):
+    """
+    Recompute every movie's neighbors over `workers` processes and replace
+    the MovieNeighbor table in one transaction. Returns the rows written.
+    """
+    if workers > 1:
+        # spawned workers open their own connections
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=django.setup,
+            mp_context=multiprocessing.get_context('spawn'),
+        ) as pool:
+            parts = pool.map(compute_partition, range(workers),
+                             [workers] * workers, [top_k] * workers)
+            rows = [row for part in parts for row in part]
+    else:
+        rows = compute_partition(0, 1, top_k)
+
+    with transaction.atomic():
+        # movies deleted since the baskets were read would fail the FK; the
+        # neighbors behind them move up so ranks stay 1..n per movie
+        existing = set(Movie.objects.values_list('id', flat=True))
+        ranks = collections.Counter()
+        neighbors = []
+        for movie_id, neighbor_id, _, score in rows:  # best first per movie
+            if movie_id in existing and neighbor_id in existing:
+                ranks[movie_id] += 1
+                neighbors.append(MovieNeighbor(
+                    movie_id=movie_id, neighbor_id=neighbor_id,
+                    rank=ranks[movie_id], score=score,
+                ))
+        MovieNeighbor.objects.all().delete()
+        MovieNeighbor.objects.bulk_create(neighbors, batch_size=2000)
+    catalog_cache.bump_recommendations()
+    return MovieNeighbor.objects.count()
@@ -0,0 +1,125 @@
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Movie
+
+# SQLite FTS5 index over Movie.name and Movie.description. The virtual table
+# is keyed by rowid == Movie.id, so search hits map straight back to movies.
+FTS_TABLE = "movies_movie_fts"
+
+# Name matches weigh more than description matches when ranking.
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Ordering by relevance keeps this many best matches; other sorts see all.
+MAX_RESULTS = 500
+
+_INSERT_SQL = f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)"
+
+
+def fts_available():
+    return connection.vendor == "sqlite"
+
+
+def _match_query(term):
+    # Every word must match, each as a prefix ("bat" finds "Batman").
+    # Quoting the tokens keeps FTS5 operators in user input inert.
+    tokens = [t.replace('"', '""') for t in term.split()]
+    return " ".join(f'"{t}"*' for t in tokens if t)
+
+
+def index_movie(movie):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [movie.id])
+        cursor.execute(_INSERT_SQL, [movie.id, movie.name, movie.description])
+
+
+def index_movies(movies):
+    """index_movie() for a batch, in two statements (bulk loads skip signals)."""
+    if not fts_available() or not movies:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(m.id,) for m in movies]
+        )
+        cursor.executemany(_INSERT_SQL, [(m.id, m.name, m.description) for m in movies])
+
+
+def remove_movie(movie_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [movie_id])
+
+
+def rebuild_index(batch_size=1000):
+    """
+    Drop every indexed row and re-index the whole catalog. Returns the
+    number of movies indexed.
+    """
+    if not fts_available():
+        return 0
+    count = 0
+    rows = Movie.objects.values_list("id", "name", "description").order_by("id")
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                cursor.executemany(_INSERT_SQL, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(_INSERT_SQL, batch)
+            count += len(batch)
+    return count
+
+
+def search_movie_ids(term, limit=MAX_RESULTS):
+    """
+    Return movie ids matching `term`, best match first. Returns None when no
+    full-text index is available so callers can fall back to a LIKE scan.
+    """
+    if not fts_available():
+        return None
+    query = _match_query(term)
+    if not query:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s",
+            [query, NAME_WEIGHT, DESCRIPTION_WEIGHT, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_movies(qs, term, ranked=True):
+    """
+    Narrow a Movie queryset to full-text matches for `term`. Each movie is
+    annotated with `search_rank` (0 = best match) for callers to order by.
+    Ranking keeps only the MAX_RESULTS best matches; with `ranked=False`
+    every match is kept, filtered in the query itself, and all ranks are 0.
+    """
+    if not fts_available():
+        return qs.filter(name__icontains=term).annotate(search_rank=Value(0))
+    if not ranked:
+        query = _match_query(term)
+        if not query:
+            return qs.none().annotate(search_rank=Value(0))
+        matches = RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [query]
+        )
+        return qs.filter(id__in=matches).annotate(search_rank=Value(0))
+    ids = search_movie_ids(term, MAX_RESULTS)
+    if not ids:
+        return qs.none().annotate(search_rank=Value(0))
+    rank = Case(
+        *[When(id=movie_id, then=pos) for pos, movie_id in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return qs.filter(id__in=ids).annotate(search_rank=rank)
@@ -0,0 +1,80 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache as catalog_cache
+from . import favorites, images, search, tasks, votes
+from .models import Movie, Petition, PetitionVote, Review
+
+
+# -------------------------
+# Full-text search index
+# -------------------------
+@receiver(post_save, sender=Movie)
+def index_movie_on_save(sender, instance, **kwargs):
+    search.index_movie(instance)
+
+
+@receiver(post_delete, sender=Movie)
+def unindex_movie_on_delete(sender, instance, **kwargs):
+    search.remove_movie(instance.id)
+
+
+# -------------------------
+# Catalog cache invalidation
+# -------------------------
+@receiver(post_save, sender=Movie)
+def invalidate_movie(sender, instance, **kwargs):
+    catalog_cache.bump_catalog()
+    catalog_cache.bump_movie(instance.id)
+
+
+@receiver(post_delete, sender=Movie)
+def forget_deleted_movie(sender, instance, **kwargs):
+    catalog_cache.bump_catalog()
+    # its page is a 404 now; a stamp would only answer 304 for it
+    catalog_cache.forget_movie(instance.id)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_movie_reviews(sender, instance, **kwargs):
+    catalog_cache.bump_movie(instance.movie_id)
+
+
+# bulk vote flushes bump the stamp themselves, see movies/votes.py
+@receiver(post_save, sender=Petition)
+@receiver(post_delete, sender=Petition)
+@receiver(post_save, sender=PetitionVote)
+@receiver(post_delete, sender=PetitionVote)
+def invalidate_petitions(sender, instance, **kwargs):
+    catalog_cache.bump_petitions()
+
+
+# the vote view trusts the seen-set and the cached owner, see movies/votes.py
+@receiver(post_delete, sender=PetitionVote)
+def forget_deleted_vote(sender, instance, **kwargs):
+    votes.forget_vote(instance.petition_id, instance.user_id)
+
+
+@receiver(post_delete, sender=Petition)
+def forget_deleted_petition(sender, instance, **kwargs):
+    votes.forget_petition(instance.id)
+
+
+# -------------------------
+# Image renditions
+# -------------------------
+@receiver(post_save, sender=Movie)
+def schedule_image_renditions(sender, instance, raw=False, **kwargs):
+    if not raw and images.needs_renditions(instance):
+        tasks.generate_renditions.delay(instance.id)
+
+
+# -------------------------
+# Favorites
+# -------------------------
+@receiver(user_logged_in)
+def merge_favorites_on_login(sender, request, user, **kwargs):
+    if request is not None:
+        favorites.merge_session_favorites(request, user)
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.mail import mail_managers
+
+from taskqueue.queue import task
+from . import images, recommendations
+from .models import Petition, Review
+
+RECOMMENDATION_WORKERS = getattr(settings, 'RECOMMENDATIONS_WORKERS', 2)
+
+
+@task(max_attempts=3, retry_delay=30)
+def generate_renditions(movie_id):
+    images.generate_renditions(movie_id)
+
+
+@task(max_attempts=5, retry_delay=60)
+def review_reported(review_id, reporter_id):
+    """Tell the moderators (settings.MANAGERS) about a reported review."""
+    review = Review.objects.select_related('movie', 'user').filter(id=review_id).first()
+    if review is None:
+        return
+    mail_managers(
+        f'Review reported on {review.movie.name}',
+        f'Review {review.id} by {review.user.username} was reported by user '
+        f'{reporter_id} and hidden:\n\n{review.comment}',
+    )
+
+
+@task(max_attempts=5, retry_delay=60)
+def petition_created(petition_id):
+    petition = Petition.objects.select_related('created_by').filter(id=petition_id).first()
+    if petition is None:
+        return
+    mail_managers(
+        f'New petition: {petition.title}',
+        f'{petition.created_by.username} asked for:\n\n{petition.description}',
+    )
+
+
+@task(max_attempts=2, retry_delay=600)
+def rebuild_recommendations():
+    recommendations.rebuild(workers=RECOMMENDATION_WORKERS)
@@ -1,3 +1,750 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts import auth
+from cart.models import Item, Order
+from instrumentation import plans
+from . import bulk, favorites, images, recommendations, search, votes
+from . import cache as catalog_cache
+from . import conditional
+from .models import Favorite, Movie, MovieNeighbor, Petition, PetitionVote, Review
+from .pagination import encode_cursor
+from PIL import Image
+
+
+def make_movie(name='Movie', price=10):
+    return make_movie_with_image('movie_images/x.jpg', name, price)
+
+
+def make_movie_with_image(image, name='Movie', price=10):
+    return Movie.objects.create(name=name, price=price, description='desc', image=image)
+
+
+def image_bytes(width=500, height=300, fmt='PNG'):
+    buf = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buf, fmt)
+    return buf.getvalue()
+
+
+class ImageRenditionTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+
+    def _movie(self, content):
+        name = default_storage.save('movie_images/poster.png', ContentFile(content))
+        return make_movie_with_image(name)
+
+    def test_renditions_are_built_and_served(self):
+        movie = self._movie(image_bytes())
+        images.generate_renditions(movie.id)
+        movie.refresh_from_db()
+        self.assertEqual(sorted(movie.image_renditions['widths'], key=int), ['200', '400', '500'])
+        for name in movie.image_renditions['widths'].values():
+            with default_storage.open(name) as f, Image.open(f) as img:
+                self.assertEqual(img.format, 'WEBP')
+        self.assertTrue(movie.image_url(300).endswith('-400.webp'))
+        self.assertTrue(movie.image_url(2000).endswith('-500.webp'))
+        self.assertIn(' 200w', movie.image_srcset)
+        self.assertFalse(images.needs_renditions(movie))
+
+    def test_original_is_served_without_renditions(self):
+        movie = self._movie(image_bytes())
+        self.assertEqual(movie.image_url(200), movie.image.url)
+        self.assertEqual(movie.image_srcset, '')
+        # renditions of a replaced image are ignored
+        images.generate_renditions(movie.id)
+        movie.refresh_from_db()
+        movie.image = default_storage.save('movie_images/new.png', ContentFile(image_bytes()))
+        self.assertEqual(movie.image_card_url, movie.image.url)
+
+    def test_corrupt_image_is_final(self):
+        movie = self._movie(b'not an image')
+        with self.assertLogs('movies.images', 'ERROR'):
+            images.generate_renditions(movie.id)  # logged, not raised
+        movie.refresh_from_db()
+        self.assertEqual(movie.image_renditions, {})
+        self.assertEqual(movie.image_url(200), movie.image.url)
+
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100):
+            with self.assertRaises(images.InvalidImage):
+                images.build_renditions_from_bytes(image_bytes(), 'bomb.png')
+
+    def test_storage_errors_are_raised_for_a_retry(self):
+        movie = self._movie(image_bytes())
+        with mock.patch.object(default_storage, 'save', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                images.generate_renditions(movie.id)
+        movie.refresh_from_db()
+        self.assertEqual(movie.image_renditions, {})
+
+
+class _InlinePool:
+    """Runs Importer's process-pool jobs in this process."""
+
+    def map(self, fn, *iterables, chunksize=1):
+        return map(fn, *iterables)
+
+
+class BulkImportTests(TestCase):
+    def test_new_movies_follow_imported_ids(self):
+        rows = io.StringIO(
+            '{"id": 1000, "name": "Imported", "price": 5, "image": "movie_images/x.jpg"}\n'
+            '{"name": "No id", "price": 5, "image": "movie_images/x.jpg"}\n'
+        )
+        importer = bulk.Importer(workers=0, log=lambda message: None)
+        self.assertEqual(importer.run(bulk.read_rows(rows, 'jsonl')), 2)
+        self.assertEqual(Movie.objects.get(name='Imported').id, 1000)
+        self.assertGreater(Movie.objects.get(name='No id').id, 1000)
+        self.assertGreater(make_movie('After').id, 1000)
+
+    def test_images_are_validated_before_they_are_stored(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        with open(f'{source}/good.png', 'wb') as f:
+            f.write(image_bytes())
+        with open(f'{source}/bad.png', 'wb') as f:
+            f.write(b'not an image')
+
+        name, renditions, error = bulk.prepare_image('bad.png', source)
+        self.assertIsNone(name)
+        self.assertIn('bad.png', error)
+        self.assertFalse(default_storage.exists('movie_images/bad.png'))
+
+        importer = bulk.Importer(workers=0, image_root=source, log=lambda message: None)
+        rows = [
+            bulk._to_movie({'name': 'Good', 'price': 1, 'image': 'good.png'}),
+            bulk._to_movie({'name': 'Bad', 'price': 1, 'image': 'bad.png'}),
+        ]
+        importer._write(rows, _InlinePool())
+        self.assertEqual(list(Movie.objects.values_list('name', flat=True)), ['Good'])
+        self.assertEqual(Movie.objects.get().image.name, 'movie_images/good.png')
+        self.assertEqual(len(importer.errors), 1)
+
+
+class ConstantQueryCountTests(TestCase):
+    """List pages must issue the same number of queries for 2 rows or 20."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('viewer', password='pw')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def _count_queries(self, url):
+        cache.clear()
+        caches[auth.CACHE_ALIAS].clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def _assert_constant(self, url, add_rows):
+        add_rows(2)
+        small = self._count_queries(url)
+        add_rows(18)
+        self.assertEqual(self._count_queries(url), small)
+
+    def test_index(self):
+        self._assert_constant(
+            reverse('movies.index'),
+            lambda n: [make_movie(f'Movie {i}') for i in range(n)],
+        )
+
+    def test_show_reviews(self):
+        movie = make_movie()
+
+        def add_reviews(n):
+            for i in range(n):
+                author = User.objects.create_user(f'author{Review.objects.count()}')
+                Review.objects.create(movie=movie, user=author, comment=f'c{i}')
+
+        self._assert_constant(reverse('movies.show', args=[movie.id]), add_reviews)
+
+    def test_favorites(self):
+        def add_favorites(n):
+            start = Favorite.objects.count()
+            for i in range(n):
+                Favorite.objects.create(user=self.user, movie=make_movie(f'Fav {start + i}'))
+
+        self._assert_constant(reverse('movies.favorites'), add_favorites)
+
+    def test_petitions_list(self):
+        def add_petitions(n):
+            for i in range(n):
+                creator = User.objects.create_user(f'creator{Petition.objects.count()}')
+                petition = Petition.objects.create(title=f'p{i}', created_by=creator)
+                PetitionVote.objects.create(petition=petition, user=self.user)
+
+        self._assert_constant(reverse('movies.petitions_list'), add_petitions)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'query plans are checked on SQLite')
+class IndexUsageTests(TestCase):
+    """No query behind a hot page may fall back to a full table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('viewer', password='pw')
+        author = User.objects.create_user('author')
+        cls.movies = [make_movie(f'Movie {i}', price=i % 7) for i in range(30)]
+        for movie in cls.movies[:3]:
+            Review.objects.create(movie=movie, user=author, comment='c')
+            Review.objects.create(movie=movie, user=author, comment='r', is_reported=True)
+        for i in range(25):
+            petition = Petition.objects.create(title=f'p{i}', created_by=author)
+            PetitionVote.objects.create(petition=petition, user=cls.user)
+        Favorite.objects.bulk_create(Favorite(user=cls.user, movie=m) for m in cls.movies)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _assert_indexed(self, url, page_key=None):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(plans.check_queries(ctx.captured_queries), {}, url)
+        if page_key:
+            # the second page runs the keyset predicate
+            page = response.context['template_data'][page_key]
+            self.assertTrue(page.next_query, url)
+            self._assert_indexed(url.split('?')[0] + '?' + page.next_query)
+
+    def test_index_sorts_and_filters(self):
+        url = reverse('movies.index')
+        for query in ['', '?sort=price_asc', '?sort=price_desc', '?sort=name_asc',
+                      '?sort=name_desc']:
+            with self.subTest(query=query):
+                self._assert_indexed(url + query, 'movies')
+        self._assert_indexed(url + '?max_price=3')
+        self._assert_indexed(url + '?max_price=3&sort=name_asc')
+        self._assert_indexed(url + '?search=movie')
+        self._assert_indexed(url + '?search=movie&sort=price_asc')
+
+    def test_show_reads_visible_reviews_from_partial_index(self):
+        self._assert_indexed(reverse('movies.show', args=[self.movies[0].id]))
+
+    def test_favorites(self):
+        self._assert_indexed(reverse('movies.favorites'), 'movies')
+
+    def test_petitions_list(self):
+        self._assert_indexed(reverse('movies.petitions_list'), 'petitions')
+
+
+@skipUnless(search.fts_available(), 'full-text search needs SQLite FTS5')
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _ids(self, term, **kwargs):
+        qs = search.search_movies(Movie.objects.all(), term, **kwargs)
+        return list(qs.order_by('search_rank', 'id').values_list('id', flat=True))
+
+    def test_words_match_as_prefixes(self):
+        batman = make_movie('Batman Returns')
+        make_movie('Superman')
+        self.assertEqual(self._ids('bat'), [batman.id])
+        self.assertEqual(self._ids('bat ret'), [batman.id])
+        self.assertEqual(self._ids('bat super'), [])
+
+    def test_name_hits_rank_above_description_hits(self):
+        described = Movie.objects.create(
+            name='Metal', price=1, description='a robot story', image='movie_images/x.jpg'
+        )
+        named = make_movie('Robot')
+        self.assertEqual(self._ids('robot'), [named.id, described.id])
+
+    def test_index_follows_save_and_delete(self):
+        movie = make_movie('Alien')
+        movie.name = 'Predator'
+        movie.save()
+        self.assertEqual(self._ids('alien'), [])
+        self.assertEqual(self._ids('predator'), [movie.id])
+        movie.delete()
+        self.assertEqual(self._ids('predator'), [])
+
+    def test_operators_in_input_are_plain_text(self):
+        movie = make_movie('Bat OR Cat')
+        make_movie('Not Near Dog')
+        # operators match as words; quotes, stars and brackets are dropped
+        for term in ['bat OR', 'bat"', 'bat*', '(bat', 'cat)', '"bat or"']:
+            with self.subTest(term=term):
+                self.assertEqual(self._ids(term), [movie.id])
+                self.assertEqual(self._ids(term, ranked=False), [movie.id])
+        for term in ['bat NOT cat', 'cat NEAR bat', 'name:bat', '"', '*', '-']:
+            with self.subTest(term=term):
+                self.assertEqual(self._ids(term), [])
+                self.assertEqual(self._ids(term, ranked=False), [])
+
+    def test_only_relevance_ordering_is_capped(self):
+        movies = [make_movie(f'Robot {i}', price=10 - i) for i in range(3)]
+        url = reverse('movies.index')
+        with mock.patch.object(search, 'MAX_RESULTS', 1):
+            ranked = self.client.get(url, {'search': 'robot'})
+            by_price = self.client.get(url, {'search': 'robot', 'sort': 'price_asc'})
+        self.assertEqual(len(ranked.context['template_data']['movies']), 1)
+        self.assertEqual(
+            [m.id for m in by_price.context['template_data']['movies']],
+            [m.id for m in reversed(movies)],
+        )
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.movies = [make_movie(f'Movie {i}', price=i % 7) for i in range(30)]
+        author = User.objects.create_user('author')
+        for i in range(25):
+            Petition.objects.create(title=f'p{i}', created_by=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def _page(self, url, key, cursor=None):
+        if cursor:
+            url += ('&' if '?' in url else '?') + 'cursor=' + encode_cursor(*cursor)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.context['template_data'][key]
+
+    def test_next_cursor_continues_the_sort(self):
+        url = reverse('movies.index') + '?sort=price_asc'
+        first = self._page(url, 'movies')
+        second = self.client.get(url.split('?')[0] + '?' + first.next_query)
+        rest = second.context['template_data']['movies']
+        seen = [m.id for m in first] + [m.id for m in rest]
+        self.assertEqual(len(seen), len(set(seen)))
+        expected = sorted(self.movies, key=lambda m: (m.price, m.id))
+        self.assertEqual(seen, [m.id for m in expected])
+
+    def test_tampered_cursor_gives_the_first_page(self):
+        index = reverse('movies.index') + '?sort=price_asc'
+        first = [m.id for m in self._page(index, 'movies')]
+        for values in [['abc', 1], [{'a': 1}, 1], [None, 1]]:
+            with self.subTest(values=values):
+                page = self._page(index, 'movies', (values, 'next'))
+                self.assertEqual([m.id for m in page], first)
+
+        petitions = reverse('movies.petitions_list')
+        first = [p.id for p in self._page(petitions, 'petitions')]
+        for values in [[1, 'notadate', 1], [{'a': 1}, '2024-01-01T00:00:00', 1]]:
+            with self.subTest(values=values):
+                page = self._page(petitions, 'petitions', (values, 'next'))
+                self.assertEqual([p.id for p in page], first)
+
+    def test_cursor_of_the_wrong_length_gives_the_first_page(self):
+        url = reverse('movies.index') + '?sort=price_asc'
+        first = [m.id for m in self._page(url, 'movies')]
+        page = self._page(url, 'movies', ([1], 'next'))
+        self.assertEqual([m.id for m in page], first)
+        self.assertFalse(page.prev_query)
+
+
+class FavoriteStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('fan', password='pw')
+        self.movie = make_movie()
+
+    def test_toggle_keeps_count_in_step(self):
+        self.client.force_login(self.user)
+        url = reverse('movies.toggle_favorite', args=[self.movie.id])
+        self.client.get(url)
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.favorite_count, 1)
+        self.assertEqual(favorites.user_ids(self.user.id), {self.movie.id})
+        self.client.get(url)
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.favorite_count, 0)
+        self.assertEqual(favorites.user_ids(self.user.id), set())
+
+    def test_toggle_reports_only_real_changes(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        self.assertIs(favorites.toggle(request, self.movie.id), True)
+        self.assertIs(favorites.toggle(request, self.movie.id), False)
+        favorites.ids_for_request(request)
+        # another request adds it after this one read the favorites
+        Favorite.objects.create(user=self.user, movie=self.movie)
+        self.assertIsNone(favorites.toggle(request, self.movie.id))
+
+    def test_stale_cached_favorites_are_dropped_on_a_noop_toggle(self):
+        self.client.force_login(self.user)
+        url = reverse('movies.toggle_favorite', args=[self.movie.id])
+        favorites.user_ids(self.user.id)
+        # added elsewhere; this process still caches the empty set
+        Favorite.objects.create(user=self.user, movie=self.movie)
+        self.client.get(url)
+        self.assertEqual(favorites.user_ids(self.user.id), {self.movie.id})
+        self.client.get(url)
+        self.assertFalse(Favorite.objects.filter(user=self.user).exists())
+        self.assertEqual(favorites.user_ids(self.user.id), set())
+
+        # and removed elsewhere while the set still holds it
+        Favorite.objects.create(user=self.user, movie=self.movie)
+        cache.delete(favorites._cache_key(self.user.id))
+        favorites.user_ids(self.user.id)
+        Favorite.objects.filter(user=self.user).delete()
+        self.client.get(url)
+        self.client.get(url)
+        self.assertTrue(Favorite.objects.filter(user=self.user).exists())
+
+    def test_anonymous_favorites_keep_the_movie_stamp(self):
+        stamp = catalog_cache.movie_version(self.movie.id)
+        url = reverse('movies.toggle_favorite', args=[self.movie.id])
+        self.client.get(url)
+        self.assertEqual(self.client.session[favorites.FAV_SESSION_KEY], [self.movie.id])
+        self.assertEqual(catalog_cache.movie_version(self.movie.id), stamp)
+
+    def test_login_merges_session_favorites(self):
+        other = make_movie('Other')
+        Favorite.objects.create(user=self.user, movie=other)
+        Movie.objects.filter(id=other.id).update(favorite_count=1)
+        session = self.client.session
+        session[favorites.FAV_SESSION_KEY] = [self.movie.id, other.id]
+        session.save()
+        self.client.login(username='fan', password='pw')
+        self.assertEqual(favorites.user_ids(self.user.id), {self.movie.id, other.id})
+        self.assertEqual(
+            dict(Movie.objects.values_list('id', 'favorite_count')),
+            {self.movie.id: 1, other.id: 1},
+        )
+        self.assertNotIn(favorites.FAV_SESSION_KEY, self.client.session)
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.movies = [make_movie(f'Movie {i}') for i in range(5)]
+
+    def _buy(self, user, *movies):
+        order = Order.objects.create(user=user, total=0)
+        Item.objects.bulk_create(
+            Item(order=order, movie=movie, price=movie.price, quantity=1) for movie in movies
+        )
+
+    def _neighbors(self, rows, movie):
+        return [n for m, n, _, _ in sorted(rows, key=lambda r: (r[0], r[2])) if m == movie.id]
+
+    def test_closest_movies_rank_first(self):
+        a, b, c, d, _ = self.movies
+        for i in range(2):
+            self._buy(User.objects.create_user(f'ab{i}'), a, b)
+        buyer = User.objects.create_user('ac')
+        self._buy(buyer, a)
+        Review.objects.create(movie=c, user=buyer, comment='c')
+        # reported reviews are no signal
+        Review.objects.create(movie=d, user=buyer, comment='r', is_reported=True)
+
+        rows = recommendations.compute_partition(0, 1)
+        self.assertEqual(self._neighbors(rows, a), [b.id, c.id])
+        self.assertEqual(self._neighbors(rows, c), [a.id])
+        self.assertEqual(self._neighbors(rows, d), [])
+        # partitions split the anchors, not the result
+        split = recommendations.compute_partition(0, 2) + recommendations.compute_partition(1, 2)
+        self.assertEqual(sorted(split), sorted(rows))
+
+    def test_large_baskets_are_sampled_not_cut_by_id(self):
+        for i in range(10):
+            self._buy(User.objects.create_user(f'bulk{i}'), *self.movies)
+        with mock.patch.object(recommendations, 'MAX_BASKET', 2):
+            rows = recommendations.compute_partition(0, 1)
+            self.assertEqual(rows, recommendations.compute_partition(0, 1))
+        anchors = {movie_id for movie_id, _, _, _ in rows}
+        self.assertIn(self.movies[-1].id, anchors)
+
+    def test_movie_page_lists_neighbors_by_rank(self):
+        a, b, c, _, _ = self.movies
+        url = reverse('movies.show', args=[a.id])
+        self.assertNotContains(self.client.get(url), 'Customers also bought')
+
+        for i in range(2):
+            self._buy(User.objects.create_user(f'ab{i}'), a, b)
+        self._buy(User.objects.create_user('ac'), a, c)
+        self.assertEqual(recommendations.rebuild(), 4)
+        response = self.client.get(url)
+        self.assertContains(response, 'Customers also bought')
+        self.assertEqual(response.context['template_data']['also_bought'], [b, c])
+
+
+    def test_movies_deleted_during_a_rebuild_leave_no_rank_gaps(self):
+        a, b, c, d, _ = self.movies
+        for i in range(3):
+            self._buy(User.objects.create_user(f'ab{i}'), a, b)
+        for i in range(2):
+            self._buy(User.objects.create_user(f'ac{i}'), a, c)
+        self._buy(User.objects.create_user('ad'), a, d)
+        compute = recommendations.compute_partition
+
+        def compute_then_delete(*args):
+            rows = compute(*args)
+            b.delete()
+            return rows
+
+        with mock.patch.object(recommendations, 'compute_partition', compute_then_delete):
+            recommendations.rebuild()
+        self.assertEqual(
+            list(MovieNeighbor.objects.filter(movie=a).order_by('rank')
+                 .values_list('neighbor_id', 'rank')),
+            [(c.id, 1), (d.id, 2)],
+        )
+        self.assertFalse(MovieNeighbor.objects.filter(movie_id=b.id).exists())
+
+
+class VoteBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user('owner')
+        self.voters = [User.objects.create_user(f'voter{i}') for i in range(3)]
+        self.petition = Petition.objects.create(title='p', created_by=owner)
+
+    def test_flush_writes_batch_and_counts(self):
+        buffer = votes.VoteBuffer(interval=60, batch_size=100, background=False)
+        # already stored, but unknown to the seen-set
+        PetitionVote.objects.create(petition=self.petition, user=self.voters[0])
+        Petition.objects.filter(id=self.petition.id).update(vote_count=1)
+        for voter in self.voters:
+            self.assertTrue(buffer.submit(self.petition.id, voter.id))
+        self.assertFalse(buffer.submit(self.petition.id, self.voters[1].id))
+        self.assertEqual(buffer.pending_for_user(self.voters[1].id), {self.petition.id})
+
+        self.assertEqual(buffer.flush(), 2)
+        self.petition.refresh_from_db()
+        self.assertEqual(self.petition.vote_count, 3)
+        self.assertEqual(self.petition.votes.count(), 3)
+
+    def test_counts_grow_by_the_votes_inserted(self):
+        # drift is left to reconcile_vote_counts; a flush only adds
+        other = Petition.objects.create(title='q', created_by=self.voters[2])
+        PetitionVote.objects.create(petition=self.petition, user=self.voters[0])
+        Petition.objects.filter(id=self.petition.id).update(vote_count=5)
+        added = votes.write_votes(
+            [(self.petition.id, v.id) for v in self.voters[:2]]
+            + [(other.id, v.id) for v in self.voters]
+        )
+        self.assertEqual(added, 4)
+        self.assertEqual(
+            dict(Petition.objects.values_list('id', 'vote_count')),
+            {self.petition.id: 6, other.id: 3},
+        )
+
+
+    def test_deleted_votes_can_be_cast_again(self):
+        buffer = votes.VoteBuffer(interval=0)
+        self.assertTrue(buffer.submit(self.petition.id, self.voters[0].id))
+        self.assertFalse(buffer.submit(self.petition.id, self.voters[0].id))
+        PetitionVote.objects.filter(user=self.voters[0]).delete()
+        self.assertTrue(buffer.submit(self.petition.id, self.voters[0].id))
+        self.assertEqual(self.petition.votes.count(), 1)
+
+
+class PetitionVoteViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch.object(votes, 'buffer', votes.VoteBuffer(interval=0)))
+        self.owner = User.objects.create_user('owner')
+        self.voter = User.objects.create_user('voter')
+        self.petition = Petition.objects.create(title='p', created_by=self.owner)
+        self.url = reverse('movies.petition_vote_yes', args=[self.petition.id])
+
+    def _messages(self, response):
+        return [str(m) for m in response.context['messages']]
+
+    def test_vote_is_recorded_once(self):
+        self.client.force_login(self.voter)
+        response = self.client.post(self.url, follow=True)
+        self.assertRedirects(response, reverse('movies.petitions_list'))
+        self.assertIn("Thanks — your 'Yes' vote was recorded.", self._messages(response))
+        response = self.client.post(self.url, follow=True)
+        self.assertIn("You already voted 'Yes' on this petition.", self._messages(response))
+        self.petition.refresh_from_db()
+        self.assertEqual(self.petition.vote_count, 1)
+        self.assertEqual(self.petition.votes.count(), 1)
+
+    def test_owner_cannot_vote(self):
+        self.client.force_login(self.owner)
+        response = self.client.post(self.url, follow=True)
+        self.assertIn("You cannot vote on your own petition.", self._messages(response))
+        self.assertFalse(PetitionVote.objects.exists())
+
+    def test_unknown_or_deleted_petition_is_a_404(self):
+        self.client.force_login(self.voter)
+        missing = reverse('movies.petition_vote_yes', args=[self.petition.id + 1])
+        self.assertEqual(self.client.post(missing).status_code, 404)
+        # the owner is cached by the first vote attempt
+        self.client.post(self.url)
+        self.petition.delete()
+        self.assertEqual(self.client.post(self.url).status_code, 404)
+
+
+class CatalogCacheTests(TestCase):
+    """Cached pages and fragments follow every write that changes them."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('viewer')
+        self.movie = make_movie('Original', price=11)
+        self.client.force_login(self.user)
+
+    def test_movie_edit_refreshes_index_and_show(self):
+        index = reverse('movies.index')
+        show = reverse('movies.show', args=[self.movie.id])
+        self.assertContains(self.client.get(index), 'Original')
+        self.assertContains(self.client.get(show), '$11')
+        self.movie.name = 'Renamed'
+        self.movie.price = 12
+        self.movie.save()
+        response = self.client.get(index)
+        self.assertContains(response, 'Renamed')
+        self.assertNotContains(response, 'Original')
+        self.assertContains(self.client.get(show), '$12')
+
+    def test_review_refreshes_show(self):
+        url = reverse('movies.show', args=[self.movie.id])
+        self.assertNotContains(self.client.get(url), 'fresh review')
+        Review.objects.create(movie=self.movie, user=self.user, comment='fresh review')
+        self.assertContains(self.client.get(url), 'fresh review')
+
+    def test_recommendation_rebuild_refreshes_show(self):
+        other = make_movie('Bought together')
+        url = reverse('movies.show', args=[self.movie.id])
+        self.assertNotContains(self.client.get(url), 'Bought together')
+        order = Order.objects.create(user=self.user, total=0)
+        Item.objects.bulk_create(
+            Item(order=order, movie=m, price=m.price, quantity=1) for m in (self.movie, other))
+        recommendations.rebuild()
+        self.assertContains(self.client.get(url), 'Bought together')
+
+
+@override_settings(CONDITIONAL_GET=True)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('viewer', password='pw')
+        self.movie = make_movie()
+        self.client.force_login(self.user)
+
+    def _revalidate(self, url):
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return response, ctx.captured_queries
+
+    def test_repeat_visit_is_answered_from_stamps(self):
+        for url in [reverse('movies.index'), reverse('movies.show', args=[self.movie.id]),
+                    reverse('movies.petitions_list')]:
+            with self.subTest(url=url):
+                response, queries = self._revalidate(url)
+                self.assertEqual(response.status_code, 304)
+                self.assertIn('ETag', response)
+                self.assertFalse([q for q in queries if 'movies_' in q['sql']])
+
+    def test_writes_change_the_validators(self):
+        url = reverse('movies.show', args=[self.movie.id])
+        etag = self.client.get(url)['ETag']
+        Review.objects.create(movie=self.movie, user=self.user, comment='c')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        url = reverse('movies.petitions_list')
+        etag = self.client.get(url)['ETag']
+        petition = Petition.objects.create(title='p', created_by=User.objects.create_user('o'))
+        etag_after_create = self.client.get(url)['ETag']
+        self.assertNotEqual(etag, etag_after_create)
+        votes.write_votes([(petition.id, self.user.id)])
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag_after_create).status_code, 200)
+
+    def test_message_queued_by_the_request_is_not_a_304(self):
+        url = reverse('movies.index') + '?max_price=abc'
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Invalid max price.')
+
+    def test_unknown_movie_is_a_404_without_a_stamp(self):
+        url = reverse('movies.show', args=[self.movie.id + 1000])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+        self.assertIsNone(cache.get(catalog_cache._movie_version_key(self.movie.id + 1000)))
+
+        url = reverse('movies.show', args=[self.movie.id])
+        self.client.get(url)
+        self.movie.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+    def test_changed_neighbor_refreshes_the_detail_page(self):
+        neighbor = make_movie('Neighbor')
+        MovieNeighbor.objects.create(movie=self.movie, neighbor=neighbor, rank=1, score=1)
+        url = reverse('movies.show', args=[self.movie.id])
+        etag = self.client.get(url)['ETag']
+        neighbor.name = 'Renamed'
+        neighbor.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Renamed')
+
+    @override_settings(CONDITIONAL_GET=False)
+    def test_off_without_a_shared_cache(self):
+        url = reverse('movies.index')
+        response = self.client.get(url)
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 200)
+
+    def test_per_process_stamps_are_flagged(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual(
+                [w.id for w in conditional.check_stamp_cache(None)], ['moviesstore.W002'],
+            )
+        with override_settings(CACHES=redis):
+            self.assertEqual(conditional.check_stamp_cache(None), [])
+
+    def test_reconciled_vote_counts_change_the_petitions_list(self):
+        petition = Petition.objects.create(title='p', created_by=self.user)
+        Petition.objects.filter(id=petition.id).update(vote_count=9)
+        url = reverse('movies.petitions_list')
+        etag = self.client.get(url)['ETag']
+        call_command('reconcile_vote_counts', stdout=io.StringIO())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_import_refreshes_upserted_detail_pages(self):
+        url = reverse('movies.show', args=[self.movie.id])
+        etag = self.client.get(url)['ETag']
+        rows = io.StringIO(
+            f'{{"id": {self.movie.id}, "name": "Movie", "price": 99, '
+            f'"image": "{self.movie.image.name}"}}\n'
+        )
+        importer = bulk.Importer(workers=0, log=lambda message: None)
+        self.assertEqual(importer.run(bulk.read_rows(rows, 'jsonl')), 1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '99')
+
+    def test_validators_are_per_visitor(self):
+        url = reverse('movies.index')
+        etag = self.client.get(url)['ETag']
+        request = RequestFactory().get(url)
+        request.user = self.user
+        favorites.add(request, self.movie.id)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        other = User.objects.create_user('other')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
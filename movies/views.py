@@ -1,39 +1,44 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Movie, Review, Petition, PetitionVote
+from .models import Movie, MovieNeighbor, Review, Petition, PetitionVote
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.contrib import messages
-from django.db.models import Count
+from . import conditional, search, tasks, votes
+from . import cache as catalog_cache
+from . import favorites as fav_store
+from .pagination import apaginate
 
 
 
 # -------------------------
-# Favorites (session-based)
+# Favorites (see movies/favorites.py)
 # -------------------------
-FAV_SESSION_KEY = "favorite_movie_ids"
+async def _aget_fav_ids(request):
+    return await sync_to_async(fav_store.ids_for_request)(request)
 
-def _get_fav_ids(request):
-    return set(request.session.get(FAV_SESSION_KEY, []))
-
-def _save_fav_ids(request, ids):
-    request.session[FAV_SESSION_KEY] = list(ids)
-    request.session.modified = True
+async def _aload_user(request):
+    # Resolve the lazy user up front (and pin it on request.user) so that
+    # rendering templates never hits the database from the event loop.
+    request.user = await request.auser()
+    return request.user
 
 def toggle_favorite(request, id):
     movie = get_object_or_404(Movie, id=id)
-    favs = _get_fav_ids(request)
-    if id in favs:
-        favs.remove(id)
-        messages.info(request, f'Removed “{movie.name}” from favorites.')
-    else:
-        favs.add(id)
+    added = fav_store.toggle(request, id)
+    if added:
         messages.success(request, f'Added “{movie.name}” to favorites.')
-    _save_fav_ids(request, favs)
+    elif added is False:
+        messages.info(request, f'Removed “{movie.name}” from favorites.')
     return redirect(request.META.get("HTTP_REFERER") or "movies.index")
 
-def favorites(request):
-    fav_ids = _get_fav_ids(request)
-    movies = Movie.objects.filter(id__in=fav_ids).order_by("name")
+async def favorites(request):
+    await _aload_user(request)
+    fav_ids = await _aget_fav_ids(request)
+    movies = await apaginate(
+        request, Movie.objects.for_listing().filter(id__in=fav_ids), ["name"]
+    )
     template_data = {
         "title": "My Favorites",
         "movies": movies,
@@ -45,17 +50,16 @@ def favorites(request):
 # -------------------------
 # Movies list / filters
 # -------------------------
-def index(request):
+async def index(request):
+    await _aload_user(request)
     search_term = request.GET.get('search')
     sort = request.GET.get('sort')
     max_price = request.GET.get('max_price')
 
-    qs = Movie.objects.all()
-    if search_term:
-        qs = qs.filter(name__icontains=search_term)
+    price_limit = None
     if max_price:
         try:
-            qs = qs.filter(price__lte=int(max_price))
+            price_limit = int(max_price)
         except (TypeError, ValueError):
             messages.error(request, "Invalid max price.")
 
@@ -66,32 +70,92 @@ def index(request):
         'name_desc': '-name',
     }
     if sort in sort_map:
-        qs = qs.order_by(sort_map[sort])
+        ordering = [sort_map[sort]]
+    elif search_term:
+        ordering = ['search_rank']
+    else:
+        ordering = ['id']
+
+    async def build_page():
+        qs = Movie.objects.for_listing()
+        if search_term:
+            # ranked FTS5 lookup instead of a LIKE '%term%' table scan
+            qs = await sync_to_async(search.search_movies)(
+                qs, search_term, ranked=ordering == ['search_rank']
+            )
+        if price_limit is not None:
+            qs = qs.filter(price__lte=price_limit)
+        return await apaginate(request, qs, ordering)
+
+    # the page of movies is shared by every visitor with the same query
+    version = await catalog_cache.acatalog_version()
+    validators = await conditional.afor_page(request, 'index', version)
+    not_modified = validators.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+    key = catalog_cache.make_key('index', version, sorted(request.GET.lists()))
 
     template_data = {
         'title': 'Movies',
-        'movies': qs,
+        'movies': await catalog_cache.aget_or_build(key, build_page),
+        'catalog_version': version,
         'search_term': search_term or '',
         'sort': sort or '',
         'max_price': max_price or '',
-        'fav_ids': _get_fav_ids(request),
+        'fav_ids': await _aget_fav_ids(request),
     }
-    return render(request, 'movies/index.html', {'template_data': template_data})
+    return validators.apply(
+        render(request, 'movies/index.html', {'template_data': template_data})
+    )
 
 
 # -------------------------
 # Movie detail + reviews
 # -------------------------
-def show(request, id):
-    movie = get_object_or_404(Movie, id=id)
-    # Hide reported reviews from everyone
-    reviews = Review.objects.filter(movie=movie, is_reported=False)
+async def show(request, id):
+    await _aload_user(request)
+
+    async def build_detail():
+        try:
+            movie = await Movie.objects.aget(id=id)
+        except Movie.DoesNotExist:
+            raise Http404('No Movie matches the given query.')
+        # Hide reported reviews from everyone
+        reviews = [
+            review async for review in
+            Review.objects.visible().for_display().filter(movie=movie)
+        ]
+        # precomputed nightly, see movies/recommendations.py
+        also_bought = [
+            n.neighbor async for n in MovieNeighbor.objects.for_display(movie.id)
+        ]
+        return movie, reviews, also_bought
+
+    # unknown ids are a 404 before any validator, and get no stamp
+    version = await catalog_cache.aknown_movie_version(id)
+    if version is None:
+        raise Http404('No Movie matches the given query.')
+    recommendations = await catalog_cache.arecommendations_version()
+    # the "also bought" cards show other movies, which bump only the catalog
+    catalog = await catalog_cache.acatalog_version()
+    validators = await conditional.afor_page(
+        request, 'show', version, recommendations, catalog
+    )
+    not_modified = validators.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+    key = catalog_cache.make_key('show', version, id, recommendations, catalog)
+    movie, reviews, also_bought = await catalog_cache.aget_or_build(key, build_detail)
     template_data = {
         'title': movie.name,
         'movie': movie,
         'reviews': reviews,
+        'also_bought': also_bought,
+        'movie_version': version,
     }
-    return render(request, 'movies/show.html', {'template_data': template_data})
+    return validators.apply(
+        render(request, 'movies/show.html', {'template_data': template_data})
+    )
 
 
 @login_required
@@ -154,34 +218,49 @@ def report_review(request, id, review_id):
     if not getattr(review, 'is_reported', False):
         review.is_reported = True
         review.save(update_fields=['is_reported'])
+        # moderator notification happens in a worker, after commit
+        tasks.review_reported.delay(review.id, request.user.id)
         messages.success(request, "Thanks — the review was reported and removed.")
     else:
         messages.info(request, "This review has already been reported.")
 
     return redirect('movies.show', id=id)
 
-def petitions_list(request):
-    # annotate each petition with its yes-vote count, then sort highest first
-    petitions = (
-        Petition.objects
-        .annotate(num_votes=Count('votes'))
-        .order_by('-num_votes', '-created_at')
+async def petitions_list(request):
+    user = await _aload_user(request)
+    validators = await conditional.afor_page(
+        request, 'petitions', await catalog_cache.apetitions_version()
+    )
+    not_modified = validators.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+    # sort by the stored yes-vote count, highest first
+    petitions = await apaginate(
+        request,
+        Petition.objects.for_listing(),
+        ['-vote_count', '-created_at'],
+        page_size=20,
     )
 
     voted_ids = set()
-    if request.user.is_authenticated:
-        voted_ids = set(
+    if user.is_authenticated:
+        voted_ids = {
+            petition_id async for petition_id in
             PetitionVote.objects
-            .filter(user=request.user)
+            .filter(user=user)
             .values_list("petition_id", flat=True)
-        )
+        }
+        # votes not yet flushed to the database
+        voted_ids |= votes.buffer.pending_for_user(user.id)
 
     template_data = {
         "title": "Petitions",
         "petitions": petitions,
         "voted_ids": voted_ids,
     }
-    return render(request, "movies/petitions_list.html", {"template_data": template_data})
+    return validators.apply(
+        render(request, "movies/petitions_list.html", {"template_data": template_data})
+    )
 
 
 
@@ -199,11 +278,12 @@ def petitions_create(request):
         messages.error(request, "Title is required.")
         return redirect("movies.petitions_create")
 
-    Petition.objects.create(
+    petition = Petition.objects.create(
         title=title,
         description=description,
         created_by=request.user,
     )
+    tasks.petition_created.delay(petition.id)
     messages.success(request, "Your petition was created.")
     return redirect("movies.petitions_list")
 
@@ -211,17 +291,17 @@ def petitions_create(request):
 @login_required
 @require_POST
 def petition_vote_yes(request, id):
-    petition = get_object_or_404(Petition, id=id)
+    # no write transaction here: see movies/votes.py
+    owner_id = votes.petition_owner(id)
+    if owner_id is None:
+        raise Http404("No Petition matches the given query.")
 
     # optional: disallow self-vote
-    if petition.created_by_id == request.user.id:
+    if owner_id == request.user.id:
         messages.error(request, "You cannot vote on your own petition.")
         return redirect("movies.petitions_list")
 
-    obj, created = PetitionVote.objects.get_or_create(
-        petition=petition, user=request.user
-    )
-    if created:
+    if votes.submit(id, request.user.id):
         messages.success(request, "Thanks — your 'Yes' vote was recorded.")
     else:
         messages.info(request, "You already voted 'Yes' on this petition.")
@@ -0,0 +1,198 @@
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from . import cache as catalog_cache
+from .models import Petition, PetitionVote
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Petition vote ingestion
+# -------------------------
+# A vote costs no write transaction in the request. Duplicates are turned
+# away by cache.add() on a per-(petition, user) key, an atomic "seen" set
+# shared by every process using the cache (deleting a vote clears its key,
+# see movies/signals.py). New votes go into this process's buffer, and a
+# background thread writes the buffer every PETITION_VOTE_FLUSH_INTERVAL
+# seconds (or as soon as it holds PETITION_VOTE_BATCH_SIZE votes) with one
+# bulk insert and an UPDATE that adds each petition's new votes to its
+# count. Votes the cache forgot are
+# found by one lookup on the unique (petition, user) index and skipped;
+# the constraint stays the final arbiter, and `manage.py
+# reconcile_vote_counts` recounts whatever drift remains.
+#
+# Votes buffered when a process dies without reaching atexit are lost,
+# and vote counts lag by up to one interval. An interval of 0 writes each
+# vote in the request, as before.
+
+FLUSH_INTERVAL = getattr(settings, 'PETITION_VOTE_FLUSH_INTERVAL', 1.0)
+BATCH_SIZE = getattr(settings, 'PETITION_VOTE_BATCH_SIZE', 500)
+SEEN_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _seen_key(petition_id, user_id):
+    return f'movies:petition:{petition_id}:voter:{user_id}'
+
+
+def _owner_key(petition_id):
+    return f'movies:petition:{petition_id}:owner'
+
+
+def petition_owner(petition_id):
+    """created_by id of the petition, or None if it does not exist."""
+    owner_id = cache.get(_owner_key(petition_id))
+    if owner_id is None:
+        owner_id = (
+            Petition.objects.filter(id=petition_id)
+            .values_list('created_by_id', flat=True).first()
+        )
+        if owner_id is not None:
+            # a petition never changes hands
+            cache.set(_owner_key(petition_id), owner_id, SEEN_TIMEOUT)
+    return owner_id
+
+
+def forget_vote(petition_id, user_id):
+    """Drop a deleted vote from the seen-set so the user can vote again."""
+    cache.delete(_seen_key(petition_id, user_id))
+
+
+def forget_petition(petition_id):
+    cache.delete(_owner_key(petition_id))
+
+
+def write_votes(pairs):
+    """
+    Insert (petition_id, user_id) votes and add them to their petitions'
+    counts in one transaction. Returns the number of votes actually added.
+    """
+    pairs = set(pairs)
+    petition_ids = {p for p, _ in pairs}
+    user_ids = {u for _, u in pairs}
+    with transaction.atomic():
+        # petitions or users deleted since the vote would fail the FK; the
+        # petition rows stay locked so concurrent flushes see each other's
+        # votes below
+        live_petitions = set(
+            Petition.objects.select_for_update().filter(id__in=petition_ids)
+            .values_list('id', flat=True)
+        )
+        live_users = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        # votes the seen-set forgot about are already stored; one lookup on
+        # the unique (petition, user) index, sized by the batch
+        stored = set(
+            PetitionVote.objects
+            .filter(petition_id__in=live_petitions, user_id__in=live_users)
+            .values_list('petition_id', 'user_id')
+        )
+        new = [
+            (p, u) for p, u in pairs
+            if p in live_petitions and u in live_users and (p, u) not in stored
+        ]
+        PetitionVote.objects.bulk_create(
+            [PetitionVote(petition_id=p, user_id=u) for p, u in new],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+        # one UPDATE per distinct increment, usually one or two
+        by_petition = Counter(p for p, _ in new)
+        by_increment = defaultdict(list)
+        for petition_id, n in by_petition.items():
+            by_increment[n].append(petition_id)
+        for n, ids in by_increment.items():
+            Petition.objects.filter(id__in=ids).update(vote_count=F('vote_count') + n)
+    if new:
+        catalog_cache.bump_petitions()
+    return len(new)
+
+
+class VoteBuffer:
+    def __init__(self, interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE, background=True):
+        """With `background` False no flusher thread starts; call flush()."""
+        self.interval = interval
+        self.batch_size = batch_size
+        self.background = background
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def submit(self, petition_id, user_id):
+        """Queue a vote. Returns False if this user already voted."""
+        if not cache.add(_seen_key(petition_id, user_id), 1, SEEN_TIMEOUT):
+            return False
+        # the voter's page shows the vote before it is flushed
+        catalog_cache.bump_visitor(user_id)
+        if self.interval <= 0:
+            try:
+                write_votes([(petition_id, user_id)])
+            except Exception:
+                cache.delete(_seen_key(petition_id, user_id))  # let them retry
+                raise
+            return True
+        with self._lock:
+            self._pending.append((petition_id, user_id))
+            full = len(self._pending) >= self.batch_size
+            if self.background and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='petition-vote-flusher', daemon=True,
+                )
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+        return True
+
+    def pending_for_user(self, user_id):
+        """Petition ids this user has votes waiting in this process's buffer."""
+        with self._lock:
+            return {p for p, u in self._pending if u == user_id}
+
+    def flush(self):
+        """Write everything buffered so far. Returns the votes added."""
+        # one flush at a time per process, so they queue here rather than
+        # on the database lock, and a caller's flush waits for one in flight
+        with self._flush_lock:
+            with self._lock:
+                pairs, self._pending = self._pending, []
+            if not pairs:
+                return 0
+            try:
+                return write_votes(pairs)
+            except Exception:
+                with self._lock:
+                    self._pending[:0] = pairs  # retried next interval
+                raise
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Could not write buffered petition votes')
+            finally:
+                close_old_connections()
+
+
+buffer = VoteBuffer()
+
+
+def submit(petition_id, user_id):
+    return buffer.submit(petition_id, user_id)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        buffer.flush()
+    except Exception:
+        logger.exception('Lost buffered petition votes at exit')
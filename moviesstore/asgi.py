@@ -3,6 +3,18 @@ ASGI config for moviesstore project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The catalog, detail, favorites, petitions and cart pages are async views,
+so under an ASGI server they run on the event loop without a thread-pool
+hop. Run it with any ASGI server, for example:
+
+    uvicorn moviesstore.asgi:application --workers 4
+
+With more than one worker, point the default cache at Redis or Memcached;
+catalog invalidation, cached sessions and conditional GETs rely on it.
+
+CONN_MAX_AGE is 0 under ASGI unless DATABASE_CONN_MAX_AGE says otherwise;
+connections are per async context, so persistent ones would pile up.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
@@ -12,5 +24,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moviesstore.settings')
+os.environ.setdefault('DATABASE_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
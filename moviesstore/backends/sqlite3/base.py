@@ -0,0 +1,29 @@
+from django.db.backends.sqlite3 import base
+
+# -------------------------
+# Tuned SQLite backend
+# -------------------------
+# The stock backend with two additions, both read from OPTIONS:
+#   "pragmas": run on every new connection (WAL, synchronous, cache...)
+#   "transaction_mode": "IMMEDIATE" takes the write lock at BEGIN, so a
+#       transaction that reads and then writes waits on busy_timeout
+#       instead of failing with "database is locked" when it upgrades.
+# Django 5.1 has transaction_mode built in; pragmas stay ours.
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
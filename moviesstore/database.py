@@ -0,0 +1,108 @@
+"""
+Database profiles for moviesstore.settings.
+
+DATABASE_BACKEND picks one:
+
+  sqlite (default)  db.sqlite3 through moviesstore.backends.sqlite3 with a
+                    busy timeout, mmap, a larger page cache and IMMEDIATE
+                    write transactions. SQLITE_WAL=1 also switches the file
+                    to WAL with synchronous=NORMAL; journal_mode is stored
+                    in the file itself, so it is opt-in rather than applied
+                    to the checked-in db.sqlite3 on every run.
+  postgres          PostgreSQL via psycopg. On Django 5.1+ connections come
+                    from psycopg's pool; on 5.0 they are health-checked.
+                    Set POSTGRES_PGBOUNCER=1 when a transaction-mode
+                    PgBouncer sits in front instead.
+
+Connections are kept for DATABASE_CONN_MAX_AGE seconds (default 60) and
+health-checked before reuse, so a WSGI worker thread skips the
+per-connection PRAGMAs and handshakes. moviesstore/asgi.py defaults it to
+0: under ASGI every request runs its database work on a fresh executor
+thread, so a persistent connection would be left behind per thread.
+
+A throwaway PostgreSQL for local runs:
+
+    docker run --rm -d -p 5432:5432 -e POSTGRES_PASSWORD=postgres postgres:16
+    pip install "psycopg[binary,pool]"
+    DATABASE_BACKEND=postgres POSTGRES_PASSWORD=postgres python manage.py migrate
+    DATABASE_BACKEND=postgres POSTGRES_PASSWORD=postgres python manage.py bench_writes
+"""
+import os
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _env_bool(name):
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+CONN_MAX_AGE = 60
+
+
+def sqlite(path):
+    config = {
+        'ENGINE': 'moviesstore.backends.sqlite3',
+        'NAME': os.environ.get('SQLITE_PATH', path),
+        # the PRAGMAs run once per connection
+        'CONN_MAX_AGE': _env_int('DATABASE_CONN_MAX_AGE', CONN_MAX_AGE),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # seconds to wait for the write lock (sqlite3's busy handler)
+            'timeout': _env_int('SQLITE_BUSY_TIMEOUT', 20),
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT', 20) * 1000,
+                'mmap_size': _env_int('SQLITE_MMAP_SIZE', 128 * 1024 * 1024),
+                # negative = KiB, so 64 MiB of page cache per connection
+                'cache_size': -_env_int('SQLITE_CACHE_KB', 64 * 1024),
+                'temp_store': 'MEMORY',
+            },
+        },
+    }
+    if _env_bool('SQLITE_WAL'):
+        # WAL readers never block the single writer; NORMAL is durable
+        # enough there (only a power loss can drop the last commits)
+        config['OPTIONS']['pragmas'].update(journal_mode='WAL', synchronous='NORMAL')
+    return config
+
+
+def postgres():
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'moviesstore'),
+        'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if _env_bool('POSTGRES_PGBOUNCER'):
+        # transaction pooling hands each transaction a different server
+        # connection, so named cursors and persistent state cannot be used
+        config['CONN_MAX_AGE'] = 0
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    elif django.VERSION >= (5, 1):
+        config['CONN_MAX_AGE'] = 0  # the pool owns connection lifetime
+        config['OPTIONS']['pool'] = {
+            'min_size': _env_int('POSTGRES_POOL_MIN', 2),
+            'max_size': _env_int('POSTGRES_POOL_MAX', 10),
+            'timeout': _env_int('POSTGRES_POOL_TIMEOUT', 10),
+        }
+    else:
+        config['CONN_MAX_AGE'] = _env_int('DATABASE_CONN_MAX_AGE', CONN_MAX_AGE)
+    return config
+
+
+def from_environment(base_dir):
+    backend = os.environ.get('DATABASE_BACKEND', 'sqlite')
+    if backend == 'sqlite':
+        return sqlite(base_dir / 'db.sqlite3')
+    if backend == 'postgres':
+        return postgres()
+    raise ImproperlyConfigured(f'Unknown DATABASE_BACKEND {backend!r}.')
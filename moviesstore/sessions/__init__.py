@@ -0,0 +1,76 @@
+"""
+Session profiles for moviesstore.settings.
+
+SESSION_BACKEND picks where sessions live:
+
+  cached_db            Written to the database and to the cache; reads are
+                       served from the cache and fall back to the table.
+                       The default when the session cache is shared by
+                       every process (Redis, Memcached, ...).
+  cache                Cache only: no session queries at all, but a session
+                       is gone when the cache evicts it or restarts. Needs a
+                       shared cache as well.
+  db                   The django_session table alone. The default with a
+                       per-process cache (locmem), where a worker would
+                       keep serving its cached copy of a session after
+                       another worker changed it.
+
+`manage.py check` warns when a cache-backed engine is chosen over a
+per-process cache.
+
+Each engine saves nothing when a request leaves the session as it found
+it, and every profile stores sessions with the compact serializer in
+moviesstore.sessions.serializers. Expired rows are removed with
+`manage.py purge_sessions`.
+"""
+import os
+
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+
+ENGINES = {
+    'cached_db': 'moviesstore.sessions.cached_db',
+    'cache': 'moviesstore.sessions.cache',
+    'db': 'moviesstore.sessions.db',
+}
+SERIALIZER = 'moviesstore.sessions.serializers.CompactJSONSerializer'
+
+
+# caches that every process holds a private copy of
+PER_PROCESS_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def is_shared(cache_config):
+    """Whether every process reads and writes the same cache."""
+    return cache_config.get('BACKEND') not in PER_PROCESS_CACHES
+
+
+def engine_from_environment(caches, alias='default'):
+    """The engine named by SESSION_BACKEND, by default the best fit for `caches`."""
+    default = 'cached_db' if is_shared(caches.get(alias, {})) else 'db'
+    backend = os.environ.get('SESSION_BACKEND', default)
+    try:
+        return ENGINES[backend]
+    except KeyError:
+        raise ImproperlyConfigured(f'Unknown SESSION_BACKEND {backend!r}.')
+
+
+@checks.register(checks.Tags.caches)
+def check_session_cache(app_configs, **kwargs):
+    from django.conf import settings
+
+    if settings.SESSION_ENGINE not in (ENGINES['cached_db'], ENGINES['cache']):
+        return []
+    alias = settings.SESSION_CACHE_ALIAS
+    if is_shared(settings.CACHES.get(alias, {})):
+        return []
+    return [checks.Warning(
+        f'{settings.SESSION_ENGINE} keeps sessions in the per-process cache {alias!r}.',
+        hint='With several worker processes, sessions changed by one are served '
+             'stale by the others. Point the cache at Redis or Memcached, or '
+             'set SESSION_BACKEND=db.',
+        id='moviesstore.W001',
+    )]
@@ -0,0 +1,22 @@
+import copy
+
+
+class SkipUnchangedMixin:
+    """
+    SessionMiddleware saves whenever a view assigned to the session, even
+    if the value is the one already stored. Remember what was loaded and
+    make save() a no-op while the session key and data still match it.
+    """
+
+    _loaded = None
+
+    def load(self):
+        data = super().load()
+        self._loaded = (self.session_key, copy.deepcopy(data))
+        return data
+
+    def save(self, must_create=False):
+        if not must_create and self._loaded == (self.session_key, self._session):
+            return
+        super().save(must_create=must_create)
+        self._loaded = (self.session_key, copy.deepcopy(self._session))
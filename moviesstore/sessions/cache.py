@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import cache
+
+from .base import SkipUnchangedMixin
+
+
+class SessionStore(SkipUnchangedMixin, cache.SessionStore):
+    pass
@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import db
+
+from .base import SkipUnchangedMixin
+
+
+class SessionStore(SkipUnchangedMixin, db.SessionStore):
+    pass
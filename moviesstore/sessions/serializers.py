@@ -0,0 +1,80 @@
+import json
+
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+
+from cart.store import CART_SESSION_KEY
+from movies.favorites import FAV_SESSION_KEY
+
+# the keys this project writes, stored under one-letter aliases
+ALIASES = {
+    SESSION_KEY: 'u',
+    BACKEND_SESSION_KEY: 'b',
+    HASH_SESSION_KEY: 'h',
+    CART_SESSION_KEY: 'c',
+    FAV_SESSION_KEY: 'f',
+    '_session_expiry': 'x',
+}
+_KEYS = {alias: key for key, alias in ALIASES.items()}
+
+
+def pack_ids(ids):
+    """Sorted ids as base-36 gaps: [1001, 1005, 1010] -> 'rt.4.5'."""
+    out, previous = [], 0
+    for movie_id in sorted(set(ids)):
+        out.append(_base36(movie_id - previous))
+        previous = movie_id
+    return '.'.join(out)
+
+
+def unpack_ids(packed):
+    ids, total = [], 0
+    for gap in packed.split('.') if packed else []:
+        total += int(gap, 36)
+        ids.append(total)
+    return ids
+
+
+def _base36(n):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    out = ''
+    while True:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+        if not n:
+            return out
+
+
+class CompactJSONSerializer:
+    """
+    Django's JSON session serializer with shorter payloads: known keys are
+    stored as [{alias: value}, {other key: value}] and the anonymous
+    favorites list as base-36 gaps. Sessions written by JSONSerializer (a
+    plain object) still load, so switching needs no migration.
+    """
+
+    def dumps(self, obj):
+        known, other = {}, {}
+        for key, value in obj.items():
+            alias = ALIASES.get(key)
+            if alias is None:
+                other[key] = value
+                continue
+            if key == FAV_SESSION_KEY and all(isinstance(i, int) and i > 0 for i in value):
+                value = pack_ids(value)
+            known[alias] = value
+        payload = [known, other] if other else [known]
+        return json.dumps(payload, separators=(',', ':')).encode('latin-1')
+
+    def loads(self, data):
+        payload = json.loads(data.decode('latin-1'))
+        if isinstance(payload, dict):
+            return payload
+        obj = {}
+        for alias, value in payload[0].items():
+            key = _KEYS[alias]
+            if key == FAV_SESSION_KEY and isinstance(value, str):
+                value = unpack_ids(value)
+            obj[key] = value
+        if len(payload) > 1:
+            obj.update(payload[1])
+        return obj
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 import os
 from pathlib import Path
 
+from . import database, sessions
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,9 +44,15 @@ INSTALLED_APPS = [
     'movies',
     'accounts',
     'cart',
+    'analytics',
+    'benchmarks',
+    'instrumentation',
+    'exports',
+    'taskqueue',
 ]
 
 MIDDLEWARE = [
+    'instrumentation.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,7 +66,7 @@ ROOT_URLCONF = 'moviesstore.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'instrumentation.templates_backend.InstrumentedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'moviesstore/templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,12 +86,89 @@ WSGI_APPLICATION = 'moviesstore.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Tuned SQLite by default; DATABASE_BACKEND=postgres switches to pooled
+# PostgreSQL. See moviesstore/database.py for the profiles and their knobs.
+
 DATABASES = {
+    'default': database.from_environment(BASE_DIR),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Per-process memory cache; point this at Redis or Memcached when running
+# several worker processes so catalog invalidation is shared.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'moviesstore',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # always per process: signed-in users for accounts.auth.CachedModelBackend
+    'auth_users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'moviesstore-auth-users',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+CATALOG_CACHE_TIMEOUT = 60 * 10
+
+# Answer conditional GETs from the catalog version stamps (movies/conditional.py).
+# Only with a shared cache: a per-process stamp is not bumped by writes in
+# other workers, which would keep answering 304 for stale pages.
+CONDITIONAL_GET = sessions.is_shared(CACHES['default'])
+
+
+# Sessions
+# https://docs.djangoproject.com/en/5.0/topics/http/sessions/
+# Database-backed while the default cache is per process, cached_db once
+# it is shared; SESSION_BACKEND=cached_db, cache or db overrides. See
+# moviesstore/sessions/__init__.py for the modes.
+
+SESSION_ENGINE = sessions.engine_from_environment(CACHES)
+SESSION_SERIALIZER = sessions.SERIALIZER
+
+
+# Request instrumentation, see instrumentation/recorder.py. Requests running
+# more queries than the budget are logged as warnings.
+
+INSTRUMENTATION_BUFFER_SIZE = 1000
+INSTRUMENTATION_QUERY_BUDGET = 20
+
+
+# Authentication
+# See accounts/auth.py. Signed-in users are cached per process instead of
+# read on every request; password hashing for login and signup runs in a
+# bounded thread pool. The first PASSWORD_HASHERS entry hashes new
+# passwords, the others still verify old hashes, and any hash not made by
+# the first one (or with other PBKDF2 iterations) is redone at login.
+# ModelBackend stays listed so sessions that logged in through it remain
+# valid; new logins go through CachedModelBackend.
+
+AUTHENTICATION_BACKENDS = [
+    'accounts.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_ALIAS = 'auth_users'
+AUTH_USER_CACHE_TIMEOUT = 60
+
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'accounts.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',  # needs argon2-cffi
 }
+_preferred = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[_preferred]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != _preferred
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+# 0 keeps Django's default work factor; lower values are raised to it
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 0))
+
+# 0 hashes on the request's own thread
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+LOGIN_HASH_QUEUE = 32
 
 
 # Password validation
@@ -132,4 +217,31 @@ STATICFILES_DIRS = [
 ]
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-MEDIA_URL = '/media/'
\ No newline at end of file
+MEDIA_URL = '/media/'
+
+# Cart pricing rules applied on top of line totals, see cart/pricing.py
+CART_PRICING_RULES = []
+
+# Resized WebP renditions of movie images, see movies/images.py. Files under
+# media/movie_images/renditions/ are content-hashed and safe to serve with a
+# far-future Cache-Control header.
+MOVIE_IMAGE_WIDTHS = [200, 400, 800]
+
+# Background tasks, see taskqueue/queue.py. Run `manage.py run_workers`
+# alongside the web server; TASKS_RUN_INLINE runs tasks in the request
+# process right after commit instead. TASKS_PERIODIC maps task names to
+# the seconds between runs.
+TASKS_RUN_INLINE = False
+TASKS_PERIODIC = {
+    'analytics.tasks.rollup_recent': 60 * 60,
+    'movies.tasks.rebuild_recommendations': 24 * 60 * 60,
+}
+
+# "Customers also bought" on movie pages, see movies/recommendations.py
+RECOMMENDATIONS_TOP_K = 8
+RECOMMENDATIONS_WORKERS = 2
+
+# Petition votes are buffered per process and written in batches, see
+# movies/votes.py. 0 writes each vote in its request.
+PETITION_VOTE_FLUSH_INTERVAL = 1.0
+PETITION_VOTE_BATCH_SIZE = 500
@@ -0,0 +1,67 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from . import database
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def _environ(self, **values):
+        patcher = mock.patch.dict(os.environ, values)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for name in ('DATABASE_BACKEND', 'DATABASE_CONN_MAX_AGE', 'SQLITE_PATH', 'SQLITE_WAL'):
+            if name not in values:
+                os.environ.pop(name, None)
+
+    def _pragmas(self, config):
+        wrapper = ConnectionHandler({'default': config})['default']
+        # the backend's own connect, without the test runner's guard
+        conn = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            return {
+                pragma: conn.execute(f'PRAGMA {pragma}').fetchone()[0]
+                for pragma in ('journal_mode', 'synchronous', 'busy_timeout')
+            }
+        finally:
+            conn.close()
+
+    def test_backend_comes_from_the_environment(self):
+        self._environ()
+        self.assertEqual(
+            database.from_environment(Path('/srv'))['ENGINE'], 'moviesstore.backends.sqlite3')
+        self._environ(DATABASE_BACKEND='postgres')
+        self.assertEqual(
+            database.from_environment(Path('/srv'))['ENGINE'], 'django.db.backends.postgresql')
+        self._environ(DATABASE_BACKEND='oracle')
+        with self.assertRaises(ImproperlyConfigured):
+            database.from_environment(Path('/srv'))
+
+    def test_connections_persist_by_default(self):
+        self._environ()
+        config = database.sqlite('db.sqlite3')
+        self.assertEqual(config['CONN_MAX_AGE'], database.CONN_MAX_AGE)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self._environ(DATABASE_CONN_MAX_AGE='0')
+        self.assertEqual(database.sqlite('db.sqlite3')['CONN_MAX_AGE'], 0)
+
+    def test_pragmas_run_on_each_connection(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'db.sqlite3'
+        self._environ()
+        # journal_mode is written into the file, so WAL is opt-in
+        self.assertEqual(
+            self._pragmas(database.sqlite(path)),
+            {'journal_mode': 'delete', 'synchronous': 2, 'busy_timeout': 20000},
+        )
+        self._environ(SQLITE_WAL='1')
+        self.assertEqual(
+            self._pragmas(database.sqlite(path)),
+            {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 20000},
+        )
@@ -0,0 +1,21 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+@admin.action(description='Run selected tasks again')
+def retry_tasks(modeladmin, request, queryset):
+    queryset.exclude(status=Task.RUNNING).update(
+        status=Task.QUEUED, run_at=timezone.now(), attempts=0, last_error='',
+    )
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'status', 'attempts', 'run_at', 'finished_at']
+    list_filter = ['status', 'name']
+    ordering = ['-id']
+    actions = [retry_tasks]
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class TaskqueueConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'taskqueue'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+
+        # register every app's @task functions, so workers can run them
+        autodiscover_modules('tasks')
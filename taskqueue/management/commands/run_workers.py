@@ -0,0 +1,31 @@
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from taskqueue import worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background task workers. With --processes N a supervisor keeps "
+        "N worker processes alive and queues TASKS_PERIODIC tasks; with "
+        "--once the queue is drained in this process and the command exits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=2)
+        parser.add_argument("--poll", type=float, default=1.0,
+            help="Seconds an idle worker waits before polling again.")
+        parser.add_argument("--once", action="store_true",
+            help="Run every due task, then exit (e.g. from cron or CI).")
+
+    def handle(self, *args, **options):
+        if options["processes"] < 1 or options["poll"] <= 0:
+            raise CommandError("--processes and --poll must be positive.")
+        if options["once"]:
+            worker.housekeeping()
+            done = worker.work(0, threading.Event(), max_tasks=float("inf"))
+            self.stdout.write(self.style.SUCCESS(f"Ran {done} tasks."))
+            return
+        self.stdout.write(f"Starting {options['processes']} workers; Ctrl-C to stop.")
+        worker.supervise(options["processes"], options["poll"], log=self.stdout.write)
@@ -0,0 +1,215 @@
+import datetime
+import logging
+import threading
+import traceback
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Task queue
+# -------------------------
+# Tasks are rows in taskqueue_task. A view calls some_task.delay(...) and
+# the row is written by transaction.on_commit, so the task never sees data
+# that was rolled back and the insert does not lengthen the request's
+# write transaction. `manage.py run_workers` claims due rows, runs them
+# and retries failures with exponential backoff. TASKS_RUN_INLINE runs
+# tasks right after commit in the calling process instead (no workers).
+
+RUN_INLINE = getattr(settings, 'TASKS_RUN_INLINE', False)
+# seconds a task may go without a heartbeat before it is assumed lost and
+# requeued; a running task refreshes its lock every HEARTBEAT_EVERY seconds
+STALE_AFTER = getattr(settings, 'TASKS_STALE_AFTER', 10 * 60)
+HEARTBEAT_EVERY = STALE_AFTER / 4
+# finished tasks are deleted after this many seconds
+RETENTION = getattr(settings, 'TASKS_RETENTION', 7 * 24 * 60 * 60)
+
+registry = {}
+
+
+class TaskFunction:
+    def __init__(self, fn, max_attempts, retry_delay):
+        self.fn = fn
+        self.name = f'{fn.__module__}.{fn.__name__}'
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.__doc__ = fn.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.fn(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Run as soon as a worker is free, once the current transaction commits."""
+        self.schedule(None, *args, **kwargs)
+
+    def schedule(self, when, *args, **kwargs):
+        """Run at `when` (a datetime or a timedelta from now) after commit."""
+        if isinstance(when, datetime.timedelta):
+            when = timezone.now() + when
+        if RUN_INLINE:
+            transaction.on_commit(lambda: self.fn(*args, **kwargs), robust=True)
+            return
+
+        def enqueue():
+            try:
+                Task.objects.create(
+                    name=self.name, args=list(args), kwargs=kwargs,
+                    run_at=when or timezone.now(), max_attempts=self.max_attempts,
+                )
+            except Exception:
+                # the caller's transaction has committed already: don't fail
+                # the request, but leave a trace of the task that was lost
+                logger.exception('Could not queue %s with args=%r kwargs=%r',
+                                 self.name, args, kwargs)
+
+        transaction.on_commit(enqueue, robust=True)
+
+
+def task(max_attempts=3, retry_delay=10):
+    """
+    Register a function as a task. Arguments must be JSON-serializable;
+    pass ids rather than model instances. A failed attempt is retried
+    after retry_delay, 2 * retry_delay, 4 * retry_delay... seconds.
+    """
+    def decorate(fn):
+        task_fn = TaskFunction(fn, max_attempts, retry_delay)
+        registry[task_fn.name] = task_fn
+        return task_fn
+    return decorate
+
+
+def claim(worker_id, now=None):
+    """Mark the oldest due task as running for `worker_id` and return it."""
+    now = now or timezone.now()
+    due = (
+        Task.objects.filter(status=Task.QUEUED, run_at__lte=now)
+        .order_by('run_at', 'id').values_list('id', flat=True)[:10]
+    )
+    for task_id in due:
+        # another worker may win the race for this row; try the next one
+        claimed = Task.objects.filter(id=task_id, status=Task.QUEUED).update(
+            status=Task.RUNNING, locked_by=worker_id, locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Task.objects.get(id=task_id)
+    return None
+
+
+def heartbeat(task_row, now=None):
+    """Refresh the lock on a task that is still running. False if it was lost."""
+    return bool(Task.objects.filter(
+        id=task_row.id, status=Task.RUNNING, locked_by=task_row.locked_by,
+    ).update(locked_at=now or timezone.now()))
+
+
+class _Heartbeat:
+    """Call heartbeat() from a thread while a task runs."""
+
+    def __init__(self, task_row):
+        self.task_row = task_row
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._beat, daemon=True,
+                                       name=f'task-heartbeat-{task_row.id}')
+
+    def _beat(self):
+        try:
+            while not self.stopped.wait(HEARTBEAT_EVERY):
+                if not heartbeat(self.task_row):
+                    logger.warning('Task %s lost its lock while running', self.task_row)
+                    return
+        except Exception:
+            logger.exception('Heartbeat for task %s failed', self.task_row)
+        finally:
+            # the thread's own connection
+            connection.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def execute(task_row):
+    """Run a claimed task and record the outcome. Returns True on success."""
+    task_fn = registry.get(task_row.name)
+    mine = Task.objects.filter(id=task_row.id, locked_by=task_row.locked_by)
+    try:
+        if task_fn is None:
+            raise LookupError(f'No task registered as {task_row.name!r}.')
+        # long tasks keep their lock fresh so requeue_stale leaves them be
+        with _Heartbeat(task_row):
+            task_fn.fn(*task_row.args, **task_row.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if task_fn is not None and task_row.attempts < task_row.max_attempts:
+            delay = task_fn.retry_delay * 2 ** (task_row.attempts - 1)
+            logger.warning('Task %s failed (attempt %d), retrying in %ss',
+                           task_row, task_row.attempts, delay)
+            mine.update(status=Task.QUEUED, locked_by='', locked_at=None,
+                        run_at=timezone.now() + datetime.timedelta(seconds=delay),
+                        last_error=error)
+        else:
+            logger.error('Task %s failed for good:\n%s', task_row, error)
+            mine.update(status=Task.FAILED, finished_at=timezone.now(), last_error=error)
+        return False
+    mine.update(status=Task.DONE, finished_at=timezone.now())
+    return True
+
+
+def requeue_stale(now=None):
+    """
+    Put back tasks whose worker died mid-run (no heartbeat for STALE_AFTER
+    seconds), or fail them once they have
+    used up their attempts (a task that kills its worker would otherwise
+    come back forever). Returns (requeued, failed).
+    """
+    now = now or timezone.now()
+    stale = Task.objects.filter(
+        status=Task.RUNNING,
+        locked_at__lt=now - datetime.timedelta(seconds=STALE_AFTER),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED, finished_at=now,
+        last_error='Worker lost while running the last attempt.',
+    )
+    requeued = stale.update(status=Task.QUEUED, locked_by='', locked_at=None, run_at=now)
+    return requeued, failed
+
+
+def schedule_periodic(periodic, now=None):
+    """
+    Queue each {task name: interval seconds} task that has no pending run,
+    `interval` after now (immediately the first time it is ever seen).
+    """
+    now = now or timezone.now()
+    pending = set(
+        Task.objects.filter(name__in=list(periodic), status__in=[Task.QUEUED, Task.RUNNING])
+        .values_list('name', flat=True)
+    )
+    seen = set(Task.objects.filter(name__in=list(periodic)).values_list('name', flat=True).distinct())
+    for name, interval in periodic.items():
+        task_fn = registry.get(name)
+        if name in pending or task_fn is None:
+            continue
+        run_at = now + datetime.timedelta(seconds=interval) if name in seen else now
+        Task.objects.create(name=name, run_at=run_at, max_attempts=task_fn.max_attempts)
+
+
+def purge(now=None):
+    """Delete finished tasks older than TASKS_RETENTION. Returns how many."""
+    now = now or timezone.now()
+    deleted, _ = Task.objects.filter(
+        status__in=[Task.DONE, Task.FAILED],
+        finished_at__lt=now - datetime.timedelta(seconds=RETENTION),
+    ).delete()
+    return deleted
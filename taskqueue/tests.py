@@ -0,0 +1,149 @@
+import datetime
+import threading
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+
+from . import queue
+from .models import Task
+
+calls = []
+
+
+@queue.task(max_attempts=3, retry_delay=10)
+def record(value):
+    calls.append(value)
+
+
+@queue.task(max_attempts=3, retry_delay=10)
+def explode():
+    raise RuntimeError('boom')
+
+
+events = {}
+
+
+@queue.task(max_attempts=1)
+def wait_for(event_name):
+    events[event_name].wait(5)
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.now = timezone.now()
+
+    def _at(self, seconds):
+        return self.now + datetime.timedelta(seconds=seconds)
+
+    def test_delay_queues_on_commit_and_runs_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record.delay(7)
+            self.assertFalse(Task.objects.exists())
+        row = queue.claim('w1')
+        self.assertEqual((row.status, row.attempts, row.locked_by), (Task.RUNNING, 1, 'w1'))
+        self.assertTrue(queue.execute(row))
+        self.assertEqual(calls, [7])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_a_failed_insert_is_logged_not_raised(self):
+        with mock.patch.object(Task.objects, 'create', side_effect=DatabaseError('locked')):
+            with self.assertLogs('taskqueue.queue', 'ERROR') as logs:
+                with self.captureOnCommitCallbacks(execute=True):
+                    record.delay(7)
+        self.assertIn(record.name, logs.output[0])
+        self.assertFalse(Task.objects.exists())
+
+    def test_a_task_is_claimed_by_one_worker(self):
+        first = Task.objects.create(name=record.name, args=[1], run_at=self._at(-2))
+        second = Task.objects.create(name=record.name, args=[2], run_at=self._at(-1))
+        Task.objects.create(name=record.name, args=[3], run_at=self._at(60))
+        self.assertEqual(queue.claim('w1').id, first.id)
+        self.assertEqual(queue.claim('w2').id, second.id)
+        # the third is not due yet
+        self.assertIsNone(queue.claim('w3'))
+
+    def test_failures_back_off_then_fail(self):
+        Task.objects.create(name=explode.name, run_at=self.now, max_attempts=3)
+        run_at = self.now
+        with self.assertLogs('taskqueue.queue', 'WARNING'):
+            for attempt, delay in [(1, 10), (2, 20)]:
+                failed_at = timezone.now()
+                self.assertFalse(queue.execute(queue.claim('w1', now=run_at)))
+                row = Task.objects.get()
+                self.assertEqual((row.status, row.attempts), (Task.QUEUED, attempt))
+                self.assertIn('boom', row.last_error)
+                # retry_delay doubles with each attempt
+                self.assertAlmostEqual(
+                    (row.run_at - failed_at).total_seconds(), delay, delta=1,
+                )
+                run_at = row.run_at
+                self.assertIsNone(queue.claim('w1', now=run_at - datetime.timedelta(seconds=1)))
+            self.assertFalse(queue.execute(queue.claim('w1', now=run_at)))
+        row = Task.objects.get()
+        self.assertEqual((row.status, row.attempts), (Task.FAILED, 3))
+
+    def test_unknown_tasks_fail_without_retrying(self):
+        Task.objects.create(name='nowhere.task', run_at=self.now)
+        with self.assertLogs('taskqueue.queue', 'ERROR'):
+            self.assertFalse(queue.execute(queue.claim('w1')))
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_stale_tasks_are_requeued_until_out_of_attempts(self):
+        lost = self._at(-queue.STALE_AFTER - 1)
+        retry = Task.objects.create(name=record.name, status=Task.RUNNING, attempts=1,
+                                    max_attempts=3, locked_by='gone', locked_at=lost)
+        spent = Task.objects.create(name=record.name, status=Task.RUNNING, attempts=3,
+                                    max_attempts=3, locked_by='gone', locked_at=lost)
+        busy = Task.objects.create(name=record.name, status=Task.RUNNING, attempts=3,
+                                   max_attempts=3, locked_by='alive', locked_at=self.now)
+
+        self.assertEqual(queue.requeue_stale(now=self.now), (1, 1))
+        statuses = dict(Task.objects.values_list('id', 'status'))
+        self.assertEqual(
+            statuses, {retry.id: Task.QUEUED, spent.id: Task.FAILED, busy.id: Task.RUNNING},
+        )
+        self.assertEqual(queue.requeue_stale(now=self.now), (0, 0))
+
+    def test_heartbeats_keep_running_tasks_from_going_stale(self):
+        lost = self._at(-queue.STALE_AFTER - 1)
+        row = Task.objects.create(name=record.name, status=Task.RUNNING, attempts=1,
+                                  locked_by='w1', locked_at=lost)
+        self.assertTrue(queue.heartbeat(row, now=self.now))
+        self.assertEqual(queue.requeue_stale(now=self.now), (0, 0))
+
+        # once requeued, the old worker's heartbeat no longer counts
+        Task.objects.filter(id=row.id).update(locked_at=lost)
+        queue.requeue_stale(now=self.now)
+        self.assertFalse(queue.heartbeat(row, now=self.now))
+        self.assertEqual(Task.objects.get().status, Task.QUEUED)
+
+    def test_execute_beats_while_the_task_runs(self):
+        events['done'] = threading.Event()
+        Task.objects.create(name=wait_for.name, args=['done'], run_at=self.now)
+        row = queue.claim('w1')
+
+        def beat(task_row):
+            events['done'].set()
+            return True
+
+        with mock.patch.object(queue, 'HEARTBEAT_EVERY', 0.01), \
+                mock.patch.object(queue, 'heartbeat', side_effect=beat) as heartbeat:
+            self.assertTrue(queue.execute(row))
+        self.assertEqual(heartbeat.call_args.args[0].id, row.id)
+        self.assertTrue(events['done'].is_set())
+
+    def test_periodic_tasks_keep_one_pending_run(self):
+        periodic = {record.name: 3600, 'nowhere.task': 60}
+        queue.schedule_periodic(periodic, now=self.now)
+        queue.schedule_periodic(periodic, now=self.now)
+        first = Task.objects.get()
+        self.assertEqual((first.name, first.run_at), (record.name, self.now))
+
+        first.status = Task.DONE
+        first.save()
+        queue.schedule_periodic(periodic, now=self.now)
+        following = Task.objects.get(status=Task.QUEUED)
+        self.assertEqual(following.run_at, self._at(3600))
@@ -0,0 +1,120 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+import django
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Workers
+# -------------------------
+# run_workers starts a supervisor that spawns worker processes. Each worker
+# claims and runs one task at a time and sleeps when the queue is empty.
+# The supervisor restarts workers that die, requeues tasks lost with them,
+# queues the periodic tasks in TASKS_PERIODIC and purges old results. On
+# SIGINT/SIGTERM workers finish their current task and exit.
+
+PERIODIC = getattr(settings, 'TASKS_PERIODIC', {})
+HOUSEKEEPING_EVERY = 30  # seconds
+
+
+def _worker_id(index):
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+
+def work(index, stop, poll_interval=1.0, max_tasks=None):
+    """Worker loop; with max_tasks it returns once the queue is drained."""
+    from . import queue
+
+    worker_id = _worker_id(index)
+    done = 0
+    while not stop.is_set():
+        task_row = queue.claim(worker_id)
+        if task_row is None:
+            if max_tasks is not None:
+                break
+            close_old_connections()
+            stop.wait(poll_interval)
+            continue
+        queue.execute(task_row)
+        done += 1
+        if max_tasks is not None and done >= max_tasks:
+            break
+    connections.close_all()
+    return done
+
+
+def _child(index, stop, poll_interval):
+    # the supervisor handles Ctrl-C and tells workers to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
+    local_stop = threading.Event()
+    parent = os.getppid()
+
+    def watch():
+        # also stop if the supervisor was killed outright
+        while not stop.is_set() and os.getppid() == parent:
+            time.sleep(1)
+        local_stop.set()
+
+    threading.Thread(target=watch, daemon=True).start()
+    work(index, local_stop, poll_interval)
+
+
+def housekeeping():
+    from . import queue
+
+    requeued, failed = queue.requeue_stale()
+    if requeued:
+        logger.warning('Requeued %d stale tasks', requeued)
+    if failed:
+        logger.error('Failed %d stale tasks with no attempts left', failed)
+    queue.schedule_periodic(PERIODIC)
+    queue.purge()
+    close_old_connections()
+
+
+def supervise(processes, poll_interval=1.0, log=print):
+    """Run `processes` workers until SIGINT or SIGTERM."""
+    ctx = multiprocessing.get_context('spawn')
+    stop = ctx.Event()
+    stopping = []
+
+    def request_stop(signum, frame):
+        # only flag it: Event.set() here could deadlock with a wait() that
+        # the signal interrupted
+        stopping.append(signum)
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    # workers open their own connections
+    connections.close_all()
+    children = {}
+    next_housekeeping = 0
+    while not stopping:
+        for index in range(processes):
+            child = children.get(index)
+            if child is None or not child.is_alive():
+                if child is not None:
+                    log(f'Worker {index} exited with {child.exitcode}; restarting.')
+                child = ctx.Process(target=_child, args=(index, stop, poll_interval),
+                                    name=f'task-worker-{index}')
+                child.start()
+                children[index] = child
+        if time.monotonic() >= next_housekeeping:
+            housekeeping()
+            next_housekeeping = time.monotonic() + HOUSEKEEPING_EVERY
+        time.sleep(1)
+
+    log('Stopping workers...')
+    stop.set()
+    for child in children.values():
+        child.join()